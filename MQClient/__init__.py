@@ -1,6 +1,6 @@
 """Public init."""
 
-from . import backends
-from .queue import Queue
+from . import backends, claimcheck, compressors, metrics, packing, retry, serializers, spool, tracing, workers
+from .queue import AsyncQueue, FanOutQueue, MultiQueue, Queue, publish_to
 
-__all__ = ["Queue", "backends"]
+__all__ = ["AsyncQueue", "FanOutQueue", "MultiQueue", "Queue", "publish_to", "backends", "claimcheck", "compressors", "metrics", "packing", "retry", "serializers", "spool", "tracing", "workers"]
@@ -1,30 +1,47 @@
 """Define an interface that backends will adhere to."""
 
+import collections
 import logging
-import pickle
+import time
 import types
-from typing import Any, Generator, Optional, Type, Union
+from typing import (Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Generator, List, Optional,
+                    Tuple, Type, Union)
+
+from . import compressors, serializers
+from .metrics import NO_METRICS, QueueMetrics
+from .tracing import Tracer
+
+LOGGER = logging.getLogger(__name__)
+
+# max number of payload bytes shown by `Message.__repr__()`
+REPR_DATA_LIMIT = 64
 
 MessageID = Union[int, str, bytes]
+MessageData = Union[bytes, bytearray, memoryview]
 
 
 class Message:
     """Message object.
 
-    Holds msg_id and data.
+    Holds msg_id and data. `data` may be any bytes-like object (e.g. a
+    `memoryview` of the broker client's buffer), so that it's never
+    copied on its way to being deserialized.
     """
 
-    def __init__(self, msg_id: MessageID, data: bytes):
-        if not isinstance(msg_id, (int, str, bytes)):
-            raise TypeError(f"Message.msg_id must be type 'int', 'str', or 'bytes' (not '{type(msg_id)}').")
-        if not isinstance(data, bytes):
-            raise TypeError(f"Message.data must be type 'bytes' (not '{type(data)}').")
+    __slots__ = ('msg_id', 'data')
+
+    def __init__(self, msg_id: MessageID, data: MessageData):
         self.msg_id = msg_id
         self.data = data
 
     def __repr__(self) -> str:
-        """Return string of basic properties/attributes."""
-        return f"Message(msg_id={self.msg_id!r}, data={self.data!r})"
+        """Return string of basic properties/attributes.
+
+        The payload is truncated to `REPR_DATA_LIMIT` bytes.
+        """
+        if len(self.data) <= REPR_DATA_LIMIT:
+            return f"Message(msg_id={self.msg_id!r}, data={bytes(self.data)!r})"
+        return f"Message(msg_id={self.msg_id!r}, data={bytes(self.data[:REPR_DATA_LIMIT])!r}... ({len(self.data)} bytes))"
 
     def __eq__(self, other: object) -> bool:
         """Return True if self's and other's `data` are equal.
@@ -41,10 +58,19 @@ class Message:
 
 
 class RawQueue:
-    """Raw queue object, to hold queue state."""
+    """Raw queue object, to hold queue state.
+
+    Backends report acks, rejects and reconnects to `metrics`, and
+    (if set) each message's wait and ack times to `tracer`. Ids of
+    messages acked by `message_generator()` (via `AckBatcher`) are
+    passed to `on_ack`, if set.
+    """
 
     def __init__(self) -> None:
         self.was_closed = False
+        self.metrics = NO_METRICS  # type: QueueMetrics
+        self.tracer = None  # type: Optional[Tracer]
+        self.on_ack = None  # type: Optional[Callable[[List[MessageID]], None]]
 
     def connect(self) -> None:
         """Set up connection."""
@@ -62,24 +88,63 @@ class Pub(RawQueue):
         """Send a message on a queue."""
         raise NotImplementedError()
 
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue.
+
+        Backends should override this to publish the batch with a
+        single round trip. The default sends each message individually.
+        """
+        for msg in msgs:
+            self.send_message(msg)
+
 
 class Sub(RawQueue):
     """Subscriber queue."""
 
-    def get_message(self) -> Optional[Message]:
-        """Get a single message from a queue."""
+    def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a single message from a queue.
+
+        Return `None` if no message arrives within `timeout_millis`.
+        """
         raise NotImplementedError()
 
+    def get_messages(self, num_messages: int, timeout_millis: Optional[int] = 100) -> List[Message]:
+        """Get up to `num_messages` messages from a queue.
+
+        Wait up to `timeout_millis` for the batch to fill. Backends
+        should override this to take the batch from their prefetch
+        buffer. The default calls `get_message()` repeatedly.
+        """
+        msgs = []  # type: List[Message]
+        deadline = None if timeout_millis is None else time.monotonic() + timeout_millis / 1000
+        while len(msgs) < num_messages:
+            remaining = None if deadline is None else max(0, int((deadline - time.monotonic()) * 1000))
+            msg = self.get_message(timeout_millis=remaining)
+            if msg is None:
+                break
+            msgs.append(msg)
+        return msgs
+
     def ack_message(self, msg_id: MessageID) -> None:
         """Ack a message from the queue."""
         raise NotImplementedError()
 
+    def ack_messages(self, msg_ids: List[MessageID]) -> None:
+        """Ack a batch of messages from the queue.
+
+        Backends should override this to ack the batch at once. The
+        default acks each message individually.
+        """
+        for msg_id in msg_ids:
+            self.ack_message(msg_id)
+
     def reject_message(self, msg_id: MessageID) -> None:
         """Reject (nack) a message from the queue."""
         raise NotImplementedError()
 
     def message_generator(self, timeout: int = 60, auto_ack: bool = True,
-                          propagate_error: bool = True) -> Generator[Optional[Message], None, None]:
+                          propagate_error: bool = True, ack_batch_size: int = 1,
+                          ack_interval: Optional[float] = None) -> Generator[Optional[Message], None, None]:
         """Yield Messages.
 
         Generate messages with variable timeout. Close instance on exit and error.
@@ -89,20 +154,222 @@ class Sub(RawQueue):
             timeout {int} -- timeout in seconds for inactivity (default: {60})
             auto_ack {bool} -- Ack each message after successful processing (default: {True})
             propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+            ack_batch_size {int} -- with `auto_ack`, ack messages in batches of this size (default: {1})
+            ack_interval {Optional[float]} -- with `auto_ack`, also ack once the oldest un-acked message is this many seconds old (default: {None})
         """
         raise NotImplementedError()
 
 
+class AckBatcher:
+    """Accumulate processed messages' ids, and ack them in batches.
+
+    A batch is acked (via `Sub.ack_messages()`) once it has
+    `batch_size` ids, or once its oldest id has waited `interval`
+    seconds (checked as ids are added). Call `flush()` before rejecting
+    a message, and before closing.
+    """
+
+    def __init__(self, sub: Sub, batch_size: int = 1, interval: Optional[float] = None) -> None:
+        if batch_size < 1:
+            raise ValueError('ack batch_size must be positive')
+        self.sub = sub
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pending = []  # type: List[MessageID]
+        self._oldest = 0.0
+
+    def add(self, msg_id: MessageID) -> None:
+        """Add a message id to ack, and ack the batch if it's due."""
+        if not self.pending:
+            self._oldest = time.monotonic()
+        self.pending.append(msg_id)
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        elif self.interval is not None and time.monotonic() - self._oldest >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Ack all pending message ids."""
+        if self.pending:
+            pending, self.pending = self.pending, []
+            self.sub.ack_messages(pending)
+            if self.sub.on_ack:
+                self.sub.on_ack(pending)
+
+
+class MultiSub(RawQueue):
+    """Subscriber to many queues at once (fan-in).
+
+    Backends buffer each queue's received messages separately (see
+    `_set_queues()`), and `get_message()` takes from those buffers. When
+    several queues have buffered messages, the next one is picked by
+    smooth weighted round-robin, so a queue with weight 3 gets three
+    messages for each one from a queue with weight 1. Each queue's
+    messages are in arrival order.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names = []  # type: List[str]
+        self.weights = {}  # type: Dict[str, int]
+        self.prefetch = 1  # per queue
+        self._buffers = {}  # type: Dict[str, Deque[Message]]
+        self._credits = {}  # type: Dict[str, int]
+
+    def _set_queues(self, names: List[str], weights: Optional[Dict[str, int]]) -> None:
+        """Set the queues' names, and their weights (default: 1)."""
+        if not names:
+            raise ValueError('at least one queue name is required')
+        weights = weights if weights else {}
+        if any(w < 1 for w in weights.values()):
+            raise ValueError('weights must be positive')
+        self.names = list(names)
+        self.weights = {name: weights.get(name, 1) for name in self.names}
+        self._buffers = {name: collections.deque() for name in self.names}
+        self._credits = {name: 0 for name in self.names}
+
+    def _clear_buffers(self) -> None:
+        """Drop buffered messages (e.g. the broker redelivers them on reconnect)."""
+        for buffer in self._buffers.values():
+            buffer.clear()
+
+    def _fill_buffers(self, timeout_millis: Optional[int]) -> None:
+        """Buffer newly-received messages.
+
+        If none are buffered, wait up to `timeout_millis` (or forever,
+        if None) for some.
+        """
+        raise NotImplementedError()
+
+    def _pick(self) -> Optional[Tuple[str, Message]]:
+        """Take the next buffered message, by smooth weighted round-robin."""
+        ready = [name for name in self.names if self._buffers[name]]
+        if not ready:
+            return None
+        for name in ready:
+            self._credits[name] += self.weights[name]
+        picked = max(ready, key=lambda name: self._credits[name])
+        self._credits[picked] -= sum(self.weights[name] for name in ready)
+        return picked, self._buffers[picked].popleft()
+
+    def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Tuple[str, Message]]:
+        """Get the next message from any of the queues, with its queue's name.
+
+        Return `None` if no message arrives within `timeout_millis`.
+        """
+        self._fill_buffers(timeout_millis)
+        return self._pick()
+
+    def ack_message(self, name: str, msg_id: MessageID) -> None:
+        """Ack a message from queue `name`."""
+        raise NotImplementedError()
+
+    def reject_message(self, name: str, msg_id: MessageID) -> None:
+        """Reject (nack) a message from queue `name`."""
+        raise NotImplementedError()
+
+
 class Backend:
     """Backend Pub-Sub Factory."""
 
+    def create_pub_queue(self, address: str, name: str) -> Pub:
+        """Create a publishing queue."""
+        raise NotImplementedError()
+
+    def create_sub_queue(self, address: str, name: str, prefetch: int = 1) -> Sub:
+        """Create a subscription queue."""
+        raise NotImplementedError()
+
+    def create_multi_sub_queue(self, address: str, names: List[str], prefetch: int = 1,
+                               weights: Optional[Dict[str, int]] = None) -> MultiSub:
+        """Create a subscription to many queues, on one connection."""
+        raise NotImplementedError()
+
+    def create_fan_out_pub_queue(self, address: str, names: List[str]) -> Pub:
+        """Create a publishing queue, which sends each message to every queue in `names`."""
+        raise NotImplementedError()
+
+
+# -----------------------------------------------
+# async classes to override/implement (asyncio)
+# -----------------------------------------------
+
+
+class AsyncRawQueue:
+    """Raw asyncio queue object, to hold queue state."""
+
+    def __init__(self) -> None:
+        self.was_closed = False
+
+    async def connect(self) -> None:
+        """Set up connection."""
+        self.was_closed = False
+
+    async def close(self) -> None:
+        """Close interface to queue."""
+        self.was_closed = True
+
+
+class AsyncPub(AsyncRawQueue):
+    """Asyncio publisher queue."""
+
+    async def send_message(self, msg: bytes) -> None:
+        """Send a message on a queue."""
+        raise NotImplementedError()
+
+    async def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue.
+
+        Backends should override this to publish the batch with a
+        single round trip. The default sends each message individually.
+        """
+        for msg in msgs:
+            await self.send_message(msg)
+
+
+class AsyncSub(AsyncRawQueue):
+    """Asyncio subscriber queue."""
+
+    async def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a single message from a queue.
+
+        Return `None` if no message arrives within `timeout_millis`.
+        """
+        raise NotImplementedError()
+
+    async def ack_message(self, msg_id: MessageID) -> None:
+        """Ack a message from the queue."""
+        raise NotImplementedError()
+
+    async def reject_message(self, msg_id: MessageID) -> None:
+        """Reject (nack) a message from the queue."""
+        raise NotImplementedError()
+
+    def message_generator(self, timeout: int = 60, auto_ack: bool = True,
+                          propagate_error: bool = True) -> AsyncGenerator[Optional[Message], None]:
+        """Yield Messages asynchronously.
+
+        Same semantics as `Sub.message_generator()`. Yield `None` on `athrow()`.
+
+        Keyword Arguments:
+            timeout {int} -- timeout in seconds for inactivity (default: {60})
+            auto_ack {bool} -- Ack each message after successful processing (default: {True})
+            propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+        """
+        raise NotImplementedError()
+
+
+class AsyncBackend:
+    """Asyncio Backend Pub-Sub Factory."""
+
     @staticmethod
-    def create_pub_queue(address: str, name: str) -> Pub:
+    async def create_pub_queue(address: str, name: str) -> AsyncPub:
         """Create a publishing queue."""
         raise NotImplementedError()
 
     @staticmethod
-    def create_sub_queue(address: str, name: str, prefetch: int = 1) -> Sub:
+    async def create_sub_queue(address: str, name: str, prefetch: int = 1) -> AsyncSub:
         """Create a subscription queue."""
         raise NotImplementedError()
 
@@ -113,22 +380,59 @@ class Backend:
 
 
 class MessageGeneratorContext:
-    """A context manager wrapping backend.message_generator()."""
+    """A context manager wrapping backend.message_generator().
+
+    Envelopes (see `packing`) are unpacked, yielding each item. An
+    envelope is acked once all its items are processed. If the
+    consumer raises mid-envelope, the envelope is rejected, unless
+    `requeue` is given: then the unprocessed items (incl. the failed
+    one) are passed to `requeue()` to be re-sent, and the envelope is
+    acked (which also closes the generator).
+
+    If `resolve` is given, each message's data is what it returns for
+    the message (e.g. fetched from a claim-check store). If `on_reject`
+    is given, it's passed the id of each message rejected on an error.
+    """
 
     RUNTIME_ERROR_CONTEXT_STRING = "'MessageGeneratorContext' object's runtime context has not been entered. Use 'with as' syntax."
 
-    def __init__(self, sub: Sub, timeout: int, propagate_error: bool) -> None:
-        logging.debug("in __init__")
+    def __init__(self, sub: Sub, timeout: int, propagate_error: bool,
+                 ack_batch_size: int = 1, ack_interval: Optional[float] = None,
+                 requeue: Optional[Callable[[List[memoryview]], None]] = None,
+                 resolve: Optional[Callable[[Message], Any]] = None,
+                 on_reject: Optional[Callable[[List[MessageID]], None]] = None) -> None:
+        LOGGER.debug("in __init__")
         self.message_generator = sub.message_generator(timeout=timeout,
-                                                       propagate_error=propagate_error)
+                                                       propagate_error=propagate_error,
+                                                       ack_batch_size=ack_batch_size,
+                                                       ack_interval=ack_interval)
+        self.propagate_error = propagate_error
+        self.requeue = requeue
+        self.resolve = resolve
+        self.on_reject = on_reject
+        self.metrics = sub.metrics
+        self.tracer = sub.tracer
         self.entered = False
+        self._handed_out = None  # type: Optional[float]
+        self._msg = None  # type: Optional[Message]  # message handed out (or its envelope)
+        self._pending = collections.deque()  # type: Deque[memoryview]  # current envelope's unprocessed items
+        self._current = None  # type: Optional[memoryview]  # item handed out, if from an envelope
+
+    def _record_handled(self) -> None:
+        """Record how long the consumer spent on the last message."""
+        if self._handed_out is not None:
+            seconds = time.monotonic() - self._handed_out
+            self.metrics.handled(seconds)
+            if self.tracer:
+                self.tracer.add('process', seconds)
+            self._handed_out = None
 
     def __enter__(self) -> 'MessageGeneratorContext':
         """Return instance.
 
         Triggered by 'with ... as'.
         """
-        logging.debug("in __enter__")
+        LOGGER.debug("in __enter__")
         self.entered = True
         return self
 
@@ -144,41 +448,166 @@ class MessageGeneratorContext:
             exc_val {Optional[Type[BaseException]]} -- Exception object.
             exc_tb {Optional[types.TracebackType]} -- Exception Traceback.
         """
-        logging.debug(f"in __exit__: {exc_type}")
+        LOGGER.debug("in __exit__: %s", exc_type)
         if not self.entered:
             raise RuntimeError(self.RUNTIME_ERROR_CONTEXT_STRING)
+        self._record_handled()
 
         # Exception was raised
         if exc_type and exc_val:
+            remainder = [self._current] + list(self._pending) if self._current is not None else []
+            self._current = None
+            self._pending.clear()
+            if remainder and self.requeue and self._requeue(remainder):
+                self.message_generator.close()  # acks the envelope
+                if self.propagate_error:
+                    return False  # don't suppress the Exception
+                LOGGER.warning("Excepted error mid-envelope: %s.", exc_val, exc_info=True)
+                return True  # suppress the Exception
+            if self.on_reject and self._msg:
+                self.on_reject([self._msg.msg_id])
             try:
                 self.message_generator.throw(exc_type, exc_val, exc_tb)
             except exc_type:  # message_generator re-raised Exception
                 return False  # don't suppress the Exception
         return True  # suppress any Exception
 
+    def _requeue(self, items: List[memoryview]) -> bool:
+        """Return whether the unprocessed `items` were re-sent."""
+        try:
+            self.requeue(items)  # type: ignore
+        except Exception:  # pylint: disable=W0703
+            LOGGER.warning("Failed to re-send %s unprocessed items; rejecting the envelope.", len(items), exc_info=True)
+            return False
+        LOGGER.debug("Re-sent %s unprocessed items.", len(items))
+        return True
+
     def __iter__(self) -> 'MessageGeneratorContext':
         """Return instance.
 
         Triggered with 'for'/'iter()'.
         """
-        logging.debug("in __iter__")
+        LOGGER.debug("in __iter__")
         if not self.entered:
             raise RuntimeError(self.RUNTIME_ERROR_CONTEXT_STRING)
         return self
 
     def __next__(self) -> Any:
         """Return next Message in queue."""
-        logging.debug("in __next__")
+        LOGGER.debug("in __next__")
+        if not self.entered:
+            raise RuntimeError(self.RUNTIME_ERROR_CONTEXT_STRING)
+        self._record_handled()
+        self._current = None
+
+        start = time.monotonic()
+        while not self._pending:
+            try:
+                msg = next(self.message_generator)  # acks the previous envelope/message
+            except StopIteration:
+                LOGGER.debug("StopIteration")
+                raise
+            if not msg:
+                raise RuntimeError("Yielded value is `None`. This should not have happened.")
+            self.metrics.received(len(msg.data))
+            self._msg = msg
+
+            start = time.monotonic()
+            raw = compressors.decompress(self.resolve(msg) if self.resolve else msg.data)
+            items = serializers.unpack(raw)
+            if items is None:  # not an envelope
+                data = serializers.loads(raw)
+                self._handed_out = time.monotonic()
+                if self.tracer:
+                    self.tracer.add('decode', self._handed_out - start)
+                return data
+            self._pending.extend(items)
+
+        self._current = self._pending.popleft()
+        data = serializers.loads(self._current)
+        self._handed_out = time.monotonic()
+        if self.tracer:
+            self.tracer.add('decode', self._handed_out - start)
+        return data
+
+
+class AsyncMessageGeneratorContext:
+    """An async context manager wrapping async backend.message_generator().
+
+    The subscriber is created lazily, on `async with`.
+    """
+
+    RUNTIME_ERROR_CONTEXT_STRING = "'AsyncMessageGeneratorContext' object's runtime context has not been entered. Use 'async with as' syntax."
+
+    def __init__(self, sub_factory: Callable[[], Awaitable[AsyncSub]],
+                 timeout: int, propagate_error: bool) -> None:
+        LOGGER.debug("in __init__")
+        self.sub_factory = sub_factory
+        self.timeout = timeout
+        self.propagate_error = propagate_error
+        self.message_generator = None  # type: Optional[AsyncGenerator[Optional[Message], None]]
+        self.entered = False
+
+    async def __aenter__(self) -> 'AsyncMessageGeneratorContext':
+        """Return instance.
+
+        Triggered by 'async with ... as'.
+        """
+        LOGGER.debug("in __aenter__")
+        if not self.message_generator:
+            sub = await self.sub_factory()
+            self.message_generator = sub.message_generator(timeout=self.timeout,
+                                                           propagate_error=self.propagate_error)
+        self.entered = True
+        return self
+
+    async def __aexit__(self, exc_type: Optional[Type[BaseException]],
+                        exc_val: Optional[BaseException],
+                        exc_tb: Optional[types.TracebackType]) -> bool:
+        """Return `True` to suppress any Exception raised by consumer code.
+
+        Return `False` to re-raise/propagate that Exception.
+
+        Arguments:
+            exc_type {Optional[BaseException]} -- Exception type.
+            exc_val {Optional[Type[BaseException]]} -- Exception object.
+            exc_tb {Optional[types.TracebackType]} -- Exception Traceback.
+        """
+        LOGGER.debug("in __aexit__: %s", exc_type)
+        if not self.entered or not self.message_generator:
+            raise RuntimeError(self.RUNTIME_ERROR_CONTEXT_STRING)
+
+        # Exception was raised
+        if exc_type and exc_val:
+            try:
+                await self.message_generator.athrow(exc_type, exc_val, exc_tb)
+            except exc_type:  # message_generator re-raised Exception
+                return False  # don't suppress the Exception
+        return True  # suppress any Exception
+
+    def __aiter__(self) -> 'AsyncMessageGeneratorContext':
+        """Return instance.
+
+        Triggered with 'async for'.
+        """
+        LOGGER.debug("in __aiter__")
         if not self.entered:
             raise RuntimeError(self.RUNTIME_ERROR_CONTEXT_STRING)
+        return self
+
+    async def __anext__(self) -> Any:
+        """Return next Message in queue."""
+        LOGGER.debug("in __anext__")
+        if not self.entered or not self.message_generator:
+            raise RuntimeError(self.RUNTIME_ERROR_CONTEXT_STRING)
 
         try:
-            msg = next(self.message_generator)
-        except StopIteration:
-            logging.debug("StopIteration")
+            msg = await self.message_generator.__anext__()
+        except StopAsyncIteration:
+            LOGGER.debug("StopAsyncIteration")
             raise
         if not msg:
             raise RuntimeError("Yielded value is `None`. This should not have happened.")
 
-        data = pickle.loads(msg.data)
+        data = serializers.loads(msg.data)
         return data
@@ -1,4 +1,11 @@
 """Init."""
-from . import apachepulsar, rabbitmq
+from . import apachepulsar, direct, memory, rabbitmq
 
-__all__ = ["apachepulsar", "rabbitmq"]
+__all__ = ["apachepulsar", "direct", "memory", "rabbitmq"]
+
+try:  # POSIX-only, and python 3.8+
+    from . import sharedmemory
+except ImportError:
+    pass
+else:
+    __all__ += ["sharedmemory"]
@@ -1,14 +1,44 @@
 """Back-end using Apache Pulsar."""
 
+import asyncio
+import collections
 import logging
+import threading
 import time
-from typing import Generator, Optional
+from functools import partial
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, Generator, List, Optional
 
 import pulsar  # type: ignore
 
 from .. import backend_interface
-from ..backend_interface import Message, MessageID, Pub, RawQueue, Sub
+from ..backend_interface import (AckBatcher, AsyncPub, AsyncRawQueue, AsyncSub, Message,
+                                 MessageID, MultiSub, Pub, RawQueue, Sub)
+from ..retry import RetryPolicy
 from . import log_msgs
+from .pool import ConnectionPool
+
+LOGGER = logging.getLogger(__name__)
+
+# `batch_receive()` returns early once it has `prefetch` messages
+BATCH_RECEIVE_TIMEOUT_MILLIS = 10
+
+# `batch_receive()` (and its policy) aren't in older clients (e.g. pulsar-client 2.5),
+# which receive one message at a time instead
+HAS_BATCH_RECEIVE = hasattr(pulsar, 'ConsumerBatchReceivePolicy')
+
+
+def _subscribe(client: pulsar.Client, topic: str, subscription_name: str, prefetch: int) -> pulsar.Consumer:
+    """Subscribe to `topic` on the shared subscription, with a receiver queue of `prefetch`."""
+    kwargs = {}  # type: Dict[str, Any]
+    if HAS_BATCH_RECEIVE:
+        kwargs['batch_receive_policy'] = pulsar.ConsumerBatchReceivePolicy(prefetch, -1, BATCH_RECEIVE_TIMEOUT_MILLIS)
+    return client.subscribe(topic,
+                            subscription_name,
+                            receiver_queue_size=prefetch,
+                            consumer_type=pulsar.ConsumerType.Shared,
+                            initial_position=pulsar.InitialPosition.Earliest,
+                            negative_ack_redelivery_delay_ms=0,
+                            **kwargs)
 
 
 class Pulsar(RawQueue):
@@ -18,35 +48,68 @@ class Pulsar(RawQueue):
         RawQueue
     """
 
-    def __init__(self, address: str, topic: str) -> None:
-        """Set address, topic, and client.
+    def __init__(self, address: str, topic: str, pool: Optional[ConnectionPool] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        """Set address, topic, client, and retry policy.
 
         Arguments:
             address {str} -- the pulsar server address, if address doesn't start with 'pulsar', append 'pulsar://'
             topic {str} -- the name of the topic
+            pool {Optional[ConnectionPool]} -- share a pooled client (default: {None})
+            retry_policy {Optional[RetryPolicy]} -- how to retry on connection errors (default: {RetryPolicy()})
         """
         super().__init__()
         self.address = address
         if not self.address.startswith('pulsar'):
             self.address = 'pulsar://' + self.address
         self.topic = topic
+        self.pool = pool
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
         self.client = None  # type: pulsar.Client
 
     def connect(self) -> None:
         """Set up client."""
         super().connect()
-        self.client = pulsar.Client(self.address)
+        if self.pool:
+            self.client = self.pool.acquire(self.address)
+        else:
+            self.client = pulsar.Client(self.address)
 
     def close(self) -> None:
-        """Close client."""
+        """Close client.
+
+        If pooled, release the client instead.
+        """
         super().close()
-        if self.client:
-            try:
-                self.client.close()
-            except Exception as e:  # pylint: disable=W0703
-                # https://github.com/apache/pulsar/issues/3127
-                if str(e) != "Pulsar error: AlreadyClosed":
-                    raise
+        if not self.client:
+            return
+        if self.pool:
+            client, self.client = self.client, None
+            self.pool.release(self.address, client)
+        else:
+            _close_client(self.client)
+
+    @staticmethod
+    def _close_handle(handle: Any) -> None:
+        """Close a pooled client's producer/consumer.
+
+        An unpooled client closes these itself.
+        """
+        try:
+            handle.close()
+        except Exception as e:  # pylint: disable=W0703
+            # https://github.com/apache/pulsar/issues/3127
+            if str(e) != "Pulsar error: AlreadyClosed":
+                raise
+
+
+def _close_client(client: pulsar.Client) -> None:
+    try:
+        client.close()
+    except Exception as e:  # pylint: disable=W0703
+        # https://github.com/apache/pulsar/issues/3127
+        if str(e) != "Pulsar error: AlreadyClosed":
+            raise
 
 
 class PulsarPub(Pulsar, Pub):
@@ -57,8 +120,9 @@ class PulsarPub(Pulsar, Pub):
         Pub
     """
 
-    def __init__(self, address: str, topic: str) -> None:
-        super().__init__(address, topic)
+    def __init__(self, address: str, topic: str, pool: Optional[ConnectionPool] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, topic, pool, retry_policy)
         self.producer = None  # type: pulsar.Producer
 
     def connect(self) -> None:
@@ -66,14 +130,104 @@ class PulsarPub(Pulsar, Pub):
         super().connect()
         self.producer = self.client.create_producer(self.topic)
 
+    def close(self) -> None:
+        """Close producer (if pooled) and client."""
+        if self.pool and self.producer:
+            self._close_handle(self.producer)
+            self.producer = None
+        super().close()
+
     def send_message(self, msg: bytes) -> None:
         """Send a message on a queue."""
         if not self.producer:
             raise RuntimeError("queue is not connected")
 
-        logging.debug(log_msgs.SENDING_MESSAGE)
+        LOGGER.debug(log_msgs.SENDING_MESSAGE)
         self.producer.send(msg)
-        logging.debug(log_msgs.SENT_MESSAGE)
+        LOGGER.debug(log_msgs.SENT_MESSAGE)
+
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue.
+
+        Messages are pipelined with `send_async()`, then flushed and
+        waited on once for the entire batch.
+        """
+        if not self.producer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        _send_all([self.producer], msgs)
+        LOGGER.debug("%s (%s).", log_msgs.SENT_MESSAGES, len(msgs))
+
+
+def _send_all(producers: List[pulsar.Producer], msgs: List[bytes]) -> None:
+    """Send every message with every producer, pipelined with `send_async()`.
+
+    Flush, then wait once for the entire batch.
+    """
+    results = []  # type: List[Any]
+    done = threading.Condition()
+    total = len(producers) * len(msgs)
+
+    def callback(res: Any, _: Any) -> None:
+        with done:
+            results.append(res)
+            done.notify()
+
+    for producer in producers:
+        for msg in msgs:
+            producer.send_async(msg, callback)
+    for producer in producers:
+        producer.flush()
+    with done:
+        done.wait_for(lambda: len(results) == total)
+
+    failed = [res for res in results if res != pulsar.Result.Ok]
+    if failed:
+        raise Exception(f'Pulsar failed to send {len(failed)}/{total} messages ({failed[0]})')
+
+
+class PulsarFanOutPub(Pulsar, Pub):
+    """Wrapper around a pulsar.Producer per topic, on one client.
+
+    Each message is sent to every topic, pipelined together.
+
+    Extends:
+        Pulsar
+        Pub
+    """
+
+    def __init__(self, address: str, names: List[str], pool: Optional[ConnectionPool] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, ', '.join(names), pool, retry_policy)
+        self.names = list(dict.fromkeys(names))
+        self.producers = []  # type: List[pulsar.Producer]
+
+    def connect(self) -> None:
+        """Connect to a producer for each topic."""
+        super().connect()
+        self.producers = [self.client.create_producer(name) for name in self.names]
+
+    def close(self) -> None:
+        """Close producers (if pooled) and client."""
+        if self.pool:
+            for producer in self.producers:
+                self._close_handle(producer)
+        self.producers = []
+        super().close()
+
+    def send_message(self, msg: bytes) -> None:
+        """Send a message on every topic."""
+        self.send_messages([msg])
+
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on every topic."""
+        if not self.producers:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        _send_all(self.producers, msgs)
+        LOGGER.debug("%s (%s, to %s topics).", log_msgs.SENT_MESSAGES, len(msgs), len(self.producers))
 
 
 class PulsarSub(Pulsar, Sub):
@@ -84,99 +238,155 @@ class PulsarSub(Pulsar, Sub):
         Sub
     """
 
-    def __init__(self, address: str, topic: str) -> None:
-        super().__init__(address, topic)
+    def __init__(self, address: str, topic: str, pool: Optional[ConnectionPool] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, topic, pool, retry_policy)
         self.consumer = None  # type: pulsar.Consumer
         self.subscription_name = f'{self.topic}-subscription'  # single shared subscription
         self.prefetch = 1
+        self._buffer = collections.deque()  # type: Deque[Message]
 
     def connect(self) -> None:
         """Connect to subscriber."""
         super().connect()
-        self.consumer = self.client.subscribe(self.topic,
-                                              self.subscription_name,
-                                              receiver_queue_size=self.prefetch,
-                                              consumer_type=pulsar.ConsumerType.Shared,
-                                              initial_position=pulsar.InitialPosition.Earliest,
-                                              negative_ack_redelivery_delay_ms=0)
+        self._buffer.clear()
+        self.consumer = _subscribe(self.client, self.topic, self.subscription_name, self.prefetch)
 
     def close(self) -> None:
-        """Close client and redeliver any unacknowledged messages."""
+        """Close client and redeliver any unacknowledged (incl. buffered) messages."""
+        self._buffer.clear()
         if self.consumer:
             self.consumer.redeliver_unacknowledged_messages()
+            if self.pool:
+                self._close_handle(self.consumer)
+                self.consumer = None
         super().close()
 
-    def get_message(self, timeout_millis: int = 100) -> Optional[Message]:
-        """Get a single message from a queue.
+    def _reopen_pooled(self) -> None:
+        """Reconnect a closed pooled sub, since `close()` drops its consumer.
 
-        To endlessly block until a message is available, set
-        `timeout_millis=None`.
+        (An unpooled sub reconnects via the "AlreadyClosed" error, instead.)
         """
-        if not self.consumer:
-            raise RuntimeError("queue is not connected")
+        if self.pool and self.was_closed and not self.consumer:
+            self.connect()
 
-        logging.debug(log_msgs.GETMSG_RECEIVE_MESSAGE)
-        for i in range(3):
-            if i > 0:
-                logging.debug(f"{log_msgs.GETMSG_CONNECTION_ERROR_TRY_AGAIN} (attempt #{i+1})...")
+    def _receive(self, receive: Callable[[pulsar.Consumer], Any]) -> Any:
+        """Return `receive(self.consumer)`, or None on timeout.
 
+        Reconnect and try again (per `self.retry_policy`) if the
+        consumer was closed.
+        """
+        for i in self.retry_policy.attempts():
             try:
-                msg = self.consumer.receive(timeout_millis=timeout_millis)
-                if msg:
-                    message_id, data = msg.message_id(), msg.data()
-                    if (message_id is not None) and (data is not None):  # message_id may be 0; data may be b''
-                        if isinstance(message_id, pulsar._pulsar.MessageId):  # pylint: disable=I1101,W0212
-                            _id = message_id.serialize()  # message_id.serialize() -> bytes
-                            logging.debug(f"{log_msgs.GETMSG_RECEIVED_MESSAGE} ({_id!r}).")
-                            return Message(_id, data)
-                        logging.debug(f"{log_msgs.GETMSG_RECEIVED_MESSAGE} ({message_id}).")
-                        return Message(message_id, data)
-                logging.debug(log_msgs.GETMSG_NO_MESSAGE)
-                return None
+                if i > 0:
+                    LOGGER.debug("%s (attempt #%s)...", log_msgs.GETMSG_CONNECTION_ERROR_TRY_AGAIN, i+1)
+                    self.connect()
+                    self.metrics.reconnected()
+                return receive(self.consumer)
 
             except Exception as e:
                 # https://github.com/apache/pulsar/issues/3127
                 if str(e) == "Pulsar error: TimeOut":
-                    logging.debug(log_msgs.GETMSG_TIMEOUT_ERROR)
+                    LOGGER.debug(log_msgs.GETMSG_TIMEOUT_ERROR)
                     return None
                 # https://github.com/apache/pulsar/issues/3127
                 if str(e) == "Pulsar error: AlreadyClosed":
+                    if self.pool:
+                        self.pool.discard(self.address, self.client)
                     self.close()
-                    time.sleep(1)
-                    self.connect()
                     continue
-                logging.debug(f"{log_msgs.GETMSG_RAISE_OTHER_ERROR} ({e.__class__.__name__}).")
+                LOGGER.debug("%s (%s).", log_msgs.GETMSG_RAISE_OTHER_ERROR, e.__class__.__name__)
                 raise
 
-        logging.debug(log_msgs.GETMSG_CONNECTION_ERROR_MAX_RETRIES)
+        LOGGER.debug(log_msgs.GETMSG_CONNECTION_ERROR_MAX_RETRIES)
         raise Exception('Pulsar connection error')
 
+    def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a single message from a queue.
+
+        To endlessly block until a message is available, set
+        `timeout_millis=None`.
+        """
+        self._reopen_pooled()
+        if not self.consumer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.GETMSG_RECEIVE_MESSAGE)
+        if self._buffer:  # left over from get_messages()
+            return self._buffer.popleft()
+        return _to_message(self._receive(lambda c: c.receive(timeout_millis=timeout_millis)))
+
+    def get_messages(self, num_messages: int, timeout_millis: Optional[int] = 100) -> List[Message]:
+        """Get up to `num_messages` messages from a queue.
+
+        Messages are fetched with `batch_receive()`, which returns
+        whatever is in the consumer's receiver queue (up to
+        `prefetch`). Keep fetching until there are `num_messages`
+        messages, or `timeout_millis` has passed. To endlessly block
+        until there are `num_messages` messages, set `timeout_millis=None`.
+
+        Without `batch_receive()` (older clients), messages are
+        received one at a time.
+        """
+        if not HAS_BATCH_RECEIVE:
+            return super().get_messages(num_messages, timeout_millis)
+        self._reopen_pooled()
+        if not self.consumer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.GETMSGS_RECEIVE_MESSAGES)
+        deadline = None if timeout_millis is None else time.monotonic() + timeout_millis / 1000
+        while len(self._buffer) < num_messages:
+            for msg in self._receive(lambda c: c.batch_receive()) or []:
+                message = _to_message(msg)
+                if message:
+                    self._buffer.append(message)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+        msgs = [self._buffer.popleft() for _ in range(min(num_messages, len(self._buffer)))]
+        LOGGER.debug("%s (%s messages).", log_msgs.GETMSGS_RECEIVED_MESSAGES, len(msgs))
+        return msgs
+
     def ack_message(self, msg_id: MessageID) -> None:
         """Ack a message from the queue."""
         if not self.consumer:
             raise RuntimeError("queue is not connected")
 
-        logging.debug(log_msgs.ACKING_MESSAGE)
-        if isinstance(msg_id, bytes):
-            self.consumer.acknowledge(pulsar.MessageId.deserialize(msg_id))
-        else:
-            self.consumer.acknowledge(msg_id)
-        logging.debug(f"{log_msgs.ACKED_MESSAGE} ({msg_id!r}).")
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        self.consumer.acknowledge(_to_pulsar_id(msg_id))
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def ack_messages(self, msg_ids: List[MessageID]) -> None:
+        """Ack a batch of messages from the queue.
+
+        Cumulative acks aren't supported on Shared subscriptions, so
+        each message is acked individually (the client batches these
+        into a single ack request to the broker).
+        """
+        if not self.consumer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGES)
+        for msg_id in msg_ids:
+            self.consumer.acknowledge(_to_pulsar_id(msg_id))
+        self.metrics.acked(len(msg_ids))
+        LOGGER.debug("%s (%s messages).", log_msgs.ACKED_MESSAGES, len(msg_ids))
 
     def reject_message(self, msg_id: MessageID) -> None:
         """Reject (nack) a message from the queue."""
         if not self.consumer:
             raise RuntimeError("queue is not connected")
 
-        logging.debug(log_msgs.NACKING_MESSAGE)
-        if isinstance(msg_id, bytes):
-            self.consumer.negative_acknowledge(pulsar.MessageId.deserialize(msg_id))
-        else:
-            self.consumer.negative_acknowledge(msg_id)
-        logging.debug(f"{log_msgs.NACKED_MESSAGE} ({msg_id!r}).")
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        self.consumer.negative_acknowledge(_to_pulsar_id(msg_id))
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
 
     def message_generator(self, timeout: int = 60, auto_ack: bool = True,
-                          propagate_error: bool = True) -> Generator[Optional[Message], None, None]:
+                          propagate_error: bool = True, ack_batch_size: int = 1,
+                          ack_interval: Optional[float] = None) -> Generator[Optional[Message], None, None]:
         """Yield Messages.
 
         Generate messages with variable timeout. Close instance on exit and error.
@@ -186,73 +396,525 @@ class PulsarSub(Pulsar, Sub):
             timeout {int} -- timeout in seconds for inactivity (default: {60})
             auto_ack {bool} -- Ack each message after successful processing (default: {True})
             propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+            ack_batch_size {int} -- with `auto_ack`, ack messages in batches of this size (default: {1})
+            ack_interval {Optional[float]} -- with `auto_ack`, also ack once the oldest un-acked message is this many seconds old (default: {None})
         """
+        self._reopen_pooled()
         if not self.consumer:
             raise RuntimeError("queue is not connected")
 
+        acker = AckBatcher(self, ack_batch_size, ack_interval)
         msg = None
         acked = False
+        tracer = self.tracer
         try:
             while True:
                 # get message
-                logging.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                LOGGER.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                waiting = time.monotonic()
                 msg = self.get_message(timeout_millis=timeout * 1000)
                 acked = False
                 if msg is None:
-                    logging.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
+                    LOGGER.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
                     break
+                if tracer:
+                    tracer.begin(time.monotonic() - waiting)
 
                 # yield message to consumer
                 try:
-                    logging.debug(f"{log_msgs.MSGGEN_YIELDING_MESSAGE} [{msg}]")
+                    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
                     yield msg
                 # consumer throws Exception...
                 except Exception as e:  # pylint: disable=W0703
-                    logging.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
+                    LOGGER.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
                     if msg:
+                        settling = time.monotonic()
+                        acker.flush()
                         self.reject_message(msg.msg_id)
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
                     if propagate_error:
-                        logging.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
+                        LOGGER.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
                         raise
-                    logging.warning(f"{log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR} {e}.", exc_info=True)
+                    LOGGER.warning("%s %s.", log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR, e, exc_info=True)
                     yield None
                 # consumer requests again, aka next()
                 else:
                     if auto_ack:
-                        self.ack_message(msg.msg_id)
+                        settling = time.monotonic()
+                        acker.add(msg.msg_id)
                         acked = True
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
 
         # generator exit (explicit close(), or break in consumer's loop)
         except GeneratorExit:
-            logging.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
+            LOGGER.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
             if auto_ack and (not acked) and msg:
-                self.ack_message(msg.msg_id)
+                acker.add(msg.msg_id)
                 acked = True
 
         # generator is closed (also, garbage collected)
         finally:
-            self.close()
-            logging.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+            if tracer:
+                tracer.end()
+            try:
+                acker.flush()
+            finally:
+                self.close()
+            LOGGER.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+
+
+class PulsarMultiSub(Pulsar, MultiSub):
+    """Wrapper around many pulsar.Consumers, on one client.
+
+    Each topic gets its own consumer (on its usual shared subscription,
+    so it competes fairly with `PulsarSub`s of the same topic), and is
+    polled with `batch_receive()`, which returns whatever is in its
+    receiver queue (up to `prefetch`); or with older clients, for one
+    message at a time.
+
+    Extends:
+        Pulsar
+        MultiSub
+    """
+
+    def __init__(self, address: str, names: List[str], weights: Optional[Dict[str, int]] = None,
+                 pool: Optional[ConnectionPool] = None, retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, ', '.join(names), pool, retry_policy)
+        self._set_queues(names, weights)
+        self.consumers = {}  # type: Dict[str, pulsar.Consumer]
+
+    def connect(self) -> None:
+        """Connect to a subscriber for each topic."""
+        super().connect()
+        self._clear_buffers()
+        for name in self.names:
+            self.consumers[name] = _subscribe(self.client, name, f'{name}-subscription', self.prefetch)
+
+    def close(self) -> None:
+        """Close client and redeliver any unacknowledged (incl. buffered) messages."""
+        self._clear_buffers()
+        for consumer in self.consumers.values():
+            consumer.redeliver_unacknowledged_messages()
+            if self.pool:
+                self._close_handle(consumer)
+        self.consumers = {}
+        super().close()
+
+    def _poll(self) -> None:
+        """Buffer each empty buffer's topic's received messages."""
+        for name, consumer in self.consumers.items():
+            if self._buffers[name]:
+                continue
+            try:
+                if HAS_BATCH_RECEIVE:
+                    msgs = consumer.batch_receive()
+                else:
+                    msgs = [consumer.receive(timeout_millis=BATCH_RECEIVE_TIMEOUT_MILLIS)]
+            except Exception as e:
+                # https://github.com/apache/pulsar/issues/3127
+                if str(e) == "Pulsar error: TimeOut":
+                    continue
+                raise
+            for msg in msgs:
+                message = _to_message(msg)
+                if message:
+                    self._buffers[name].append(message)
+
+    def _fill_buffers(self, timeout_millis: Optional[int]) -> None:
+        """Buffer newly-received messages, polling for up to `timeout_millis` if there are none.
+
+        Reconnect and try again (per `self.retry_policy`) if a
+        consumer was closed.
+        """
+        if not self.consumers:
+            raise RuntimeError("queue is not connected")
+
+        deadline = None if timeout_millis is None else time.monotonic() + timeout_millis / 1000
+        for i in self.retry_policy.attempts():
+            try:
+                if i > 0:
+                    LOGGER.debug("%s (attempt #%s)...", log_msgs.GETMSG_CONNECTION_ERROR_TRY_AGAIN, i+1)
+                    self.connect()
+                    self.metrics.reconnected()
+                while True:
+                    self._poll()
+                    if any(self._buffers.values()):
+                        return
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return
+
+            except Exception as e:
+                # https://github.com/apache/pulsar/issues/3127
+                if str(e) == "Pulsar error: AlreadyClosed":
+                    if self.pool:
+                        self.pool.discard(self.address, self.client)
+                    self.close()
+                    continue
+                LOGGER.debug("%s (%s).", log_msgs.GETMSG_RAISE_OTHER_ERROR, e.__class__.__name__)
+                raise
+
+        LOGGER.debug(log_msgs.GETMSG_CONNECTION_ERROR_MAX_RETRIES)
+        raise Exception('Pulsar connection error')
+
+    def ack_message(self, name: str, msg_id: MessageID) -> None:
+        """Ack a message from topic `name`."""
+        if name not in self.consumers:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        self.consumers[name].acknowledge(_to_pulsar_id(msg_id))
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def reject_message(self, name: str, msg_id: MessageID) -> None:
+        """Reject (nack) a message from topic `name`."""
+        if name not in self.consumers:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        self.consumers[name].negative_acknowledge(_to_pulsar_id(msg_id))
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
+
+
+def _to_message(msg: Optional[pulsar.Message]) -> Optional[Message]:
+    """Convert a received `pulsar.Message` to a `Message`."""
+    if msg:
+        message_id, data = msg.message_id(), msg.data()
+        if (message_id is not None) and (data is not None):  # message_id may be 0; data may be b''
+            if isinstance(message_id, pulsar._pulsar.MessageId):  # pylint: disable=I1101,W0212
+                _id = message_id.serialize()  # message_id.serialize() -> bytes
+                LOGGER.debug("%s (%r).", log_msgs.GETMSG_RECEIVED_MESSAGE, _id)
+                return Message(_id, data)
+            LOGGER.debug("%s (%s).", log_msgs.GETMSG_RECEIVED_MESSAGE, message_id)
+            return Message(message_id, data)
+    LOGGER.debug(log_msgs.GETMSG_NO_MESSAGE)
+    return None
+
+
+def _to_pulsar_id(msg_id: MessageID) -> Any:
+    """Convert a `MessageID` back to what `pulsar.Consumer` expects."""
+    if isinstance(msg_id, bytes):
+        return pulsar.MessageId.deserialize(msg_id)
+    return msg_id
 
 
 class Backend(backend_interface.Backend):
     """Pulsar Pub-Sub Backend Factory.
 
+    Args:
+        share_connections (bool): queues share one client per address,
+            each with its own producer/consumer (default: False)
+        retry_policy (RetryPolicy): how queues retry on connection errors;
+            its counters total all of them (default: RetryPolicy())
+
     Extends:
         Backend
     """
 
-    @staticmethod
-    def create_pub_queue(address: str, name: str) -> PulsarPub:
+    def __init__(self, share_connections: bool = False,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self.pool = None  # type: Optional[ConnectionPool]
+        if share_connections:
+            self.pool = ConnectionPool(lambda address: pulsar.Client(address), _close_client)
+
+    def create_pub_queue(self, address: str, name: str) -> PulsarPub:
         """Create a publishing queue."""
-        q = PulsarPub(address, name)
+        q = PulsarPub(address, name, pool=self.pool, retry_policy=self.retry_policy)
         q.connect()
         return q
 
-    @staticmethod
-    def create_sub_queue(address: str, name: str, prefetch: int = 1) -> PulsarSub:
+    def create_fan_out_pub_queue(self, address: str, names: List[str]) -> PulsarFanOutPub:
+        """Create a publishing queue, which sends each message to every topic."""
+        q = PulsarFanOutPub(address, names, pool=self.pool, retry_policy=self.retry_policy)
+        q.connect()
+        return q
+
+    def create_sub_queue(self, address: str, name: str, prefetch: int = 1) -> PulsarSub:
         """Create a subscription queue."""
-        q = PulsarSub(address, name)
+        q = PulsarSub(address, name, pool=self.pool, retry_policy=self.retry_policy)
         q.prefetch = prefetch
         q.connect()
         return q
+
+    def create_multi_sub_queue(self, address: str, names: List[str], prefetch: int = 1,
+                               weights: Optional[Dict[str, int]] = None) -> PulsarMultiSub:
+        """Create a subscription to many topics, on one client."""
+        q = PulsarMultiSub(address, names, weights, pool=self.pool, retry_policy=self.retry_policy)
+        q.prefetch = prefetch
+        q.connect()
+        return q
+
+
+# -------
+# asyncio
+# -------
+
+
+class AsyncPulsar(AsyncRawQueue):
+    """Base asyncio Pulsar wrapper.
+
+    The pulsar client's blocking calls (connecting, subscribing,
+    receiving) are run in the event loop's default executor.
+
+    Extends:
+        AsyncRawQueue
+    """
+
+    def __init__(self, address: str, topic: str, retry_policy: Optional[RetryPolicy] = None) -> None:
+        """Set address, topic, client, and retry policy.
+
+        Arguments:
+            address {str} -- the pulsar server address, if address doesn't start with 'pulsar', append 'pulsar://'
+            topic {str} -- the name of the topic
+            retry_policy {Optional[RetryPolicy]} -- how to retry on connection errors (default: {RetryPolicy()})
+        """
+        super().__init__()
+        self.address = address
+        if not self.address.startswith('pulsar'):
+            self.address = 'pulsar://' + self.address
+        self.topic = topic
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self.client = None  # type: pulsar.Client
+
+    async def connect(self) -> None:
+        """Set up client."""
+        await super().connect()
+        self.client = await _run_blocking(pulsar.Client, self.address)
+
+    async def close(self) -> None:
+        """Close client."""
+        await super().close()
+        if self.client:
+            try:
+                await _run_blocking(self.client.close)
+            except Exception as e:  # pylint: disable=W0703
+                # https://github.com/apache/pulsar/issues/3127
+                if str(e) != "Pulsar error: AlreadyClosed":
+                    raise
+
+
+class AsyncPulsarPub(AsyncPulsar, AsyncPub):
+    """Asyncio wrapper around pulsar.Producer, using `send_async()`.
+
+    Extends:
+        AsyncPulsar
+        AsyncPub
+    """
+
+    def __init__(self, address: str, topic: str, retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, topic, retry_policy)
+        self.producer = None  # type: pulsar.Producer
+
+    async def connect(self) -> None:
+        """Connect to producer."""
+        await super().connect()
+        self.producer = await _run_blocking(self.client.create_producer, self.topic)
+
+    async def send_message(self, msg: bytes) -> None:
+        """Send a message on a queue."""
+        await self.send_messages([msg])
+
+    async def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue.
+
+        All messages are sent before waiting on any send-receipt.
+        """
+        if not self.producer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        loop = asyncio.get_running_loop()
+
+        def send(msg: bytes) -> 'asyncio.Future[Any]':
+            fut = loop.create_future()  # type: asyncio.Future[Any]
+
+            def callback(res: Any, _: Any) -> None:
+                loop.call_soon_threadsafe(_set_send_result, fut, res)
+
+            self.producer.send_async(msg, callback)
+            return fut
+
+        await asyncio.gather(*[send(msg) for msg in msgs])
+        LOGGER.debug("%s (%s).", log_msgs.SENT_MESSAGES, len(msgs))
+
+
+def _set_send_result(fut: 'asyncio.Future[Any]', res: Any) -> None:
+    if fut.done():
+        return
+    if res == pulsar.Result.Ok:
+        fut.set_result(None)
+    else:
+        fut.set_exception(Exception(f'Pulsar failed to send message ({res})'))
+
+
+class AsyncPulsarSub(AsyncPulsar, AsyncSub):
+    """Asyncio wrapper around pulsar.Consumer.
+
+    Extends:
+        AsyncPulsar
+        AsyncSub
+    """
+
+    def __init__(self, address: str, topic: str, retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, topic, retry_policy)
+        self.consumer = None  # type: pulsar.Consumer
+        self.subscription_name = f'{self.topic}-subscription'  # single shared subscription
+        self.prefetch = 1
+
+    async def connect(self) -> None:
+        """Connect to subscriber."""
+        await super().connect()
+        self.consumer = await _run_blocking(partial(self.client.subscribe,
+                                                    self.topic,
+                                                    self.subscription_name,
+                                                    receiver_queue_size=self.prefetch,
+                                                    consumer_type=pulsar.ConsumerType.Shared,
+                                                    initial_position=pulsar.InitialPosition.Earliest,
+                                                    negative_ack_redelivery_delay_ms=0))
+
+    async def close(self) -> None:
+        """Close client and redeliver any unacknowledged messages."""
+        if self.consumer:
+            self.consumer.redeliver_unacknowledged_messages()
+        await super().close()
+
+    async def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a single message from a queue.
+
+        To endlessly block until a message is available, set
+        `timeout_millis=None`.
+        """
+        if not self.consumer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.GETMSG_RECEIVE_MESSAGE)
+        async for i in self.retry_policy.async_attempts():
+            try:
+                if i > 0:
+                    LOGGER.debug("%s (attempt #%s)...", log_msgs.GETMSG_CONNECTION_ERROR_TRY_AGAIN, i+1)
+                    await self.connect()
+                return _to_message(await _run_blocking(self.consumer.receive, timeout_millis))
+
+            except Exception as e:
+                # https://github.com/apache/pulsar/issues/3127
+                if str(e) == "Pulsar error: TimeOut":
+                    LOGGER.debug(log_msgs.GETMSG_TIMEOUT_ERROR)
+                    return None
+                # https://github.com/apache/pulsar/issues/3127
+                if str(e) == "Pulsar error: AlreadyClosed":
+                    await self.close()
+                    continue
+                LOGGER.debug("%s (%s).", log_msgs.GETMSG_RAISE_OTHER_ERROR, e.__class__.__name__)
+                raise
+
+        LOGGER.debug(log_msgs.GETMSG_CONNECTION_ERROR_MAX_RETRIES)
+        raise Exception('Pulsar connection error')
+
+    async def ack_message(self, msg_id: MessageID) -> None:
+        """Ack a message from the queue."""
+        if not self.consumer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        self.consumer.acknowledge(_to_pulsar_id(msg_id))
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    async def reject_message(self, msg_id: MessageID) -> None:
+        """Reject (nack) a message from the queue."""
+        if not self.consumer:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        self.consumer.negative_acknowledge(_to_pulsar_id(msg_id))
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
+
+    async def message_generator(self, timeout: int = 60, auto_ack: bool = True,
+                                propagate_error: bool = True) -> AsyncGenerator[Optional[Message], None]:
+        """Yield Messages asynchronously.
+
+        Generate messages with variable timeout. Close instance on exit and error.
+        Yield `None` on `athrow()`.
+
+        Keyword Arguments:
+            timeout {int} -- timeout in seconds for inactivity (default: {60})
+            auto_ack {bool} -- Ack each message after successful processing (default: {True})
+            propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+        """
+        if not self.consumer:
+            raise RuntimeError("queue is not connected")
+
+        msg = None
+        acked = False
+        try:
+            while True:
+                # get message
+                LOGGER.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                msg = await self.get_message(timeout_millis=timeout * 1000)
+                acked = False
+                if msg is None:
+                    LOGGER.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
+                    break
+
+                # yield message to consumer
+                try:
+                    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
+                    yield msg
+                # consumer throws Exception...
+                except Exception as e:  # pylint: disable=W0703
+                    LOGGER.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
+                    if msg:
+                        await self.reject_message(msg.msg_id)
+                    if propagate_error:
+                        LOGGER.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
+                        raise
+                    LOGGER.warning("%s %s.", log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR, e, exc_info=True)
+                    yield None
+                # consumer requests again, aka next()
+                else:
+                    if auto_ack:
+                        await self.ack_message(msg.msg_id)
+                        acked = True
+
+        # generator exit (explicit aclose(), or break in consumer's loop)
+        except GeneratorExit:
+            LOGGER.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
+            if auto_ack and (not acked) and msg:
+                await self.ack_message(msg.msg_id)
+                acked = True
+
+        # generator is closed (also, garbage collected)
+        finally:
+            await self.close()
+            LOGGER.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+
+
+async def _run_blocking(func: Any, *args: Any) -> Any:
+    """Run a blocking pulsar call in the event loop's default executor."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+class AsyncBackend(backend_interface.AsyncBackend):
+    """Asyncio Pulsar Pub-Sub Backend Factory.
+
+    Extends:
+        AsyncBackend
+    """
+
+    @staticmethod
+    async def create_pub_queue(address: str, name: str) -> AsyncPulsarPub:
+        """Create a publishing queue."""
+        q = AsyncPulsarPub(address, name)
+        await q.connect()
+        return q
+
+    @staticmethod
+    async def create_sub_queue(address: str, name: str, prefetch: int = 1) -> AsyncPulsarSub:
+        """Create a subscription queue."""
+        q = AsyncPulsarSub(address, name)
+        q.prefetch = prefetch
+        await q.connect()
+        return q
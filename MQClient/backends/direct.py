@@ -0,0 +1,575 @@
+"""Back-end using direct (brokerless) sockets, for low latency.
+
+The publishing process hosts the queues: a `DirectPub` starts (or
+joins) a server in its process, listening on the address, and keeps
+its messages in an in-memory queue (as in `memory`). Subscribers
+connect directly to it, over TCP (`tcp://host:port`, or just
+`host[:port]`) or a Unix socket (`ipc:///path/to/socket`), so each
+message takes one hop instead of two.
+
+Messages are pushed to subscribers round-robin, with credit-based
+flow control: each subscriber has at most `prefetch` un-acked
+messages. Rejected messages, and a disconnected subscriber's un-acked
+messages, are requeued for the other subscribers.
+
+Since there's no broker, only one process can publish on an address,
+and un-acked messages are lost if it exits.
+
+The listener is unauthenticated and unencrypted: anyone who can
+connect to it can consume (and nack) its messages. So a TCP address
+without a host listens on localhost only, and a Unix socket is only
+accessible by its owner. Only listen on another interface (e.g.
+`tcp://0.0.0.0:5680`) on a trusted network.
+"""
+
+import logging
+import os
+import socket
+import stat
+import struct
+import threading
+import time
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from .. import backend_interface
+from ..backend_interface import AckBatcher, Message, MessageID, Pub, RawQueue, Sub
+from ..retry import RetryPolicy
+from . import log_msgs, queuestore
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_HOST = 'localhost'
+DEFAULT_PORT = 5680
+
+# frame: type, delivery tag (or prefetch), payload length, then payload
+_FRAME = struct.Struct('!BQI')
+SUBSCRIBE, MESSAGE, ACK, NACK = 1, 2, 3, 4
+
+# how often a server's sender threads check whether their subscriber left
+_POLL_MILLIS = 100
+
+
+def _parse_address(address: str) -> Tuple[int, Any, str]:
+    """Return the socket family, and address, for `address`; and its canonical form.
+
+    A TCP address's host defaults to `DEFAULT_HOST`, and its port to `DEFAULT_PORT`.
+    """
+    if address.startswith('ipc://'):
+        return socket.AF_UNIX, address[len('ipc://'):], address
+    host_port = address[len('tcp://'):] if address.startswith('tcp://') else address
+    host, _, port = host_port.rpartition(':') if ':' in host_port else (host_port, '', '')
+    host = host or DEFAULT_HOST
+    port_num = int(port) if port else DEFAULT_PORT
+    return socket.AF_INET, (host, port_num), f'tcp://{host}:{port_num}'
+
+
+def _unlink_stale_socket(path: str) -> None:
+    """Remove the Unix socket at `path` if no process listens on it (e.g. its server died)."""
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            LOGGER.info("Removing stale socket %s.", path)
+            os.unlink(path)
+
+
+def _frame(kind: int, tag: int, payload: bytes = b'') -> bytes:
+    return _FRAME.pack(kind, tag, len(payload)) + payload
+
+
+class _FrameReader:
+    """Parse frames from a stream socket's data, as it arrives."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, bytes]]:
+        """Add received data, and return the frames it completes."""
+        self.data += data
+        frames = []
+        offset = 0
+        while len(self.data) - offset >= _FRAME.size:
+            kind, tag, length = _FRAME.unpack_from(self.data, offset)
+            end = offset + _FRAME.size + length
+            if len(self.data) < end:
+                break
+            frames.append((kind, tag, bytes(self.data[offset + _FRAME.size:end])))
+            offset = end
+        del self.data[:offset]
+        return frames
+
+
+class _Server:
+    """Serve a process's queues on an address, to subscribers' connections.
+
+    Unauthenticated: any client that can connect may subscribe.
+    """
+
+    def __init__(self, address: str) -> None:
+        family, sock_address, self.address = _parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        else:
+            _unlink_stale_socket(sock_address)
+        self.sock.bind(sock_address)
+        if family == socket.AF_UNIX:
+            os.chmod(sock_address, 0o600)  # owner only
+        self.sock.listen()
+        threading.Thread(target=self._accept, name=f'MQClient-direct-{self.address}', daemon=True).start()
+
+    def queue(self, name: str) -> queuestore.LocalQueue:
+        """Get the queue named `name` (creating it if needed)."""
+        return queuestore.get_queue(f'direct+{self.address}', name)
+
+    def _accept(self) -> None:
+        while True:
+            conn, _ = self.sock.accept()
+            if conn.family == socket.AF_INET:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        """Handle a subscriber's connection: its subscribe, then its acks and nacks."""
+        reader = _FrameReader()
+        frames = []  # type: List[Tuple[int, int, bytes]]
+        try:
+            while not frames:
+                data = conn.recv(65536)
+                if not data:
+                    return
+                frames = reader.feed(data)
+            kind, prefetch, name = frames.pop(0)
+            if kind != SUBSCRIBE:
+                raise ValueError(f'expected a subscribe frame, not {kind}')
+        except Exception as e:  # pylint: disable=W0703
+            LOGGER.warning("Bad subscriber connection: %r", e)
+            conn.close()
+            return
+
+        consumer = _Consumer(self.queue(name.decode()), conn, max(1, prefetch))
+        threading.Thread(target=consumer.send_loop, daemon=True).start()
+        try:
+            while True:
+                for kind, tag, payload in frames:
+                    if kind not in (ACK, NACK) or payload:
+                        raise ValueError(f'expected an ack or nack frame, not {kind}')
+                    consumer.settle(tag, requeue=(kind == NACK))
+                data = conn.recv(65536)
+                if not data:
+                    break
+                frames = reader.feed(data)
+        except ValueError as e:
+            LOGGER.warning("Bad subscriber connection: %r", e)
+        except OSError:
+            pass
+        finally:
+            consumer.stop()
+
+
+class _Consumer:
+    """A subscriber's connection, as seen by the server."""
+
+    def __init__(self, queue: queuestore.LocalQueue, conn: socket.socket, prefetch: int) -> None:
+        self.queue = queue
+        self.conn = conn
+        self.prefetch = prefetch
+        self.consumer_id = queue.subscribe()
+        self.outstanding = 0  # sent, but not yet acked/nacked
+        self.cond = threading.Condition()
+        self.stopped = False
+
+    def send_loop(self) -> None:
+        """Push messages while the subscriber has credit."""
+        try:
+            while True:
+                with self.cond:
+                    self.cond.wait_for(lambda: self.outstanding < self.prefetch or self.stopped)
+                    if self.stopped:
+                        break
+                    credit = self.prefetch - self.outstanding
+                msgs = self.queue.deliver(self.consumer_id, 0, 1, _POLL_MILLIS)
+                if not msgs:
+                    continue
+                if credit > 1:
+                    msgs += self.queue.deliver(self.consumer_id, 0, credit - 1, 0)
+                with self.cond:
+                    self.outstanding += len(msgs)
+                self.conn.sendall(b''.join(_frame(MESSAGE, int(m.msg_id), bytes(m.data)) for m in msgs))
+        except OSError:
+            pass
+        finally:
+            self.stop()
+            self.queue.unsubscribe(self.consumer_id)  # requeue un-acked messages
+
+    def settle(self, tag: int, requeue: bool) -> None:
+        """Ack (or if `requeue`, nack) a message, returning its credit.
+
+        An unknown (or already settled) message returns no credit.
+        """
+        try:
+            self.queue.settle(self.consumer_id, tag, requeue)
+        except Exception as e:  # pylint: disable=W0703
+            LOGGER.warning("Couldn't settle message %s: %r", tag, e)
+            return
+        with self.cond:
+            self.outstanding -= 1
+            self.cond.notify_all()
+
+    def stop(self) -> None:
+        with self.cond:
+            if self.stopped:
+                return
+            self.stopped = True
+            self.cond.notify_all()
+        self.conn.close()
+
+
+_SERVERS = {}  # type: Dict[str, _Server]
+_SERVERS_LOCK = threading.Lock()
+
+
+def _get_server(address: str) -> _Server:
+    """Get this process's server on `address`, starting it if needed."""
+    canonical = _parse_address(address)[2]
+    with _SERVERS_LOCK:
+        if canonical not in _SERVERS:
+            _SERVERS[canonical] = _Server(address)
+        return _SERVERS[canonical]
+
+
+class Direct(RawQueue):
+    """Base direct-socket queue wrapper.
+
+    Extends:
+        RawQueue
+    """
+
+    def __init__(self, address: str, name: str, retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__()
+        self.address = address
+        self.name = name
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+
+
+class DirectPub(Direct, Pub):
+    """Publisher to a queue hosted in this process, served on its address.
+
+    Extends:
+        Direct
+        Pub
+    """
+
+    def __init__(self, address: str, name: str, retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, name, retry_policy)
+        self.queue = None  # type: Optional[queuestore.LocalQueue]
+
+    def connect(self) -> None:
+        """Start serving (if not yet), and look up (or create) the queue."""
+        super().connect()
+        self.queue = _get_server(self.address).queue(self.name)
+
+    def close(self) -> None:
+        """Drop the queue (it's still served, with any undelivered messages)."""
+        super().close()
+        self.queue = None
+
+    def send_message(self, msg: bytes) -> None:
+        """Send a message on a queue."""
+        self.send_messages([msg])
+
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue."""
+        if not self.queue:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        self.queue.publish(msgs)
+        LOGGER.debug("%s (%s).", log_msgs.SENT_MESSAGES, len(msgs))
+
+
+class DirectSub(Direct, Sub):
+    """Subscriber connected directly to the publishing process.
+
+    Extends:
+        Direct
+        Sub
+    """
+
+    def __init__(self, address: str, name: str, retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, name, retry_policy)
+        self.sock = None  # type: Optional[socket.socket]
+        self.prefetch = 1
+        self._reader = _FrameReader()
+        self._buffer = []  # type: List[Message]
+        self._released = False
+
+    def connect(self) -> None:
+        """Connect to the publishing process, and subscribe."""
+        super().connect()
+        family, sock_address, _ = _parse_address(self.address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.connect(sock_address)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(_frame(SUBSCRIBE, self.prefetch, self.name.encode()))
+        self._reader = _FrameReader()
+        self._buffer = []
+        self._released = False
+
+    def close(self) -> None:
+        """Disconnect; the publishing process requeues un-acked (incl. buffered) messages."""
+        super().close()
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        self._buffer = []
+        self._released = False
+
+    def _read(self, timeout_millis: Optional[int]) -> None:
+        """Buffer the messages that arrive within `timeout_millis`."""
+        assert self.sock
+        self.sock.settimeout(None if timeout_millis is None else max(0, timeout_millis) / 1000)
+        try:
+            data = self.sock.recv(65536)
+        except (socket.timeout, BlockingIOError):
+            return
+        if not data:
+            raise ConnectionError('connection closed by the publishing process')
+        for kind, tag, payload in self._reader.feed(data):
+            if kind == MESSAGE:
+                self._buffer.append(Message(tag, payload))
+
+    def _fill_buffer(self, count: int, timeout_millis: Optional[int]) -> None:
+        """Wait up to `timeout_millis` until there are `count` buffered messages.
+
+        Reconnect and try again (per `self.retry_policy`) on a
+        connection error.
+        """
+        deadline = None if timeout_millis is None else time.monotonic() + timeout_millis / 1000
+        for i in self.retry_policy.attempts():
+            try:
+                if i > 0:
+                    LOGGER.debug("%s (attempt #%s)...", log_msgs.GETMSG_CONNECTION_ERROR_TRY_AGAIN, i+1)
+                    self.close()
+                    self.connect()
+                    self.metrics.reconnected()
+                while len(self._buffer) < count:
+                    if deadline is None:
+                        self._read(None)
+                        continue
+                    remaining = int((deadline - time.monotonic()) * 1000)
+                    self._read(max(0, remaining))
+                    if remaining <= 0:
+                        break
+                return
+            except OSError as e:
+                LOGGER.debug("%s (%r).", log_msgs.GETMSG_CONNECTION_ERROR_TRY_AGAIN, e)
+
+        LOGGER.debug(log_msgs.GETMSG_CONNECTION_ERROR_MAX_RETRIES)
+        raise Exception('Direct connection error')
+
+    def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a message from a queue.
+
+        Return `None` if there's no message within `timeout_millis`.
+        To endlessly block until a message is available, set
+        `timeout_millis=None`.
+        """
+        msgs = self.get_messages(1, timeout_millis)
+        return msgs[0] if msgs else None
+
+    def get_messages(self, num_messages: int, timeout_millis: Optional[int] = 100) -> List[Message]:
+        """Get up to `num_messages` messages from a queue.
+
+        Wait up to `timeout_millis` for the batch to fill. Since the
+        publisher pushes at most `prefetch` un-acked messages, only
+        wait for up to `prefetch` messages.
+        """
+        self._check_connected()
+
+        LOGGER.debug(log_msgs.GETMSGS_RECEIVE_MESSAGES)
+        count = min(num_messages, self.prefetch)
+        if len(self._buffer) < count:
+            self._fill_buffer(count, timeout_millis)
+        msgs, self._buffer = self._buffer[:num_messages], self._buffer[num_messages:]
+        LOGGER.debug("%s (%s messages).", log_msgs.GETMSGS_RECEIVED_MESSAGES, len(msgs))
+        return msgs
+
+    def _release_buffer(self) -> None:
+        """Disconnect if messages are buffered (prefetched, not yet gotten).
+
+        So the publishing process requeues them for other subscribers,
+        instead of pushing them back (as it would nacked messages, while
+        connected). The next get reconnects.
+        """
+        if self._buffer and self.sock:
+            LOGGER.debug("Releasing %s buffered messages.", len(self._buffer))
+            self.sock.close()
+            self.sock = None
+            self._buffer = []
+            self._released = True
+
+    def _check_connected(self) -> None:
+        """Reconnect if the buffered messages were released; raise if closed."""
+        if not self.sock and self._released:
+            self.connect()
+        if not self.sock:
+            raise RuntimeError("queue is not connected")
+
+    def _settle(self, kind: int, msg_id: MessageID) -> None:
+        if not self.sock:
+            raise RuntimeError("queue is not connected")
+        self.sock.sendall(_frame(kind, int(msg_id)))
+
+    def ack_message(self, msg_id: MessageID) -> None:
+        """Ack a message from the queue."""
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        self._settle(ACK, msg_id)
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def ack_messages(self, msg_ids: List[MessageID]) -> None:
+        """Ack a batch of messages from the queue, in one write."""
+        if not self.sock:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGES)
+        self.sock.sendall(b''.join(_frame(ACK, int(msg_id)) for msg_id in msg_ids))
+        self.metrics.acked(len(msg_ids))
+        LOGGER.debug("%s (%s messages).", log_msgs.ACKED_MESSAGES, len(msg_ids))
+
+    def reject_message(self, msg_id: MessageID) -> None:
+        """Reject (nack) a message from the queue, requeuing it."""
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        self._settle(NACK, msg_id)
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
+
+    def message_generator(self, timeout: int = 60, auto_ack: bool = True,
+                          propagate_error: bool = True, ack_batch_size: int = 1,
+                          ack_interval: Optional[float] = None) -> Generator[Optional[Message], None, None]:
+        """Yield Messages.
+
+        Generate messages with variable timeout. Close instance on exit and error.
+        Yield `None` on `throw()`.
+
+        Keyword Arguments:
+            timeout {int} -- timeout in seconds for inactivity (default: {60})
+            auto_ack {bool} -- Ack each message after successful processing (default: {True})
+            propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+            ack_batch_size {int} -- with `auto_ack`, ack messages in batches of this size (default: {1})
+            ack_interval {Optional[float]} -- with `auto_ack`, also ack once the oldest un-acked message is this many seconds old (default: {None})
+        """
+        self._check_connected()
+
+        acker = AckBatcher(self, ack_batch_size, ack_interval)
+        msg = None
+        acked = False
+        tracer = self.tracer
+        try:
+            while True:
+                # get message
+                LOGGER.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                waiting = time.monotonic()
+                msg = self.get_message(timeout_millis=timeout * 1000)
+                acked = False
+                if msg is None:
+                    LOGGER.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
+                    break
+                if tracer:
+                    tracer.begin(time.monotonic() - waiting)
+
+                # yield message to consumer
+                try:
+                    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
+                    yield msg
+                # consumer throws Exception...
+                except Exception as e:  # pylint: disable=W0703
+                    LOGGER.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
+                    if msg:
+                        settling = time.monotonic()
+                        acker.flush()
+                        self.reject_message(msg.msg_id)
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
+                    if propagate_error:
+                        LOGGER.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
+                        raise
+                    LOGGER.warning("%s %s.", log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR, e, exc_info=True)
+                    yield None
+                # consumer requests again, aka next()
+                else:
+                    if auto_ack:
+                        settling = time.monotonic()
+                        acker.add(msg.msg_id)
+                        acked = True
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
+
+        # generator exit (explicit close(), or break in consumer's loop)
+        except GeneratorExit:
+            LOGGER.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
+            if auto_ack and (not acked) and msg:
+                acker.add(msg.msg_id)
+                acked = True
+
+        # generator is closed (also, garbage collected)
+        finally:
+            if tracer:
+                tracer.end()
+            try:
+                acker.flush()
+            finally:
+                self._release_buffer()
+                self.was_closed = True
+            LOGGER.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+
+
+class Backend(backend_interface.Backend):
+    """Direct-socket (brokerless) Pub-Sub Backend Factory.
+
+    Args:
+        retry_policy (RetryPolicy): how subscribers retry on connection errors;
+            its counters total all of them (default: RetryPolicy())
+
+    Extends:
+        Backend
+    """
+
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None) -> None:
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+
+    def create_pub_queue(self, address: str, name: str) -> DirectPub:
+        """Create a publishing queue.
+
+        Args:
+            address (str): address to serve the queue on (unauthenticated; see the module docs)
+            name (str): name of queue on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = DirectPub(address, name, retry_policy=self.retry_policy)
+        q.connect()
+        return q
+
+    def create_sub_queue(self, address: str, name: str, prefetch: int = 1) -> DirectSub:
+        """Create a subscription queue.
+
+        Args:
+            address (str): address of the publishing process
+            name (str): name of queue on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = DirectSub(address, name, retry_policy=self.retry_policy)
+        q.prefetch = prefetch
+        q.connect()
+        return q
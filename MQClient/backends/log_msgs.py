@@ -3,6 +3,9 @@
 SENDING_MESSAGE = "[send_message()] Sending message..."
 SENT_MESSAGE = "[send_message()] Sent message."
 
+SENDING_MESSAGES = "[send_messages()] Sending batch of messages..."
+SENT_MESSAGES = "[send_messages()] Sent batch of messages."
+
 GETMSG_RECEIVE_MESSAGE = "[get_message()] Trying to receive message..."
 GETMSG_RECEIVED_MESSAGE = "[get_message()] Received message."
 GETMSG_NO_MESSAGE = "[get_message()] Didn't receive message. Returning None."
@@ -11,9 +14,15 @@ GETMSG_CONNECTION_ERROR_TRY_AGAIN = "[get_message()] Connection error. Trying ag
 GETMSG_RAISE_OTHER_ERROR = "[get_message()] Other error. Raising Exception."
 GETMSG_CONNECTION_ERROR_MAX_RETRIES = "[get_message()] Connection error. Reached max retries. Raising Exception."
 
+GETMSGS_RECEIVE_MESSAGES = "[get_messages()] Trying to receive messages..."
+GETMSGS_RECEIVED_MESSAGES = "[get_messages()] Received messages."
+
 ACKING_MESSAGE = "[ack_message()] Ack'ing message..."
 ACKED_MESSAGE = "[ack_message()] Ack'd message."
 
+ACKING_MESSAGES = "[ack_messages()] Ack'ing messages..."
+ACKED_MESSAGES = "[ack_messages()] Ack'd messages."
+
 NACKING_MESSAGE = "[reject_message()] Nack'ing message..."
 NACKED_MESSAGE = "[reject_message()] Nack'd message."
 
@@ -0,0 +1,404 @@
+"""Back-end using an in-process, in-memory broker.
+
+Needs no external service, so it's useful for tests, and for measuring
+the client's own overhead. Queues are shared by every `Backend` in the
+process (in `queuestore`, keyed by address and name), and are lost
+when it exits.
+
+Like Pulsar's receiver queue, each subscriber reserves up to `prefetch`
+messages ahead of time, which competing subscribers can't receive.
+Rejected messages are requeued at the front of the queue, as are a
+subscriber's un-acked and reserved messages when it closes.
+"""
+
+import logging
+import time
+from typing import Dict, Generator, List, Optional, Tuple
+
+from .. import backend_interface
+from ..backend_interface import AckBatcher, Message, MessageID, MultiSub, Pub, RawQueue, Sub
+from . import log_msgs, queuestore
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Memory(RawQueue):
+    """Base in-memory queue wrapper.
+
+    Extends:
+        RawQueue
+    """
+
+    def __init__(self, address: str, name: str) -> None:
+        super().__init__()
+        self.address = address
+        self.name = name
+        self.queue = None  # type: Optional[queuestore.LocalQueue]
+
+    def connect(self) -> None:
+        """Look up (or create) the queue."""
+        super().connect()
+        self.queue = queuestore.get_queue(self.address, self.name)
+
+    def close(self) -> None:
+        """Drop the queue."""
+        super().close()
+        self.queue = None
+
+
+class MemoryPub(Memory, Pub):
+    """Publisher to an in-memory queue.
+
+    Extends:
+        Memory
+        Pub
+    """
+
+    def send_message(self, msg: bytes) -> None:
+        """Send a message on a queue."""
+        self.send_messages([msg])
+
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue."""
+        if not self.queue:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        self.queue.publish(msgs)
+        LOGGER.debug("%s (%s).", log_msgs.SENT_MESSAGES, len(msgs))
+
+
+class MemoryFanOutPub(Pub):
+    """Publisher to many in-memory queues at once.
+
+    Extends:
+        Pub
+    """
+
+    def __init__(self, address: str, names: List[str]) -> None:
+        super().__init__()
+        self.address = address
+        self.names = list(names)
+        self.queues = []  # type: List[queuestore.LocalQueue]
+
+    def connect(self) -> None:
+        """Look up (or create) the queues."""
+        super().connect()
+        self.queues = [queuestore.get_queue(self.address, name) for name in self.names]
+
+    def close(self) -> None:
+        """Drop the queues."""
+        super().close()
+        self.queues = []
+
+    def send_message(self, msg: bytes) -> None:
+        """Send a message on every queue."""
+        self.send_messages([msg])
+
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on every queue."""
+        if not self.queues:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        for queue in self.queues:
+            queue.publish(msgs)
+        LOGGER.debug("%s (%s, to %s queues).", log_msgs.SENT_MESSAGES, len(msgs), len(self.queues))
+
+
+class MemorySub(Memory, Sub):
+    """Subscriber to an in-memory queue, with prefetch.
+
+    Extends:
+        Memory
+        Sub
+    """
+
+    def __init__(self, address: str, name: str) -> None:
+        super().__init__(address, name)
+        self.consumer_id = None  # type: Optional[int]
+        self.prefetch = 1
+
+    def connect(self) -> None:
+        """Look up (or create) the queue, and subscribe."""
+        super().connect()
+        self.consumer_id = self.queue.subscribe()  # type: ignore
+
+    def close(self) -> None:
+        """Unsubscribe, requeuing un-acked messages."""
+        if self.queue and self.consumer_id:
+            self.queue.unsubscribe(self.consumer_id)
+        self.consumer_id = None
+        super().close()
+
+    def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a message from a queue.
+
+        Return `None` if there's no message within `timeout_millis`.
+        To endlessly block until a message is available, set
+        `timeout_millis=None`.
+        """
+        msgs = self.get_messages(1, timeout_millis)
+        return msgs[0] if msgs else None
+
+    def get_messages(self, num_messages: int, timeout_millis: Optional[int] = 100) -> List[Message]:
+        """Get up to `num_messages` messages from a queue.
+
+        Wait up to `timeout_millis` for the batch to fill. Reserved
+        (prefetched) messages are delivered first.
+        """
+        if not self.queue or not self.consumer_id:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.GETMSGS_RECEIVE_MESSAGES)
+        msgs = self.queue.deliver(self.consumer_id, self.prefetch, num_messages, timeout_millis)
+        LOGGER.debug("%s (%s messages).", log_msgs.GETMSGS_RECEIVED_MESSAGES, len(msgs))
+        return msgs
+
+    def ack_message(self, msg_id: MessageID) -> None:
+        """Ack a message from the queue."""
+        if not self.queue or not self.consumer_id:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        self.queue.settle(self.consumer_id, msg_id, requeue=False)
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def reject_message(self, msg_id: MessageID) -> None:
+        """Reject (nack) a message from the queue, requeuing it."""
+        if not self.queue or not self.consumer_id:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        self.queue.settle(self.consumer_id, msg_id, requeue=True)
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
+
+    def message_generator(self, timeout: int = 60, auto_ack: bool = True,
+                          propagate_error: bool = True, ack_batch_size: int = 1,
+                          ack_interval: Optional[float] = None) -> Generator[Optional[Message], None, None]:
+        """Yield Messages.
+
+        Generate messages with variable timeout. Close instance on exit and error.
+        Yield `None` on `throw()`.
+
+        Keyword Arguments:
+            timeout {int} -- timeout in seconds for inactivity (default: {60})
+            auto_ack {bool} -- Ack each message after successful processing (default: {True})
+            propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+            ack_batch_size {int} -- with `auto_ack`, ack messages in batches of this size (default: {1})
+            ack_interval {Optional[float]} -- with `auto_ack`, also ack once the oldest un-acked message is this many seconds old (default: {None})
+        """
+        if not self.queue:
+            raise RuntimeError("queue is not connected")
+
+        acker = AckBatcher(self, ack_batch_size, ack_interval)
+        msg = None
+        acked = False
+        tracer = self.tracer
+        try:
+            while True:
+                # get message
+                LOGGER.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                waiting = time.monotonic()
+                msg = self.get_message(timeout_millis=timeout * 1000)
+                acked = False
+                if msg is None:
+                    LOGGER.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
+                    break
+                if tracer:
+                    tracer.begin(time.monotonic() - waiting)
+
+                # yield message to consumer
+                try:
+                    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
+                    yield msg
+                # consumer throws Exception...
+                except Exception as e:  # pylint: disable=W0703
+                    LOGGER.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
+                    if msg:
+                        settling = time.monotonic()
+                        acker.flush()
+                        self.reject_message(msg.msg_id)
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
+                    if propagate_error:
+                        LOGGER.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
+                        raise
+                    LOGGER.warning("%s %s.", log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR, e, exc_info=True)
+                    yield None
+                # consumer requests again, aka next()
+                else:
+                    if auto_ack:
+                        settling = time.monotonic()
+                        acker.add(msg.msg_id)
+                        acked = True
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
+
+        # generator exit (explicit close(), or break in consumer's loop)
+        except GeneratorExit:
+            LOGGER.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
+            if auto_ack and (not acked) and msg:
+                acker.add(msg.msg_id)
+                acked = True
+
+        # generator is closed (also, garbage collected)
+        finally:
+            if tracer:
+                tracer.end()
+            try:
+                acker.flush()
+            finally:
+                if self.queue and self.consumer_id:
+                    self.queue.release(self.consumer_id)
+                self.was_closed = True
+            LOGGER.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+
+
+class MemoryMultiSub(MultiSub):
+    """Subscriber to many in-memory queues at once.
+
+    Each queue's buffer is topped up to `prefetch` messages, which
+    competing subscribers can't receive.
+
+    Extends:
+        MultiSub
+    """
+
+    def __init__(self, address: str, names: List[str], weights: Optional[Dict[str, int]] = None) -> None:
+        super().__init__()
+        self._set_queues(names, weights)
+        self.address = address
+        self.consumers = {}  # type: Dict[str, Tuple[queuestore.LocalQueue, int]]  # name -> (queue, consumer id)
+
+    def connect(self) -> None:
+        """Look up (or create) the queues, and subscribe to each."""
+        super().connect()
+        self._clear_buffers()
+        for name in self.names:
+            queue = queuestore.get_queue(self.address, name)
+            self.consumers[name] = (queue, queue.subscribe())
+
+    def close(self) -> None:
+        """Unsubscribe, requeuing un-acked (incl. buffered) messages."""
+        self._clear_buffers()
+        for queue, consumer_id in self.consumers.values():
+            queue.unsubscribe(consumer_id)
+        self.consumers = {}
+        super().close()
+
+    def _top_up(self) -> bool:
+        """Top up each queue's buffer, and return whether any messages are buffered."""
+        for name, (queue, consumer_id) in self.consumers.items():
+            buffer = self._buffers[name]
+            if len(buffer) < self.prefetch:
+                buffer.extend(queue.deliver(consumer_id, 0, self.prefetch - len(buffer), 0))
+        return any(self._buffers.values())
+
+    def _fill_buffers(self, timeout_millis: Optional[int]) -> None:
+        """Buffer newly-received messages, waiting up to `timeout_millis` if there are none."""
+        if not self.consumers:
+            raise RuntimeError("queue is not connected")
+
+        deadline = None if timeout_millis is None else time.monotonic() + timeout_millis / 1000
+        while True:
+            count = queuestore.activity()
+            if self._top_up():
+                return
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            queuestore.wait_for_activity(count, remaining)
+
+    def ack_message(self, name: str, msg_id: MessageID) -> None:
+        """Ack a message from queue `name`."""
+        if name not in self.consumers:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        queue, consumer_id = self.consumers[name]
+        queue.settle(consumer_id, msg_id, requeue=False)
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def reject_message(self, name: str, msg_id: MessageID) -> None:
+        """Reject (nack) a message from queue `name`, requeuing it."""
+        if name not in self.consumers:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        queue, consumer_id = self.consumers[name]
+        queue.settle(consumer_id, msg_id, requeue=True)
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
+
+
+class Backend(backend_interface.Backend):
+    """In-memory Pub-Sub Backend Factory.
+
+    Extends:
+        Backend
+    """
+
+    def create_pub_queue(self, address: str, name: str) -> MemoryPub:
+        """Create a publishing queue.
+
+        Args:
+            address (str): address of queue
+            name (str): name of queue on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = MemoryPub(address, name)
+        q.connect()
+        return q
+
+    def create_sub_queue(self, address: str, name: str, prefetch: int = 1) -> MemorySub:
+        """Create a subscription queue.
+
+        Args:
+            address (str): address of queue
+            name (str): name of queue on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = MemorySub(address, name)
+        q.prefetch = prefetch
+        q.connect()
+        return q
+
+    def create_fan_out_pub_queue(self, address: str, names: List[str]) -> MemoryFanOutPub:
+        """Create a publishing queue, which sends each message to every queue.
+
+        Args:
+            address (str): address of queues
+            names (List[str]): names of queues on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = MemoryFanOutPub(address, names)
+        q.connect()
+        return q
+
+    def create_multi_sub_queue(self, address: str, names: List[str], prefetch: int = 1,
+                               weights: Optional[Dict[str, int]] = None) -> MemoryMultiSub:
+        """Create a subscription to many queues.
+
+        Args:
+            address (str): address of queues
+            names (List[str]): names of queues on address
+            prefetch (int): max number of messages buffered per queue
+            weights (Optional[Dict[str, int]]): per-queue fairness weights (default: 1 each)
+
+        Returns:
+            MultiSub: queue
+        """
+        q = MemoryMultiSub(address, names, weights)
+        q.prefetch = prefetch
+        q.connect()
+        return q
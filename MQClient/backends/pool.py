@@ -0,0 +1,82 @@
+"""Reference-counted connection pool, shared by backends."""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Thread-safe, reference-counted pool of connections, keyed by address.
+
+    `acquire()` returns the pooled connection for an address (creating
+    it if needed), and `release()` closes it once its last user has
+    released it. A dead connection is replaced on the next `acquire()`;
+    its current users keep their reference until they `release()` it.
+
+    Args:
+        connect (Callable[[str], Any]): create a connection to an address
+        close (Callable[[Any], None]): close a connection
+        is_alive (Callable[[Any], bool]): check a pooled connection before reusing it (default: always alive)
+        per_thread (bool): pool connections per-thread, for non-thread-safe connections (default: False)
+    """
+
+    def __init__(self, connect: Callable[[str], Any], close: Callable[[Any], None],
+                 is_alive: Callable[[Any], bool] = lambda _: True,
+                 per_thread: bool = False) -> None:
+        self._connect = connect
+        self._close = close
+        self._is_alive = is_alive
+        self._per_thread = per_thread
+        self._lock = threading.Lock()
+        self._pooled = {}  # type: Dict[Hashable, Any]
+        self._refs = {}  # type: Dict[int, List[Any]]  # id(connection) -> [connection, count]
+
+    def _key(self, address: str) -> Tuple[str, int]:
+        return (address, threading.get_ident() if self._per_thread else 0)
+
+    def acquire(self, address: str) -> Any:
+        """Get a connection to `address`, and increment its reference count."""
+        key = self._key(address)
+        with self._lock:
+            connection = self._pooled.get(key)
+            if connection is None or not self._is_alive(connection):
+                LOGGER.debug("ConnectionPool: creating connection to %s.", address)
+                connection = self._connect(address)
+                self._pooled[key] = connection
+                self._refs[id(connection)] = [connection, 0]
+            self._refs[id(connection)][1] += 1
+            return connection
+
+    def release(self, address: str, connection: Any) -> None:
+        """Decrement `connection`'s reference count, closing it if unused."""
+        key = self._key(address)
+        with self._lock:
+            entry = self._refs.get(id(connection))
+            if not entry:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._refs[id(connection)]
+            if self._pooled.get(key) is connection:
+                del self._pooled[key]
+        LOGGER.debug("ConnectionPool: closing connection to %s.", address)
+        self._close(connection)
+
+    def discard(self, address: str, connection: Any) -> None:
+        """Stop handing out `connection`, e.g. if it is known to be broken.
+
+        Its current users keep their reference until they `release()` it.
+        """
+        key = self._key(address)
+        with self._lock:
+            if self._pooled.get(key) is connection:
+                del self._pooled[key]
+
+    def refcount(self, connection: Any) -> int:
+        """Get `connection`'s reference count."""
+        with self._lock:
+            entry = self._refs.get(id(connection))
+            return entry[1] if entry else 0
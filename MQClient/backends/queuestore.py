@@ -0,0 +1,139 @@
+"""In-process queues, shared by the `memory` and `direct` backends.
+
+Each `LocalQueue` holds a queue's ready messages, and each consumer's
+reserved and un-acked deliveries, like a broker would. Queues are
+keyed by address and name, and shared by the whole process.
+"""
+
+import collections
+import itertools
+import threading
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ..backend_interface import Message, MessageID
+
+
+class LocalQueue:
+    """Broker-side queue of ready messages, and of each consumer's deliveries.
+
+    Thread-safe; each subscriber is identified by a consumer id.
+    """
+
+    def __init__(self) -> None:
+        self.cond = threading.Condition()
+        self.ready = collections.deque()  # type: Deque[bytes]
+        self.reserved = {}  # type: Dict[int, Deque[bytes]]  # consumer id -> prefetched messages
+        self.unacked = {}  # type: Dict[MessageID, Tuple[int, bytes]]  # delivery tag -> (consumer id, data)
+        self._delivery_tags = itertools.count(1)
+        self._consumer_ids = itertools.count(1)
+
+    def _notify_all(self) -> None:
+        """Wake this queue's waiting consumers, and any `wait_for_activity()` callers."""
+        global _ACTIVITY_COUNT  # pylint: disable=W0603
+        self.cond.notify_all()
+        with _ACTIVITY:
+            _ACTIVITY_COUNT += 1
+            _ACTIVITY.notify_all()
+
+    def publish(self, msgs: List[bytes]) -> None:
+        """Append messages to the queue."""
+        with self.cond:
+            self.ready.extend(msgs)
+            self._notify_all()
+
+    def subscribe(self) -> int:
+        """Add a consumer, and return its id."""
+        with self.cond:
+            consumer_id = next(self._consumer_ids)
+            self.reserved[consumer_id] = collections.deque()
+            return consumer_id
+
+    def release(self, consumer_id: int) -> None:
+        """Requeue a consumer's reserved messages (in order)."""
+        with self.cond:
+            reserved = self.reserved.get(consumer_id)
+            if reserved:
+                self.ready.extendleft(reversed(reserved))
+                reserved.clear()
+                self._notify_all()
+
+    def unsubscribe(self, consumer_id: int) -> None:
+        """Remove a consumer, and requeue its un-acked and reserved messages (in order)."""
+        with self.cond:
+            self.release(consumer_id)
+            tags = [t for t, (c, _) in self.unacked.items() if c == consumer_id]  # in delivery order
+            for tag in reversed(tags):
+                self.ready.appendleft(self.unacked.pop(tag)[1])
+            self.reserved.pop(consumer_id, None)
+            self._notify_all()
+
+    def deliver(self, consumer_id: int, prefetch: int, num_messages: int,
+                timeout_millis: Optional[int]) -> List[Message]:
+        """Deliver up to `num_messages` messages, then reserve `prefetch` more.
+
+        Wait up to `timeout_millis` (or forever, if None) for the
+        batch to fill, then deliver whatever is available.
+        """
+        deadline = None if timeout_millis is None else time.monotonic() + timeout_millis / 1000
+
+        with self.cond:
+            reserved = self.reserved[consumer_id]
+            while len(reserved) + len(self.ready) < num_messages:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+
+            msgs = []  # type: List[Message]
+            while len(msgs) < num_messages and (reserved or self.ready):
+                data = reserved.popleft() if reserved else self.ready.popleft()
+                tag = next(self._delivery_tags)
+                self.unacked[tag] = (consumer_id, data)
+                msgs.append(Message(tag, data))
+
+            while self.ready and len(reserved) < prefetch:
+                reserved.append(self.ready.popleft())
+            return msgs
+
+    def settle(self, consumer_id: int, tag: MessageID, requeue: bool) -> None:
+        """Ack (or if `requeue`, nack) a delivered message.
+
+        A nacked message is requeued ahead of the consumer's reserved
+        messages, which are released too, to keep them in order.
+        """
+        with self.cond:
+            if tag not in self.unacked or self.unacked[tag][0] != consumer_id:
+                raise Exception(f'Unknown delivery tag: {tag!r}')
+            data = self.unacked.pop(tag)[1]
+            if requeue:
+                self.release(consumer_id)
+                self.ready.appendleft(data)
+                self._notify_all()
+
+
+_QUEUES = {}  # type: Dict[Tuple[str, str], LocalQueue]
+_QUEUES_LOCK = threading.Lock()
+
+# notified whenever any queue's ready messages change
+_ACTIVITY = threading.Condition()
+_ACTIVITY_COUNT = 0
+
+
+def get_queue(address: str, name: str) -> LocalQueue:
+    """Get the queue named `name` on `address`, creating it if needed."""
+    with _QUEUES_LOCK:
+        if (address, name) not in _QUEUES:
+            _QUEUES[(address, name)] = LocalQueue()
+        return _QUEUES[(address, name)]
+
+
+def activity() -> int:
+    """Get a counter of changes to any queue's ready messages, for `wait_for_activity()`."""
+    return _ACTIVITY_COUNT
+
+
+def wait_for_activity(count: int, timeout: Optional[float]) -> None:
+    """Wait up to `timeout` seconds (or forever, if None) for any queue to change since `activity()` was `count`."""
+    with _ACTIVITY:
+        _ACTIVITY.wait_for(lambda: _ACTIVITY_COUNT != count, timeout)
@@ -1,15 +1,24 @@
 """Back-end using RabbitMQ."""
 
+import asyncio
+import collections
+import hashlib
 import logging
 import time
 from functools import partial
-from typing import Any, Callable, Generator, Optional
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, Generator, List, Optional, Set
 
 import pika  # type: ignore
+from pika.adapters.asyncio_connection import AsyncioConnection  # type: ignore
 
 from .. import backend_interface
-from ..backend_interface import Message, MessageID, Pub, RawQueue, Sub
+from ..backend_interface import (AckBatcher, AsyncPub, AsyncRawQueue, AsyncSub, Message,
+                                 MessageID, MultiSub, Pub, RawQueue, Sub)
+from ..retry import RetryPolicy
 from . import log_msgs
+from .pool import ConnectionPool
+
+LOGGER = logging.getLogger(__name__)
 
 
 class RabbitMQ(RawQueue):
@@ -19,48 +28,105 @@ class RabbitMQ(RawQueue):
         RawQueue
     """
 
-    def __init__(self, address: str, queue: str) -> None:
+    def __init__(self, address: str, queue: str, pool: Optional[ConnectionPool] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        """Set address, queue, (optional) connection pool, and retry policy.
+
+        Arguments:
+            address {str} -- the RabbitMQ server address
+            queue {str} -- the name of the queue
+            pool {Optional[ConnectionPool]} -- share a pooled connection, with its own channel (default: {None})
+            retry_policy {Optional[RetryPolicy]} -- how to retry on connection errors (default: {RetryPolicy()})
+        """
         super().__init__()
         self.address = address
         if not self.address.startswith('ampq'):
             self.address = 'amqp://' + self.address
         self.queue = queue
+        self.pool = pool
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
         self.connection = None  # type: pika.BlockingConnection
         self.channel = None  # type: pika.adapters.blocking_connection.BlockingChannel
-        self.consumer_id = None
+        self.consumer_id = None  # type: Optional[str]
         self.prefetch = 1
 
     def connect(self) -> None:
         """Set up connection and channel."""
         super().connect()
-        self.connection = pika.BlockingConnection(pika.connection.URLParameters(self.address))
+        if self.pool:
+            self.connection = self.pool.acquire(self.address)
+        else:
+            self.connection = _connect(self.address)
         self.channel = self.connection.channel()
 
     def close(self) -> None:
-        """Close connection."""
+        """Close connection.
+
+        If pooled, close the channel and release the connection instead.
+        """
         super().close()
-        if (self.connection) and (not self.connection.is_closed):
+        if not self.connection:
+            return
+        if self.pool:
+            if self.channel and self.channel.is_open:
+                self.channel.close()
+            connection, self.connection = self.connection, None
+            self.pool.release(self.address, connection)
+        elif not self.connection.is_closed:
             self.connection.close()
 
 
+def _connect(address: str) -> pika.BlockingConnection:
+    return pika.BlockingConnection(pika.connection.URLParameters(address))
+
+
+def _close(connection: pika.BlockingConnection) -> None:
+    if not connection.is_closed:
+        connection.close()
+
+
 class RabbitMQPub(RabbitMQ, Pub):
     """Wrapper around queue with delivery-confirm mode in the channel.
 
+    Batches are published on a second channel, also in confirm mode,
+    without waiting on each message: the broker's confirmations are
+    waited on once per batch.
+
     Extends:
         RabbitMQ
         Pub
     """
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.batch_channel = None  # type: pika.adapters.blocking_connection.BlockingChannel
+        self.exchange = ''  # default exchange, routing by queue name
+        self.routing_key = self.queue
+        self._delivery_tag = 0
+        self._unconfirmed = set()  # type: Set[int]
+        self._nacked = 0
+
     def connect(self) -> None:
         """Set up connection, channel, and queue.
 
         Turn on delivery confirmations.
         """
         super().connect()
+        self.batch_channel = None
 
-        self.channel.queue_declare(queue=self.queue, durable=False)
+        self._declare()
         self.channel.confirm_delivery()
 
+    def _declare(self) -> None:
+        self.channel.queue_declare(queue=self.queue, durable=False)
+
+    def close(self) -> None:
+        """Close connection (or if pooled, the channels)."""
+        if self.pool and self.batch_channel and self.batch_channel.is_open:
+            self.batch_channel.close()
+        self.batch_channel = None
+        super().close()
+
     def send_message(self, msg: bytes) -> None:
         """Send a message on a queue.
 
@@ -74,10 +140,93 @@ class RabbitMQPub(RabbitMQ, Pub):
         if not self.channel:
             raise RuntimeError("queue is not connected")
 
-        logging.debug(log_msgs.SENDING_MESSAGE)
-        try_call(self, partial(self.channel.basic_publish, exchange='',
-                               routing_key=self.queue, body=msg))
-        logging.debug(log_msgs.SENT_MESSAGE)
+        LOGGER.debug(log_msgs.SENDING_MESSAGE)
+        try_call(self, partial(self.channel.basic_publish, exchange=self.exchange,
+                               routing_key=self.routing_key, body=msg))
+        LOGGER.debug(log_msgs.SENT_MESSAGE)
+
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue.
+
+        The whole batch is published, then its confirmations are waited
+        on once, instead of once per message. On a connection error, the
+        entire batch is re-published, so messages the broker already
+        confirmed may be duplicated (at-least-once).
+
+        Args:
+            msgs (List[bytes]): messages to send
+        """
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        try_call(self, partial(self._publish_batch, msgs))
+        LOGGER.debug("%s (%s).", log_msgs.SENT_MESSAGES, len(msgs))
+
+    def _open_batch_channel(self) -> None:
+        """Open the batch channel, in confirm mode.
+
+        A blocking channel in confirm mode waits on each message, so
+        its underlying (asynchronous) channel is used instead.
+        """
+        channel = self.connection.channel()
+        selected = []  # type: List[Any]
+        channel._impl.confirm_delivery(self._on_delivery_confirmation, callback=selected.append)  # pylint: disable=W0212
+        while not selected:
+            self.connection.process_data_events(time_limit=None)
+        self.batch_channel = channel
+        self._delivery_tag = 0
+        self._unconfirmed = set()
+
+    def _on_delivery_confirmation(self, method_frame: Any) -> None:
+        method = method_frame.method
+        if method.multiple:
+            tags = {t for t in self._unconfirmed if t <= method.delivery_tag}
+        else:
+            tags = {method.delivery_tag} & self._unconfirmed
+        self._unconfirmed -= tags
+        if not isinstance(method, pika.spec.Basic.Ack):
+            self._nacked += len(tags)
+
+    def _publish_batch(self, msgs: List[bytes]) -> None:
+        """Publish a batch on the batch channel, then wait for all its confirmations."""
+        if not self.batch_channel:
+            self._open_batch_channel()
+
+        self._nacked = 0
+        for msg in msgs:
+            self.batch_channel._impl.basic_publish(self.exchange, self.routing_key, msg)  # pylint: disable=W0212
+            self._delivery_tag += 1
+            self._unconfirmed.add(self._delivery_tag)
+        while self._unconfirmed:
+            self.connection.process_data_events(time_limit=None)
+        if self._nacked:
+            raise Exception(f'RabbitMQ rejected (nack) {self._nacked} published messages')
+
+
+class RabbitMQFanOutPub(RabbitMQPub):
+    """Publisher to many queues at once, via a fanout exchange bound to each.
+
+    The broker copies each message to every queue, so it's published
+    (and confirmed) once.
+
+    Extends:
+        RabbitMQPub
+    """
+
+    def __init__(self, address: str, names: List[str], pool: Optional[ConnectionPool] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, ', '.join(names), pool, retry_policy)
+        self.names = sorted(set(names))
+        self.exchange = 'MQClient-fanout-' + hashlib.sha1('\0'.join(self.names).encode()).hexdigest()
+        self.routing_key = ''
+
+    def _declare(self) -> None:
+        """Declare the exchange and queues, and bind them."""
+        self.channel.exchange_declare(exchange=self.exchange, exchange_type='fanout', durable=False)
+        for name in self.names:
+            self.channel.queue_declare(queue=name, durable=False)
+            self.channel.queue_bind(queue=name, exchange=self.exchange)
 
 
 class RabbitMQSub(RabbitMQ, Sub):
@@ -93,6 +242,8 @@ class RabbitMQSub(RabbitMQ, Sub):
 
         self.consumer_id = None
         self.prefetch = 1
+        self._buffer = collections.deque()  # type: Deque[Message]
+        self._unacked = set()  # type: Set[MessageID]  # consumer's deliveries, counted against prefetch
 
     def connect(self) -> None:
         """Set up connection, channel, and queue.
@@ -100,26 +251,127 @@ class RabbitMQSub(RabbitMQ, Sub):
         Turn on prefetching.
         """
         super().connect()
+        self.consumer_id = None
+        self._buffer.clear()  # unacked messages are requeued by the broker
+        self._unacked.clear()
 
         self.channel.queue_declare(queue=self.queue, durable=False)
         self.channel.basic_qos(prefetch_count=self.prefetch, global_qos=True)
 
-    def get_message(self) -> Optional[Message]:
-        """Get a message from a queue."""
+    def close(self) -> None:
+        """Close connection (or if pooled, the channel).
+
+        Buffered messages are requeued by the broker.
+        """
+        super().close()
+        self.consumer_id = None
+        self._buffer.clear()
+        self._unacked.clear()
+
+    def _on_message(self, _: Any, method: Any, __: Any, body: bytes) -> None:
+        self._buffer.append(Message(method.delivery_tag, body))
+        self._unacked.add(method.delivery_tag)
+
+    def _is_blocked(self) -> bool:
+        """Return whether the broker won't push more messages until some are acked."""
+        return bool(self.consumer_id) and not self._buffer and len(self._unacked) >= self.prefetch
+
+    def _basic_get(self) -> Optional[Message]:
+        """Get a message directly (not subject to prefetch), or None."""
+        method_frame, _, body = self.channel.basic_get(self.queue)
+        if not method_frame:
+            return None
+        return Message(method_frame.delivery_tag, body)
+
+    def _fill_buffer(self, timeout_millis: Optional[int], count: int = 1) -> None:
+        """Start consuming, then wait for the broker to push `count` messages."""
+        if not self.consumer_id:
+            self.consumer_id = self.channel.basic_consume(self.queue, self._on_message)
+
+        if timeout_millis is None:
+            while len(self._buffer) < count:
+                self.connection.process_data_events(time_limit=None)
+            return
+
+        deadline = time.monotonic() + timeout_millis / 1000
+        while True:
+            self.connection.process_data_events(time_limit=max(0, deadline - time.monotonic()))
+            if len(self._buffer) >= count or time.monotonic() >= deadline:
+                return
+
+    def _cancel_consumer(self) -> None:
+        """Stop `get_message()`'s consumer, and requeue its buffered messages."""
+        if self.consumer_id:
+            self.channel.basic_cancel(self.consumer_id)
+            self.consumer_id = None
+        while self._buffer:
+            msg_id = self._buffer.popleft().msg_id
+            self.channel.basic_nack(msg_id)
+            self._unacked.discard(msg_id)
+
+    def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a message from a queue.
+
+        Messages are pushed by the broker (up to `prefetch` at a time)
+        into a local buffer, which is drained first. To endlessly block
+        until a message is available, set `timeout_millis=None`.
+
+        If `prefetch` messages are un-acked (so the broker is holding
+        back), get one directly instead, without waiting.
+        """
         if not self.channel:
             raise RuntimeError("queue is not connected")
 
-        logging.debug(log_msgs.GETMSG_RECEIVE_MESSAGE)
-        method_frame, _, body = try_call(self, partial(self.channel.basic_get, self.queue))
-
-        if method_frame:
-            msg = Message(method_frame.delivery_tag, body)
-            logging.debug(f"{log_msgs.GETMSG_RECEIVED_MESSAGE} ({int(msg.msg_id)}).")
+        LOGGER.debug(log_msgs.GETMSG_RECEIVE_MESSAGE)
+        if self._is_blocked():
+            msg = try_call(self, self._basic_get)
+            if msg:
+                LOGGER.debug("%s (%s).", log_msgs.GETMSG_RECEIVED_MESSAGE, int(msg.msg_id))
+                return msg
+        elif not self._buffer:
+            try_call(self, partial(self._fill_buffer, timeout_millis))
+
+        if self._buffer:
+            msg = self._buffer.popleft()
+            LOGGER.debug("%s (%s).", log_msgs.GETMSG_RECEIVED_MESSAGE, int(msg.msg_id))
             return msg
 
-        logging.debug(log_msgs.GETMSG_NO_MESSAGE)
+        LOGGER.debug(log_msgs.GETMSG_NO_MESSAGE)
         return None
 
+    def get_messages(self, num_messages: int, timeout_millis: Optional[int] = 100) -> List[Message]:
+        """Get up to `num_messages` messages from a queue.
+
+        Wait up to `timeout_millis` for the broker to push enough
+        messages into the local buffer. Since the broker pushes at most
+        `prefetch` un-acked messages, only wait for up to `prefetch`
+        messages. To endlessly block, set `timeout_millis=None`.
+
+        If `prefetch` messages are un-acked, get messages directly
+        instead, without waiting.
+        """
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.GETMSGS_RECEIVE_MESSAGES)
+        if self._is_blocked():
+            msgs = []  # type: List[Message]
+            while len(msgs) < num_messages:
+                msg = try_call(self, self._basic_get)
+                if not msg:
+                    break
+                msgs.append(msg)
+            LOGGER.debug("%s (%s messages).", log_msgs.GETMSGS_RECEIVED_MESSAGES, len(msgs))
+            return msgs
+
+        count = min(num_messages, self.prefetch)
+        if len(self._buffer) < count:
+            try_call(self, partial(self._fill_buffer, timeout_millis, count))
+
+        msgs = [self._buffer.popleft() for _ in range(min(num_messages, len(self._buffer)))]
+        LOGGER.debug("%s (%s messages).", log_msgs.GETMSGS_RECEIVED_MESSAGES, len(msgs))
+        return msgs
+
     def ack_message(self, msg_id: MessageID) -> None:
         """Ack a message from the queue.
 
@@ -133,9 +385,36 @@ class RabbitMQSub(RabbitMQ, Sub):
         if not self.channel:
             raise RuntimeError("queue is not connected")
 
-        logging.debug(log_msgs.ACKING_MESSAGE)
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
         try_call(self, partial(self.channel.basic_ack, msg_id))
-        logging.debug(f"{log_msgs.ACKED_MESSAGE} ({msg_id!r}).")
+        self._unacked.discard(msg_id)
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def ack_messages(self, msg_ids: List[MessageID]) -> None:
+        """Ack a batch of messages from the queue, with one cumulative ack.
+
+        Note that this acks *every* in-progress message up to the
+        highest delivery tag in `msg_ids`, including any not in
+        `msg_ids`.
+
+        Args:
+            msg_ids (List[MessageID]): message ids
+        """
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+        if not msg_ids:
+            return
+        if len(msg_ids) == 1:
+            self.ack_message(msg_ids[0])
+            return
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGES)
+        last = max(int(msg_id) for msg_id in msg_ids)  # delivery tags are ints
+        try_call(self, partial(self.channel.basic_ack, last, multiple=True))
+        self._unacked = {t for t in self._unacked if int(t) > last}
+        self.metrics.acked(len(msg_ids))
+        LOGGER.debug("%s (%s messages).", log_msgs.ACKED_MESSAGES, len(msg_ids))
 
     def reject_message(self, msg_id: MessageID) -> None:
         """Reject (nack) a message from the queue.
@@ -150,142 +429,273 @@ class RabbitMQSub(RabbitMQ, Sub):
         if not self.channel:
             raise RuntimeError("queue is not connected")
 
-        logging.debug(log_msgs.NACKING_MESSAGE)
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
         try_call(self, partial(self.channel.basic_nack, msg_id))
-        logging.debug(f"{log_msgs.NACKED_MESSAGE} ({msg_id!r}).")
+        self._unacked.discard(msg_id)
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
 
     def message_generator(self, timeout: int = 60, auto_ack: bool = True,
-                          propagate_error: bool = True) -> Generator[Optional[Message], None, None]:
+                          propagate_error: bool = True, ack_batch_size: int = 1,
+                          ack_interval: Optional[float] = None) -> Generator[Optional[Message], None, None]:
         """Yield Messages.
 
         Generate messages with variable timeout. Close instance on exit and error.
         Yield `None` on `throw()`.
 
+        Batched acks are cumulative (see `ack_messages()`). The batch is
+        capped at `prefetch`, since the broker won't deliver more
+        messages until some are acked.
+
         Keyword Arguments:
             timeout {int} -- timeout in seconds for inactivity (default: {60})
             auto_ack {bool} -- Ack each message after successful processing (default: {True})
             propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+            ack_batch_size {int} -- with `auto_ack`, ack messages in batches of this size (default: {1})
+            ack_interval {Optional[float]} -- with `auto_ack`, also ack once the oldest un-acked message is this many seconds old (default: {None})
         """
         if not self.channel:
             raise RuntimeError("queue is not connected")
 
+        # don't compete with get_message()'s consumer
+        try_call(self, self._cancel_consumer)
+
+        acker = AckBatcher(self, min(ack_batch_size, self.prefetch), ack_interval)
         msg = None
         acked = False
+        tracer = self.tracer
         try:
             gen = partial(self.channel.consume, self.queue, inactivity_timeout=timeout)
 
+            waiting = time.monotonic()
             for method_frame, _, body in try_yield(self, gen):
                 # get message
                 msg = None
-                logging.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                LOGGER.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
                 if not method_frame:
-                    logging.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
+                    LOGGER.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
                     break
                 msg = Message(method_frame.delivery_tag, body)
                 acked = False
+                if tracer:
+                    tracer.begin(time.monotonic() - waiting)
 
                 # yield message to consumer
                 try:
-                    logging.debug(f"{log_msgs.MSGGEN_YIELDING_MESSAGE} [{msg}]")
+                    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
                     yield msg
                 # consumer throws Exception...
                 except Exception as e:  # pylint: disable=W0703
-                    logging.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
+                    LOGGER.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
                     if msg:
+                        settling = time.monotonic()
+                        acker.flush()
                         self.reject_message(msg.msg_id)
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
                     if propagate_error:
-                        logging.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
+                        LOGGER.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
                         raise
-                    logging.warning(f"{log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR} {e}.", exc_info=True)
+                    LOGGER.warning("%s %s.", log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR, e, exc_info=True)
                     yield None
                 # consumer requests again, aka next()
                 else:
                     if auto_ack:
-                        self.ack_message(msg.msg_id)
+                        settling = time.monotonic()
+                        acker.add(msg.msg_id)
                         acked = True
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
+                waiting = time.monotonic()
 
         # generator exit (explicit close(), or break in consumer's loop)
         except GeneratorExit:
-            logging.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
+            LOGGER.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
             if auto_ack and (not acked) and msg:
-                self.ack_message(msg.msg_id)
+                acker.add(msg.msg_id)
                 acked = True
 
         # generator is closed (also, garbage collected)
         finally:
-            try_call(self, self.channel.cancel)
+            if tracer:
+                tracer.end()
+            try:
+                acker.flush()
+            finally:
+                try_call(self, self.channel.cancel)
             self.was_closed = True
-            logging.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+            LOGGER.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+
+
+class RabbitMQMultiSub(RabbitMQ, MultiSub):
+    """Consumer of many queues, on one channel.
+
+    Each queue gets its own consumer, with a per-consumer `prefetch`
+    QoS, so one busy queue can't starve the others of deliveries.
+
+    Extends:
+        RabbitMQ
+        MultiSub
+    """
+
+    def __init__(self, address: str, names: List[str], weights: Optional[Dict[str, int]] = None,
+                 pool: Optional[ConnectionPool] = None, retry_policy: Optional[RetryPolicy] = None) -> None:
+        super().__init__(address, ', '.join(names), pool, retry_policy)
+        self._set_queues(names, weights)
+        self.consumer_ids = {}  # type: Dict[str, str]  # name -> consumer tag
+
+    def connect(self) -> None:
+        """Set up connection, channel, and queues, and start consuming each."""
+        super().connect()
+        self._clear_buffers()  # unacked messages are requeued by the broker
+
+        self.channel.basic_qos(prefetch_count=self.prefetch, global_qos=False)
+        for name in self.names:
+            self.channel.queue_declare(queue=name, durable=False)
+            self.consumer_ids[name] = self.channel.basic_consume(name, partial(self._on_message, name))
+
+    def close(self) -> None:
+        """Close connection (or if pooled, the channel).
+
+        Buffered messages are requeued by the broker.
+        """
+        super().close()
+        self.consumer_ids = {}
+        self._clear_buffers()
+
+    def _on_message(self, name: str, _: Any, method: Any, __: Any, body: bytes) -> None:
+        self._buffers[name].append(Message(method.delivery_tag, body))
+
+    def _process_events(self, timeout_millis: Optional[int]) -> None:
+        """Buffer already-arrived messages, or if there are none, wait for some."""
+        if any(self._buffers.values()):
+            self.connection.process_data_events(time_limit=0)
+            return
+
+        if timeout_millis is None:
+            while not any(self._buffers.values()):
+                self.connection.process_data_events(time_limit=None)
+            return
+
+        deadline = time.monotonic() + timeout_millis / 1000
+        while True:
+            self.connection.process_data_events(time_limit=max(0, deadline - time.monotonic()))
+            if any(self._buffers.values()) or time.monotonic() >= deadline:
+                return
+
+    def _fill_buffers(self, timeout_millis: Optional[int]) -> None:
+        """Buffer newly-received messages, waiting up to `timeout_millis` if there are none."""
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        try_call(self, partial(self._process_events, timeout_millis))
+
+    def ack_message(self, name: str, msg_id: MessageID) -> None:
+        """Ack a message from queue `name`.
+
+        Delivery tags are per-channel, so `name` isn't needed.
+        """
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        try_call(self, partial(self.channel.basic_ack, msg_id))
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def reject_message(self, name: str, msg_id: MessageID) -> None:
+        """Reject (nack) a message from queue `name`.
+
+        Delivery tags are per-channel, so `name` isn't needed.
+        """
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        try_call(self, partial(self.channel.basic_nack, msg_id))
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
 
 
 def try_call(queue: RabbitMQ, func: Callable[..., Any]) -> Any:
     """Try to call `func` and return value.
 
-    Try up to 3 times, for connection-related errors.
+    Retry (reconnecting first) per `queue.retry_policy`, for
+    connection-related errors.
     """
-    for i in range(3):
-        if i > 0:
-            logging.debug(f"{log_msgs.TRYCALL_CONNECTION_ERROR_TRY_AGAIN} (attempt #{i+1})...")
-
+    for i in queue.retry_policy.attempts():
         try:
+            if i > 0:
+                LOGGER.debug("%s (attempt #%s)...", log_msgs.TRYCALL_CONNECTION_ERROR_TRY_AGAIN, i+1)
+                queue.close()
+                queue.connect()
+                queue.metrics.reconnected()
             return func()
         except pika.exceptions.ConnectionClosedByBroker:
-            logging.debug(log_msgs.TRYCALL_CONNECTION_CLOSED_BY_BROKER)
+            LOGGER.debug(log_msgs.TRYCALL_CONNECTION_CLOSED_BY_BROKER)
         # Do not recover on channel errors
         except pika.exceptions.AMQPChannelError as err:
-            logging.error(f"{log_msgs.TRYCALL_RAISE_AMQP_CHANNEL_ERROR} {err}.")
+            LOGGER.error("%s %s.", log_msgs.TRYCALL_RAISE_AMQP_CHANNEL_ERROR, err)
             raise
         # Recover on all other connection errors
         except pika.exceptions.AMQPConnectionError:
-            logging.debug(log_msgs.TRYCALL_AMQP_CONNECTION_ERROR)
-
-        queue.close()
-        time.sleep(1)
-        queue.connect()
+            LOGGER.debug(log_msgs.TRYCALL_AMQP_CONNECTION_ERROR)
 
-    logging.debug(log_msgs.TRYCALL_CONNECTION_ERROR_MAX_RETRIES)
+    LOGGER.debug(log_msgs.TRYCALL_CONNECTION_ERROR_MAX_RETRIES)
     raise Exception('RabbitMQ connection error')
 
 
 def try_yield(queue: RabbitMQ, func: Callable[..., Any]) -> Generator[Any, None, None]:
     """Try to call `func` and yield value(s).
 
-    Try up to 3 times, for connection-related errors.
+    Retry (reconnecting first) per `queue.retry_policy`, for
+    connection-related errors.
     """
-    for i in range(3):
-        if i > 0:
-            logging.debug(f"{log_msgs.TRYYIELD_CONNECTION_ERROR_TRY_AGAIN} (attempt #{i+1})...")
-
+    for i in queue.retry_policy.attempts():
         try:
+            if i > 0:
+                LOGGER.debug("%s (attempt #%s)...", log_msgs.TRYYIELD_CONNECTION_ERROR_TRY_AGAIN, i+1)
+                queue.close()
+                queue.connect()
+                queue.metrics.reconnected()
             for x in func():
                 yield x
         except pika.exceptions.ConnectionClosedByBroker:
-            logging.debug(log_msgs.TRYYIELD_CONNECTION_CLOSED_BY_BROKER)
+            LOGGER.debug(log_msgs.TRYYIELD_CONNECTION_CLOSED_BY_BROKER)
         # Do not recover on channel errors
         except pika.exceptions.AMQPChannelError as err:
-            logging.error(f"{log_msgs.TRYYIELD_RAISE_AMQP_CHANNEL_ERROR} {err}.")
+            LOGGER.error("%s %s.", log_msgs.TRYYIELD_RAISE_AMQP_CHANNEL_ERROR, err)
             raise
         # Recover on all other connection errors
         except pika.exceptions.AMQPConnectionError:
-            logging.debug(log_msgs.TRYYIELD_AMQP_CONNECTION_ERROR)
-
-        queue.close()
-        time.sleep(1)
-        queue.connect()
+            LOGGER.debug(log_msgs.TRYYIELD_AMQP_CONNECTION_ERROR)
 
-    logging.debug(log_msgs.TRYYIELD_CONNECTION_ERROR_MAX_RETRIES)
+    LOGGER.debug(log_msgs.TRYYIELD_CONNECTION_ERROR_MAX_RETRIES)
     raise Exception('RabbitMQ connection error')
 
 
 class Backend(backend_interface.Backend):
     """RabbitMQ Pub-Sub Backend Factory.
 
+    Args:
+        share_connections (bool): queues share one connection per address
+            (per thread, since connections are not thread-safe), each with
+            its own channel (default: False)
+        retry_policy (RetryPolicy): how queues retry on connection errors;
+            its counters total all of them (default: RetryPolicy())
+
     Extends:
         Backend
     """
 
-    @staticmethod
-    def create_pub_queue(address: str, name: str) -> RabbitMQPub:
+    def __init__(self, share_connections: bool = False,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self.pool = None  # type: Optional[ConnectionPool]
+        if share_connections:
+            self.pool = ConnectionPool(_connect, _close, is_alive=lambda c: not c.is_closed, per_thread=True)
+
+    def create_pub_queue(self, address: str, name: str) -> RabbitMQPub:
         """Create a publishing queue.
 
         Args:
@@ -295,12 +705,25 @@ class Backend(backend_interface.Backend):
         Returns:
             RawQueue: queue
         """
-        q = RabbitMQPub(address, name)
+        q = RabbitMQPub(address, name, pool=self.pool, retry_policy=self.retry_policy)
         q.connect()
         return q
 
-    @staticmethod
-    def create_sub_queue(address: str, name: str, prefetch: int = 1) -> RabbitMQSub:
+    def create_fan_out_pub_queue(self, address: str, names: List[str]) -> RabbitMQFanOutPub:
+        """Create a publishing queue, which sends each message to every queue.
+
+        Args:
+            address (str): address of queues
+            names (List[str]): names of queues on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = RabbitMQFanOutPub(address, names, pool=self.pool, retry_policy=self.retry_policy)
+        q.connect()
+        return q
+
+    def create_sub_queue(self, address: str, name: str, prefetch: int = 1) -> RabbitMQSub:
         """Create a subscription queue.
 
         Args:
@@ -310,7 +733,361 @@ class Backend(backend_interface.Backend):
         Returns:
             RawQueue: queue
         """
-        q = RabbitMQSub(address, name)
+        q = RabbitMQSub(address, name, pool=self.pool, retry_policy=self.retry_policy)
         q.prefetch = prefetch
         q.connect()
         return q
+
+    def create_multi_sub_queue(self, address: str, names: List[str], prefetch: int = 1,
+                               weights: Optional[Dict[str, int]] = None) -> RabbitMQMultiSub:
+        """Create a subscription to many queues, on one channel.
+
+        Args:
+            address (str): address of queues
+            names (List[str]): names of queues on address
+            prefetch (int): max number of un-acked messages per queue
+            weights (Optional[Dict[str, int]]): per-queue fairness weights (default: 1 each)
+
+        Returns:
+            MultiSub: queue
+        """
+        q = RabbitMQMultiSub(address, names, weights, pool=self.pool, retry_policy=self.retry_policy)
+        q.prefetch = prefetch
+        q.connect()
+        return q
+
+
+# -------
+# asyncio
+# -------
+
+
+class AsyncRabbitMQ(AsyncRawQueue):
+    """Base asyncio RabbitMQ wrapper, over pika's `AsyncioConnection`.
+
+    Extends:
+        AsyncRawQueue
+    """
+
+    def __init__(self, address: str, queue: str) -> None:
+        super().__init__()
+        self.address = address
+        if not self.address.startswith('ampq'):
+            self.address = 'amqp://' + self.address
+        self.queue = queue
+        self.connection = None  # type: AsyncioConnection
+        self.channel = None  # type: pika.channel.Channel
+        self.prefetch = 1
+        self._closed = None  # type: Optional[asyncio.Future[Any]]
+        self._pending = set()  # type: Set[asyncio.Future[Any]]
+
+    async def connect(self) -> None:
+        """Set up connection and channel."""
+        await super().connect()
+        loop = asyncio.get_running_loop()
+        opened = loop.create_future()  # type: asyncio.Future[Any]
+        self._closed = loop.create_future()
+        self._pending = {opened}
+
+        self.connection = AsyncioConnection(
+            pika.connection.URLParameters(self.address),
+            on_open_callback=lambda _: _resolve(opened, None),
+            on_open_error_callback=lambda _, err: _fail(opened, err),
+            on_close_callback=self._on_connection_closed,
+            custom_ioloop=loop)
+        await opened
+
+        self.channel = (await self._rpc(self.connection.channel, 'on_open_callback'))[0]
+        self.channel.add_on_close_callback(self._on_channel_closed)
+
+    def _on_connection_closed(self, _: Any, reason: BaseException) -> None:
+        if self._closed:
+            _resolve(self._closed, reason)
+        self._fail_pending(pika.exceptions.AMQPConnectionError(reason))
+
+    def _on_channel_closed(self, _: Any, reason: BaseException) -> None:
+        self._fail_pending(pika.exceptions.AMQPChannelError(reason))
+
+    def _fail_pending(self, err: BaseException) -> None:
+        for fut in self._pending:
+            _fail(fut, err)
+        self._pending = set()
+
+    async def _rpc(self, func: Callable[..., Any], callback_kwarg: str = 'callback',
+                   **kwargs: Any) -> Any:
+        """Call a callback-style pika method, and wait for its callback.
+
+        Return the callback's positional arguments.
+        """
+        fut = asyncio.get_running_loop().create_future()  # type: asyncio.Future[Any]
+        self._pending.add(fut)
+        kwargs[callback_kwarg] = lambda *args: _resolve(fut, args)
+        try:
+            func(**kwargs)
+            return await fut
+        finally:
+            self._pending.discard(fut)
+
+    async def close(self) -> None:
+        """Close connection."""
+        await super().close()
+        if self.connection and not (self.connection.is_closed or self.connection.is_closing):
+            self.connection.close()
+        if self._closed and self.connection and not self.connection.is_closed:
+            await self._closed
+
+
+class AsyncRabbitMQPub(AsyncRabbitMQ, AsyncPub):
+    """Asyncio wrapper around queue with delivery-confirm mode in the channel.
+
+    Publishes are pipelined; each send waits only for its own broker
+    confirmation.
+
+    Extends:
+        AsyncRabbitMQ
+        AsyncPub
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._delivery_tag = 0
+        self._unconfirmed = {}  # type: Dict[int, asyncio.Future[Any]]
+
+    async def connect(self) -> None:
+        """Set up connection, channel, and queue.
+
+        Turn on delivery confirmations.
+        """
+        await super().connect()
+        self._delivery_tag = 0
+        self._unconfirmed = {}
+
+        await self._rpc(partial(self.channel.queue_declare, queue=self.queue, durable=False))
+        await self._rpc(partial(self.channel.confirm_delivery, self._on_delivery_confirmation))
+
+    def _on_delivery_confirmation(self, method_frame: Any) -> None:
+        method = method_frame.method
+        if method.multiple:
+            tags = [t for t in self._unconfirmed if t <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+
+        for tag in tags:
+            fut = self._unconfirmed.pop(tag, None)
+            if not fut:
+                continue
+            if isinstance(method, pika.spec.Basic.Ack):
+                _resolve(fut, None)
+            else:
+                _fail(fut, Exception('RabbitMQ rejected (nack) published message'))
+
+    async def send_message(self, msg: bytes) -> None:
+        """Send a message on a queue."""
+        await self.send_messages([msg])
+
+    async def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue.
+
+        All messages are published before waiting on any confirmation.
+        """
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        loop = asyncio.get_running_loop()
+        futs = []
+        for msg in msgs:
+            self.channel.basic_publish(exchange='', routing_key=self.queue, body=msg)
+            self._delivery_tag += 1
+            fut = loop.create_future()  # type: asyncio.Future[Any]
+            self._unconfirmed[self._delivery_tag] = fut
+            self._pending.add(fut)
+            futs.append(fut)
+
+        try:
+            await asyncio.gather(*futs)
+        finally:
+            self._pending.difference_update(futs)
+        LOGGER.debug("%s (%s).", log_msgs.SENT_MESSAGES, len(msgs))
+
+
+class AsyncRabbitMQSub(AsyncRabbitMQ, AsyncSub):
+    """Asyncio wrapper around queue with prefetch-queue QoS.
+
+    Messages are pushed by the broker (`basic_consume`) into a local
+    buffer, bounded by `prefetch`.
+
+    Extends:
+        AsyncRabbitMQ
+        AsyncSub
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.consumer_id = None  # type: Optional[str]
+        self._buffer = None  # type: Optional[asyncio.Queue[Message]]
+
+    async def connect(self) -> None:
+        """Set up connection, channel, queue, and consumer.
+
+        Turn on prefetching.
+        """
+        await super().connect()
+
+        await self._rpc(partial(self.channel.queue_declare, queue=self.queue, durable=False))
+        await self._rpc(partial(self.channel.basic_qos, prefetch_count=self.prefetch, global_qos=True))
+        self._buffer = asyncio.Queue()
+        self.consumer_id = self.channel.basic_consume(self.queue, self._on_message)
+
+    def _on_message(self, _: Any, method: Any, __: Any, body: bytes) -> None:
+        if self._buffer is not None:
+            self._buffer.put_nowait(Message(method.delivery_tag, body))
+
+    async def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a single message from a queue.
+
+        To endlessly block until a message is available, set
+        `timeout_millis=None`.
+        """
+        if not self.channel or self._buffer is None:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.GETMSG_RECEIVE_MESSAGE)
+        try:
+            msg = self._buffer.get_nowait()
+        except asyncio.QueueEmpty:
+            try:
+                timeout = timeout_millis / 1000 if timeout_millis is not None else None
+                msg = await asyncio.wait_for(self._buffer.get(), timeout)
+            except asyncio.TimeoutError:
+                LOGGER.debug(log_msgs.GETMSG_NO_MESSAGE)
+                return None
+
+        LOGGER.debug("%s (%r).", log_msgs.GETMSG_RECEIVED_MESSAGE, msg.msg_id)
+        return msg
+
+    async def ack_message(self, msg_id: MessageID) -> None:
+        """Ack a message from the queue."""
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        self.channel.basic_ack(msg_id)
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    async def reject_message(self, msg_id: MessageID) -> None:
+        """Reject (nack) a message from the queue."""
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        self.channel.basic_nack(msg_id)
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
+
+    async def message_generator(self, timeout: int = 60, auto_ack: bool = True,
+                                propagate_error: bool = True) -> AsyncGenerator[Optional[Message], None]:
+        """Yield Messages asynchronously.
+
+        Generate messages with variable timeout. Close instance on exit and error.
+        Yield `None` on `athrow()`.
+
+        Keyword Arguments:
+            timeout {int} -- timeout in seconds for inactivity (default: {60})
+            auto_ack {bool} -- Ack each message after successful processing (default: {True})
+            propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+        """
+        if not self.channel:
+            raise RuntimeError("queue is not connected")
+
+        msg = None
+        acked = False
+        try:
+            while True:
+                # get message
+                LOGGER.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                msg = await self.get_message(timeout_millis=timeout * 1000)
+                acked = False
+                if msg is None:
+                    LOGGER.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
+                    break
+
+                # yield message to consumer
+                try:
+                    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
+                    yield msg
+                # consumer throws Exception...
+                except Exception as e:  # pylint: disable=W0703
+                    LOGGER.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
+                    if msg:
+                        await self.reject_message(msg.msg_id)
+                    if propagate_error:
+                        LOGGER.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
+                        raise
+                    LOGGER.warning("%s %s.", log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR, e, exc_info=True)
+                    yield None
+                # consumer requests again, aka next()
+                else:
+                    if auto_ack:
+                        await self.ack_message(msg.msg_id)
+                        acked = True
+
+        # generator exit (explicit aclose(), or break in consumer's loop)
+        except GeneratorExit:
+            LOGGER.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
+            if auto_ack and (not acked) and msg:
+                await self.ack_message(msg.msg_id)
+                acked = True
+
+        # generator is closed (also, garbage collected)
+        finally:
+            await self.close()
+            LOGGER.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+
+
+def _resolve(fut: 'asyncio.Future[Any]', result: Any) -> None:
+    if not fut.done():
+        fut.set_result(result)
+
+
+def _fail(fut: 'asyncio.Future[Any]', err: BaseException) -> None:
+    if not fut.done():
+        fut.set_exception(err)
+
+
+class AsyncBackend(backend_interface.AsyncBackend):
+    """Asyncio RabbitMQ Pub-Sub Backend Factory.
+
+    Extends:
+        AsyncBackend
+    """
+
+    @staticmethod
+    async def create_pub_queue(address: str, name: str) -> AsyncRabbitMQPub:
+        """Create a publishing queue.
+
+        Args:
+            address (str): address of queue
+            name (str): name of queue on address
+
+        Returns:
+            AsyncRawQueue: queue
+        """
+        q = AsyncRabbitMQPub(address, name)
+        await q.connect()
+        return q
+
+    @staticmethod
+    async def create_sub_queue(address: str, name: str, prefetch: int = 1) -> AsyncRabbitMQSub:
+        """Create a subscription queue.
+
+        Args:
+            address (str): address of queue
+            name (str): name of queue on address
+
+        Returns:
+            AsyncRawQueue: queue
+        """
+        q = AsyncRabbitMQSub(address, name)
+        q.prefetch = prefetch
+        await q.connect()
+        return q
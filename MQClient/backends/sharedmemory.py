@@ -0,0 +1,569 @@
+"""Back-end using a shared-memory ring buffer, for same-host processes.
+
+Needs no broker: each queue is a ring buffer in a shared-memory
+segment (see `multiprocessing.shared_memory`), named after its address
+and name, which any process on the host can publish to and receive
+from. A message is copied into the ring by its publisher, and out of
+it by its subscriber, and that's all; no sockets, no syscalls per
+message (other than taking the ring's lock).
+
+Messages are delivered in order, each to one of the competing
+subscribers. Like a broker, the ring keeps a delivered message until
+it's acked. Rejected messages are redelivered first, as are a
+subscriber's un-acked messages when it closes, or when its process
+dies (checked when a subscriber connects, and when the ring is full).
+A message whose publisher died while copying it in is dropped.
+
+The ring's space is reclaimed in order, so a message left un-acked
+holds back the space after it. A publisher waits for space when the
+ring is full, up to `send_timeout`.
+
+The segment outlives the processes using it (like a broker's queue);
+remove it with `unlink()`. POSIX-only, since the ring is locked with
+`fcntl.flock()`, and python 3.8+; elsewhere, `MQClient.backends` has
+no `sharedmemory`.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Generator, Iterator, List, Optional, Tuple, cast
+
+from .. import backend_interface
+from ..backend_interface import AckBatcher, Message, MessageID, Pub, RawQueue, Sub
+from . import log_msgs
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SIZE = 64 * 2**20
+
+_MAGIC = 0x4D51524E47000001  # 'MQRNG', version 1
+_HEADER = struct.Struct('=QQQQQQ')  # magic, data size, head, tail, next sequence number, read cursor
+_HEADER_SIZE = 64
+# record: state, payload length, sequence number, owner pid, owner consumer id, then payload
+_RECORD = struct.Struct('=IIQqQ')
+_ALIGN = _RECORD.size
+WRITING, READY, DELIVERED, ACKED, PADDING = 1, 2, 3, 4, 5
+
+# how long subscribers and blocked publishers sleep between polls, at most
+_MAX_POLL_SECONDS = 0.005
+
+
+def _segment_name(address: str, name: str) -> str:
+    """Get the shared-memory segment name for a queue (short, for macOS's limit)."""
+    return 'mqc-' + hashlib.sha1(f'{address}\0{name}'.encode()).hexdigest()[:20]
+
+
+def _lock_path(segment: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f'{segment}.lock')
+
+
+def _record_size(length: int) -> int:
+    return -(-(_RECORD.size + length) // _ALIGN) * _ALIGN
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def unlink(address: str, name: str) -> None:
+    """Remove a queue's shared-memory segment (and any messages in it)."""
+    segment = _segment_name(address, name)
+    try:
+        shm = shared_memory.SharedMemory(segment)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+    try:
+        os.remove(_lock_path(segment))
+    except FileNotFoundError:
+        pass
+
+
+class _Ring:
+    """A queue's ring buffer of records, in a shared-memory segment.
+
+    Positions (`head`, `tail`) only grow; a record is at position %
+    data size. Records are aligned, so a record's header never wraps;
+    a record that wouldn't fit before the end follows a padding record
+    instead. Consumers are identified by a random id, plus their pid.
+    The read cursor is a position before which no record is ready (or
+    being written), so delivery doesn't rescan delivered messages.
+
+    Thread- and process-safe. Payloads are copied outside the lock.
+    """
+
+    def __init__(self, address: str, name: str, size: int) -> None:
+        self.segment = _segment_name(address, name)
+        self._thread_lock = threading.Lock()
+        self._lock_file = open(_lock_path(self.segment), 'a+b')  # pylint: disable=R1732
+        with self._lock():
+            try:
+                self.shm = shared_memory.SharedMemory(self.segment, create=True, size=_HEADER_SIZE + size)
+                _HEADER.pack_into(self.shm.buf, 0, _MAGIC, size - size % _ALIGN, 0, 0, 1, 0)  # type: ignore
+            except FileExistsError:
+                self.shm = shared_memory.SharedMemory(self.segment)
+            # the segment outlives this process, so don't let its resource tracker remove it
+            resource_tracker.unregister(self.shm._name, 'shared_memory')  # type: ignore  # pylint: disable=W0212
+        self.buf = cast(memoryview, self.shm.buf)
+        magic, self.size = _HEADER.unpack_from(self.buf, 0)[:2]
+        if magic != _MAGIC:
+            self.close()
+            raise RuntimeError(f'shared-memory segment {self.segment} is not an MQClient queue')
+
+    def close(self) -> None:
+        self.shm.close()
+        self._lock_file.close()
+
+    @contextlib.contextmanager
+    def _lock(self) -> Iterator[None]:
+        """Lock the ring, against this instance's other threads and other instances."""
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _state(self) -> Tuple[int, int, int]:
+        return _HEADER.unpack_from(self.buf, 0)[2:5]  # type: ignore
+
+    def _set_state(self, head: int, tail: int, seq: int) -> None:
+        struct.pack_into('=QQQ', self.buf, 16, head, tail, seq)
+
+    def _cursor(self, tail: int) -> int:
+        return max(tail, struct.unpack_from('=Q', self.buf, 40)[0])  # type: ignore
+
+    def _set_cursor(self, pos: int) -> None:
+        struct.pack_into('=Q', self.buf, 40, pos)
+
+    def _rewind(self, pos: int) -> None:
+        """Move the read cursor back to `pos`, for a record made ready again."""
+        if pos < struct.unpack_from('=Q', self.buf, 40)[0]:
+            self._set_cursor(pos)
+
+    def _records(self, tail: int, head: int) -> Generator[Tuple[int, int, Tuple[int, int, int, int, int]], None, None]:
+        """Yield each record's position, offset and header, from `tail` to `head`."""
+        pos = tail
+        while pos < head:
+            offset = _HEADER_SIZE + pos % self.size
+            record = _RECORD.unpack_from(self.buf, offset)
+            yield pos, offset, record
+            pos += _record_size(record[1])
+
+    def _set_record(self, offset: int, state: int, pid: int = 0, consumer_id: int = 0) -> None:
+        struct.pack_into('=I', self.buf, offset, state)
+        struct.pack_into('=qQ', self.buf, offset + 16, pid, consumer_id)
+
+    def publish(self, msg: bytes, timeout: float) -> None:
+        """Append a message, waiting up to `timeout` seconds for space."""
+        needed = _record_size(len(msg))
+        if needed > self.size:
+            raise ValueError(f'message ({len(msg)} bytes) is larger than the queue ({self.size} bytes)')
+
+        deadline = time.monotonic() + timeout
+        delay = 0.0
+        while True:
+            with self._lock():
+                head, tail, seq = self._state()
+                padding = self.size - head % self.size if self.size - head % self.size < needed else 0
+                if self.size - (head - tail) >= padding + needed:
+                    if padding:
+                        _RECORD.pack_into(self.buf, _HEADER_SIZE + head % self.size, PADDING, padding - _RECORD.size, 0, 0, 0)
+                        head += padding
+                    offset = _HEADER_SIZE + head % self.size
+                    _RECORD.pack_into(self.buf, offset, WRITING, len(msg), seq, os.getpid(), 0)
+                    self._set_state(head + needed, tail, seq + 1)
+                    break
+                self._recover()
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f'shared-memory queue {self.segment} is full')
+            delay = min(_MAX_POLL_SECONDS, delay * 2 or 0.0001)
+            time.sleep(delay)
+
+        self.buf[offset + _RECORD.size:offset + _RECORD.size + len(msg)] = msg
+        with self._lock():
+            self._set_record(offset, READY)
+
+    def deliver(self, consumer_id: int, num_messages: int) -> List[Message]:
+        """Deliver up to `num_messages` ready messages (without waiting).
+
+        A message's id is its offset and sequence number, packed into an int.
+        """
+        found = []  # type: List[Tuple[int, int, int]]
+        with self._lock():
+            head, tail, _ = self._state()
+            cursor = self._cursor(tail)
+            advance = True
+            for pos, offset, (state, length, seq, _, _) in self._records(cursor, head):
+                if state == READY:
+                    if len(found) == num_messages:
+                        break
+                    self._set_record(offset, DELIVERED, os.getpid(), consumer_id)
+                    found.append((offset, length, seq))
+                elif state == WRITING:
+                    advance = False  # it'll be ready soon
+                if advance:
+                    cursor = pos + _record_size(length)
+            self._set_cursor(cursor)
+
+        # copy out, since the space is reused once the message is acked
+        return [Message(seq << 32 | offset // _ALIGN,
+                        bytes(self.buf[offset + _RECORD.size:offset + _RECORD.size + length]))
+                for offset, length, seq in found]
+
+    def settle(self, consumer_id: int, msg_ids: List[MessageID], requeue: bool) -> None:
+        """Ack (or if `requeue`, nack) delivered messages.
+
+        A nacked message stays in place, so it's redelivered first.
+        """
+        with self._lock():
+            head, tail, next_seq = self._state()
+            for msg_id in msg_ids:
+                offset, seq = (int(msg_id) & 0xFFFFFFFF) * _ALIGN, int(msg_id) >> 32
+                if not _HEADER_SIZE <= offset < _HEADER_SIZE + self.size:
+                    raise Exception(f'Unknown delivery tag: {msg_id!r}')
+                state, _, rec_seq, pid, owner = _RECORD.unpack_from(self.buf, offset)
+                if (state, rec_seq, pid, owner) != (DELIVERED, seq, os.getpid(), consumer_id):
+                    raise Exception(f'Unknown delivery tag: {msg_id!r}')
+                self._set_record(offset, READY if requeue else ACKED)
+                if requeue:
+                    self._rewind(tail + (offset - _HEADER_SIZE - tail) % self.size)
+            if not requeue:
+                self._set_state(head, self._reclaim(tail, head), next_seq)
+
+    def _reclaim(self, tail: int, head: int) -> int:
+        """Return the new tail, past the oldest acked and padding records."""
+        for _, offset, (state, length, _, _, _) in self._records(tail, head):
+            if state not in (ACKED, PADDING):
+                break
+            _RECORD.pack_into(self.buf, offset, 0, 0, 0, 0, 0)
+            tail += _record_size(length)
+        return tail
+
+    def unsubscribe(self, consumer_id: int) -> None:
+        """Requeue a consumer's un-acked messages."""
+        pid = os.getpid()
+        with self._lock():
+            head, tail, _ = self._state()
+            for pos, offset, (state, _, _, owner_pid, owner) in self._records(tail, head):
+                if state == DELIVERED and (owner_pid, owner) == (pid, consumer_id):
+                    self._set_record(offset, READY)
+                    self._rewind(pos)
+
+    def recover(self) -> None:
+        """Requeue the un-acked messages of consumers whose process died.
+
+        Also drop the messages of publishers that died while writing them,
+        which would otherwise hold back the ring's space forever.
+        """
+        with self._lock():
+            self._recover()
+
+    def _recover(self) -> None:
+        head, tail, seq = self._state()
+        alive = {}  # type: Dict[int, bool]
+        for pos, offset, (state, _, _, pid, _) in self._records(tail, head):
+            if state not in (DELIVERED, WRITING):
+                continue
+            if pid not in alive:
+                alive[pid] = _alive(pid)
+            if alive[pid]:
+                continue
+            if state == WRITING:
+                LOGGER.warning('Dropping a message from a dead publisher (pid %s) in %s.', pid, self.segment)
+                self._set_record(offset, PADDING)
+            else:
+                self._set_record(offset, READY)
+                self._rewind(pos)
+        self._set_state(head, self._reclaim(tail, head), seq)
+
+
+class SharedMemory(RawQueue):
+    """Base shared-memory queue wrapper.
+
+    Args:
+        address (str): address of queue (e.g. the host name; any string works)
+        name (str): name of queue on address
+        size (int): size of the ring buffer in bytes, if it's created (default: DEFAULT_SIZE)
+
+    Extends:
+        RawQueue
+    """
+
+    def __init__(self, address: str, name: str, size: int = DEFAULT_SIZE) -> None:
+        super().__init__()
+        self.address = address
+        self.name = name
+        self.size = size
+        self.ring = None  # type: Optional[_Ring]
+
+    def connect(self) -> None:
+        """Attach to (or create) the queue's ring buffer."""
+        super().connect()
+        self.ring = _Ring(self.address, self.name, self.size)
+
+    def close(self) -> None:
+        """Detach from the ring buffer (its messages are kept)."""
+        super().close()
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+
+class SharedMemoryPub(SharedMemory, Pub):
+    """Publisher to a shared-memory queue.
+
+    Args:
+        send_timeout (float): max seconds to wait for space in a full queue (default: 60.0)
+
+    Extends:
+        SharedMemory
+        Pub
+    """
+
+    def __init__(self, address: str, name: str, size: int = DEFAULT_SIZE, send_timeout: float = 60.0) -> None:
+        super().__init__(address, name, size)
+        self.send_timeout = send_timeout
+
+    def send_message(self, msg: bytes) -> None:
+        """Send a message on a queue."""
+        self.send_messages([msg])
+
+    def send_messages(self, msgs: List[bytes]) -> None:
+        """Send a batch of messages on a queue."""
+        if not self.ring:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.SENDING_MESSAGES)
+        for msg in msgs:
+            self.ring.publish(msg, self.send_timeout)
+        LOGGER.debug("%s (%s).", log_msgs.SENT_MESSAGES, len(msgs))
+
+
+class SharedMemorySub(SharedMemory, Sub):
+    """Subscriber to a shared-memory queue.
+
+    Delivery takes no round trip, so nothing is prefetched: `prefetch`
+    is accepted for compatibility, but unused.
+
+    Extends:
+        SharedMemory
+        Sub
+    """
+
+    def __init__(self, address: str, name: str, size: int = DEFAULT_SIZE) -> None:
+        super().__init__(address, name, size)
+        self.consumer_id = uuid.uuid4().int >> 64
+        self.prefetch = 1
+
+    def connect(self) -> None:
+        """Attach to (or create) the ring buffer, and requeue dead subscribers' messages."""
+        super().connect()
+        self.ring.recover()  # type: ignore
+
+    def close(self) -> None:
+        """Requeue un-acked messages, and detach."""
+        if self.ring:
+            self.ring.unsubscribe(self.consumer_id)
+        super().close()
+
+    def get_message(self, timeout_millis: Optional[int] = 100) -> Optional[Message]:
+        """Get a message from a queue.
+
+        Return `None` if there's no message within `timeout_millis`.
+        To endlessly block until a message is available, set
+        `timeout_millis=None`.
+        """
+        msgs = self.get_messages(1, timeout_millis)
+        return msgs[0] if msgs else None
+
+    def get_messages(self, num_messages: int, timeout_millis: Optional[int] = 100) -> List[Message]:
+        """Get up to `num_messages` messages from a queue.
+
+        Wait (polling) up to `timeout_millis` for the batch to fill.
+        """
+        if not self.ring:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.GETMSGS_RECEIVE_MESSAGES)
+        deadline = None if timeout_millis is None else time.monotonic() + timeout_millis / 1000
+        msgs = []  # type: List[Message]
+        delay = 0.0
+        while True:
+            msgs += self.ring.deliver(self.consumer_id, num_messages - len(msgs))
+            if len(msgs) == num_messages or (deadline is not None and time.monotonic() >= deadline):
+                break
+            delay = min(_MAX_POLL_SECONDS, delay * 2 or 0.0001)
+            time.sleep(delay if deadline is None else max(0, min(delay, deadline - time.monotonic())))
+        LOGGER.debug("%s (%s messages).", log_msgs.GETMSGS_RECEIVED_MESSAGES, len(msgs))
+        return msgs
+
+    def ack_message(self, msg_id: MessageID) -> None:
+        """Ack a message from the queue, freeing its space."""
+        if not self.ring:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGE)
+        self.ring.settle(self.consumer_id, [msg_id], requeue=False)
+        self.metrics.acked()
+        LOGGER.debug("%s (%r).", log_msgs.ACKED_MESSAGE, msg_id)
+
+    def ack_messages(self, msg_ids: List[MessageID]) -> None:
+        """Ack a batch of messages from the queue, taking the lock once."""
+        if not self.ring:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.ACKING_MESSAGES)
+        self.ring.settle(self.consumer_id, msg_ids, requeue=False)
+        self.metrics.acked(len(msg_ids))
+        LOGGER.debug("%s (%s messages).", log_msgs.ACKED_MESSAGES, len(msg_ids))
+
+    def reject_message(self, msg_id: MessageID) -> None:
+        """Reject (nack) a message from the queue, requeuing it."""
+        if not self.ring:
+            raise RuntimeError("queue is not connected")
+
+        LOGGER.debug(log_msgs.NACKING_MESSAGE)
+        self.ring.settle(self.consumer_id, [msg_id], requeue=True)
+        self.metrics.nacked()
+        LOGGER.debug("%s (%r).", log_msgs.NACKED_MESSAGE, msg_id)
+
+    def message_generator(self, timeout: int = 60, auto_ack: bool = True,
+                          propagate_error: bool = True, ack_batch_size: int = 1,
+                          ack_interval: Optional[float] = None) -> Generator[Optional[Message], None, None]:
+        """Yield Messages.
+
+        Generate messages with variable timeout. Close instance on exit and error.
+        Yield `None` on `throw()`.
+
+        Keyword Arguments:
+            timeout {int} -- timeout in seconds for inactivity (default: {60})
+            auto_ack {bool} -- Ack each message after successful processing (default: {True})
+            propagate_error {bool} -- should errors from downstream code kill the generator? (default: {True})
+            ack_batch_size {int} -- with `auto_ack`, ack messages in batches of this size (default: {1})
+            ack_interval {Optional[float]} -- with `auto_ack`, also ack once the oldest un-acked message is this many seconds old (default: {None})
+        """
+        if not self.ring:
+            raise RuntimeError("queue is not connected")
+
+        acker = AckBatcher(self, ack_batch_size, ack_interval)
+        msg = None
+        acked = False
+        tracer = self.tracer
+        try:
+            while True:
+                # get message
+                LOGGER.debug(log_msgs.MSGGEN_GET_NEW_MESSAGE)
+                waiting = time.monotonic()
+                msg = self.get_message(timeout_millis=timeout * 1000)
+                acked = False
+                if msg is None:
+                    LOGGER.info(log_msgs.MSGGEN_NO_MESSAGE_LOOK_BACK_IN_QUEUE)
+                    break
+                if tracer:
+                    tracer.begin(time.monotonic() - waiting)
+
+                # yield message to consumer
+                try:
+                    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
+                    yield msg
+                # consumer throws Exception...
+                except Exception as e:  # pylint: disable=W0703
+                    LOGGER.debug(log_msgs.MSGGEN_DOWNSTREAM_ERROR)
+                    if msg:
+                        settling = time.monotonic()
+                        acker.flush()
+                        self.reject_message(msg.msg_id)
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
+                    if propagate_error:
+                        LOGGER.debug(log_msgs.MSGGEN_PROPAGATING_ERROR)
+                        raise
+                    LOGGER.warning("%s %s.", log_msgs.MSGGEN_EXCEPTED_DOWNSTREAM_ERROR, e, exc_info=True)
+                    yield None
+                # consumer requests again, aka next()
+                else:
+                    if auto_ack:
+                        settling = time.monotonic()
+                        acker.add(msg.msg_id)
+                        acked = True
+                        if tracer:
+                            tracer.add('ack', time.monotonic() - settling)
+
+        # generator exit (explicit close(), or break in consumer's loop)
+        except GeneratorExit:
+            LOGGER.debug(log_msgs.MSGGEN_GENERATOR_EXIT)
+            if auto_ack and (not acked) and msg:
+                acker.add(msg.msg_id)
+                acked = True
+
+        # generator is closed (also, garbage collected)
+        finally:
+            if tracer:
+                tracer.end()
+            try:
+                acker.flush()
+            finally:
+                self.was_closed = True
+            LOGGER.debug(log_msgs.MSGGEN_CLOSED_QUEUE)
+
+
+class Backend(backend_interface.Backend):
+    """Shared-memory Pub-Sub Backend Factory, for same-host processes.
+
+    Args:
+        size (int): size of each queue's ring buffer in bytes, when it's created (default: DEFAULT_SIZE)
+        send_timeout (float): max seconds a publisher waits for space in a full queue (default: 60.0)
+
+    Extends:
+        Backend
+    """
+
+    def __init__(self, size: int = DEFAULT_SIZE, send_timeout: float = 60.0) -> None:
+        self.size = size
+        self.send_timeout = send_timeout
+
+    def create_pub_queue(self, address: str, name: str) -> SharedMemoryPub:
+        """Create a publishing queue.
+
+        Args:
+            address (str): address of queue
+            name (str): name of queue on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = SharedMemoryPub(address, name, self.size, self.send_timeout)
+        q.connect()
+        return q
+
+    def create_sub_queue(self, address: str, name: str, prefetch: int = 1) -> SharedMemorySub:
+        """Create a subscription queue.
+
+        Args:
+            address (str): address of queue
+            name (str): name of queue on address
+
+        Returns:
+            RawQueue: queue
+        """
+        q = SharedMemorySub(address, name, self.size)
+        q.prefetch = prefetch
+        q.connect()
+        return q
@@ -0,0 +1,190 @@
+"""Claim-check offload of large messages to a blob store.
+
+A `Queue` with a `ClaimCheck` stores each message (after serializing,
+packing and compressing) of at least `threshold` bytes in a
+`BlobStore`, and sends only a small reference through the broker. On
+receipt, the message is fetched from the store (memory-mapped, for a
+`FileBlobStore`) when it's deserialized, and its blob is deleted once
+the message is acked. Rejected messages keep their blob, for
+redelivery.
+
+A reference is a serialized message (`ReferenceSerializer`), so a
+consumer without a `ClaimCheck` gets a clear error instead of garbage.
+"""
+
+import logging
+import mmap
+import os
+import re
+import uuid
+from typing import Any, List, Optional
+
+from .serializers import HEADER_LEN, Serializer, register
+
+LOGGER = logging.getLogger(__name__)
+
+_KEY = re.compile(r'^[0-9a-f]{32}$')
+
+
+class BlobStore:
+    """Blob store interface, for `ClaimCheck`."""
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`."""
+        raise NotImplementedError()
+
+    def get(self, key: str) -> Any:
+        """Get the data stored under `key`, as a bytes-like object."""
+        raise NotImplementedError()
+
+    def delete(self, key: str) -> None:
+        """Delete the data stored under `key`, if any."""
+        raise NotImplementedError()
+
+
+class FileBlobStore(BlobStore):
+    """Blob store in a local (or shared) directory, one file per blob.
+
+    Blobs are written to a temporary file, then renamed, so a consumer
+    never sees a partial blob.
+
+    Args:
+        directory (str): where to keep the blobs (created if needed)
+        use_mmap (bool): get blobs as read-only memory maps, instead of reading them into memory (default: True)
+    """
+
+    def __init__(self, directory: str, use_mmap: bool = True) -> None:
+        self.directory = directory
+        self.use_mmap = use_mmap
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.blob')
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`."""
+        path = self._path(key)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+
+    def get(self, key: str) -> Any:
+        """Get the data stored under `key` (memory-mapped, with `use_mmap`)."""
+        with open(self._path(key), 'rb') as f:
+            if self.use_mmap and os.fstat(f.fileno()).st_size:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return f.read()
+
+    def delete(self, key: str) -> None:
+        """Delete the data stored under `key`, if any."""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobStore(BlobStore):
+    """Blob store in an S3 (or S3-compatible) object store bucket.
+
+    Requires the optional `boto3` package, unless a `client` is given.
+
+    Args:
+        bucket (str): name of the bucket
+        prefix (str): prefix of the blobs' object keys (default: '')
+        client (Any): a boto3 S3 client (default: boto3.client('s3'))
+    """
+
+    def __init__(self, bucket: str, prefix: str = '', client: Optional[Any] = None) -> None:
+        if client is None:
+            try:
+                import boto3  # type: ignore  # pylint: disable=C0415
+            except ImportError as e:
+                raise ImportError("S3BlobStore requires the 'boto3' package (pip install MQClient[s3])") from e
+            client = boto3.client('s3')
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`."""
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key: str) -> Any:
+        """Get the data stored under `key`."""
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+
+    def delete(self, key: str) -> None:
+        """Delete the data stored under `key`, if any."""
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+
+class ReferenceSerializer(Serializer):
+    """Claim-check reference to a message in a blob store (see `ClaimCheck`).
+
+    `loads()` raises, since the message has to be fetched first.
+    """
+
+    codec_id = 6
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize `data` (a blob key), including the header."""
+        return self.header + data.encode('ascii')
+
+    def loads(self, payload: memoryview) -> Any:
+        """Raise, since a reference must be resolved by a `ClaimCheck`."""
+        raise ValueError(f"message is a claim-check reference ({bytes(payload).decode('ascii', 'replace')}); "
+                         "receive it with a Queue with a ClaimCheck")
+
+
+register(ReferenceSerializer)
+_REFERENCE = ReferenceSerializer()
+
+
+def claim_key(raw: Any) -> Optional[str]:
+    """Get the blob key of a claim-check reference, or None if `raw` isn't one."""
+    view = memoryview(raw)
+    if len(view) > HEADER_LEN + 32 or bytes(view[:HEADER_LEN]) != _REFERENCE.header:
+        return None
+    key = bytes(view[HEADER_LEN:]).decode('ascii', 'replace')
+    if not _KEY.match(key):
+        raise ValueError(f"invalid claim-check key: {key!r}")
+    return key
+
+
+class ClaimCheck:
+    """Offload messages of at least `threshold` bytes to a blob store.
+
+    Args:
+        store (BlobStore): where to keep the offloaded messages
+        threshold (int): min size of a message to offload, in bytes (default: 1 MiB)
+    """
+
+    def __init__(self, store: BlobStore, threshold: int = 2**20) -> None:
+        if threshold <= HEADER_LEN + 32:
+            raise ValueError('threshold must be larger than a reference')
+        self.store = store
+        self.threshold = threshold
+
+    def offload(self, raws: List[bytes]) -> List[bytes]:
+        """Store the large messages, and return the messages to send (in order)."""
+        sent = []  # type: List[bytes]
+        for raw in raws:
+            if len(raw) < self.threshold:
+                sent.append(raw)
+                continue
+            key = uuid.uuid4().hex
+            self.store.put(key, raw)
+            sent.append(_REFERENCE.dumps(key))
+        return sent
+
+    def fetch(self, key: str) -> Any:
+        """Get an offloaded message."""
+        return self.store.get(key)
+
+    def release(self, keys: List[str]) -> None:
+        """Delete acked messages' blobs; failures are logged, not raised."""
+        for key in keys:
+            try:
+                self.store.delete(key)
+            except Exception as e:  # pylint: disable=W0703
+                LOGGER.warning("Couldn't delete claim-check blob %s: %r", key, e)
@@ -0,0 +1,176 @@
+"""Compressors for serialized message data.
+
+Compression is applied only to messages at least `threshold` bytes
+long, and only when it actually shrinks the message. A compressed
+message starts with a header (`MAGIC` + a one-byte compressor id), so
+consumers transparently decode streams of mixed compressed and
+uncompressed messages via `decompress()`.
+"""
+
+import lzma
+import zlib
+from typing import Any, Dict, Type
+
+MAGIC = b'MZ'
+HEADER_LEN = len(MAGIC) + 1
+
+
+class Compressor:
+    """Compressor interface.
+
+    Subclasses set a unique `compressor_id` and are registered with
+    `register()`, so consumers can decompress them.
+
+    Args:
+        threshold (int): minimum message size (bytes) to compress (default: 1024)
+    """
+
+    compressor_id = -1
+
+    def __init__(self, threshold: int = 1024) -> None:
+        if threshold < 0:
+            raise ValueError('threshold must be non-negative')
+        self.threshold = threshold
+
+    @property
+    def header(self) -> bytes:
+        """Get the header prepended to each compressed message."""
+        return MAGIC + bytes([self.compressor_id])
+
+    def compress(self, raw: bytes) -> bytes:
+        """Compress `raw` (without header)."""
+        raise NotImplementedError()
+
+    def decompress(self, payload: memoryview) -> bytes:
+        """Decompress `payload` (the message without its header)."""
+        raise NotImplementedError()
+
+    def compress_message(self, raw: bytes) -> bytes:
+        """Return the compressed message (with header), if worthwhile.
+
+        Otherwise, return `raw` unchanged.
+        """
+        if len(raw) < self.threshold:
+            return raw
+        compressed = b''.join([self.header, self.compress(raw)])
+        if len(compressed) >= len(raw):
+            return raw
+        return compressed
+
+
+class ZlibCompressor(Compressor):
+    """zlib (deflate) compressor.
+
+    Args:
+        level (int): compression level, 0-9 (default: 6)
+        threshold (int): minimum message size (bytes) to compress (default: 1024)
+    """
+
+    compressor_id = 1
+
+    def __init__(self, level: int = 6, threshold: int = 1024) -> None:
+        super().__init__(threshold)
+        self.level = level
+
+    def compress(self, raw: bytes) -> bytes:
+        """Compress `raw` (without header)."""
+        return zlib.compress(raw, self.level)
+
+    def decompress(self, payload: memoryview) -> bytes:
+        """Decompress `payload`."""
+        return zlib.decompress(payload)
+
+
+class LZMACompressor(Compressor):
+    """LZMA (xz) compressor. Slow, but high compression ratio.
+
+    Args:
+        preset (int): compression preset, 0-9 (default: 6)
+        threshold (int): minimum message size (bytes) to compress (default: 1024)
+    """
+
+    compressor_id = 2
+
+    def __init__(self, preset: int = 6, threshold: int = 1024) -> None:
+        super().__init__(threshold)
+        self.preset = preset
+
+    def compress(self, raw: bytes) -> bytes:
+        """Compress `raw` (without header)."""
+        return lzma.compress(raw, preset=self.preset)
+
+    def decompress(self, payload: memoryview) -> bytes:
+        """Decompress `payload`."""
+        return lzma.decompress(payload)
+
+
+class LZ4Compressor(Compressor):
+    """LZ4 compressor. Fast, with a modest compression ratio.
+
+    Requires the optional `lz4` package.
+
+    Args:
+        threshold (int): minimum message size (bytes) to compress (default: 1024)
+    """
+
+    compressor_id = 3
+
+    def __init__(self, threshold: int = 1024) -> None:
+        super().__init__(threshold)
+        try:
+            import lz4.frame  # type: ignore  # pylint: disable=C0415
+        except ImportError as e:
+            raise ImportError("LZ4Compressor requires the 'lz4' package (pip install MQClient[lz4])") from e
+        self._lz4 = lz4.frame
+
+    def compress(self, raw: bytes) -> bytes:
+        """Compress `raw` (without header)."""
+        return self._lz4.compress(raw)
+
+    def decompress(self, payload: memoryview) -> bytes:
+        """Decompress `payload`."""
+        return self._lz4.decompress(payload)
+
+
+def is_available(compressor: Type[Compressor]) -> bool:
+    """Return whether `compressor`'s optional dependencies are installed."""
+    try:
+        compressor()
+    except ImportError:
+        return False
+    return True
+
+
+_COMPRESSORS = {}  # type: Dict[int, Type[Compressor]]
+_DECOMPRESSORS = {}  # type: Dict[int, Compressor]
+
+
+def register(compressor: Type[Compressor]) -> Type[Compressor]:
+    """Register a compressor class, so its messages can be decompressed."""
+    if not 0 <= compressor.compressor_id <= 255:
+        raise ValueError(f"compressor_id must be a single byte (not {compressor.compressor_id})")
+    if _COMPRESSORS.get(compressor.compressor_id, compressor) is not compressor:
+        raise ValueError(f"compressor_id {compressor.compressor_id} is already registered")
+    _COMPRESSORS[compressor.compressor_id] = compressor
+    return compressor
+
+
+for _compressor in [ZlibCompressor, LZMACompressor, LZ4Compressor]:
+    register(_compressor)
+
+
+def decompress(raw: Any) -> Any:
+    """Decompress a message, if it is compressed.
+
+    Otherwise, return `raw` unchanged.
+    """
+    view = memoryview(raw)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        return raw
+
+    compressor_id = view[len(MAGIC)]
+    if compressor_id not in _DECOMPRESSORS:
+        if compressor_id not in _COMPRESSORS:
+            raise ValueError(f"Unknown compressor_id: {compressor_id}")
+        _DECOMPRESSORS[compressor_id] = _COMPRESSORS[compressor_id]()
+    return _DECOMPRESSORS[compressor_id].decompress(view[HEADER_LEN:])
@@ -0,0 +1,169 @@
+"""Instrumentation hooks, with an optional Prometheus exporter.
+
+A `Queue` reports to the `QueueMetrics` returned by its `Metrics`'
+`for_queue()`. Its raw pub/sub queues report acks, rejects and
+reconnects to the same `QueueMetrics` (via `RawQueue.metrics`). The
+base classes are no-ops, so instrumentation is free unless enabled.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+
+class QueueMetrics:
+    """Instrumentation hooks for one queue (no-ops).
+
+    Subclasses override these to record metrics.
+    """
+
+    def serialized(self, num_bytes: int, seconds: float) -> None:
+        """Record a message serialized, for sending."""
+
+    def published(self, count: int, seconds: float) -> None:
+        """Record messages published, with one round trip to the broker."""
+
+    def received(self, num_bytes: int) -> None:
+        """Record a message received (not yet acked/rejected)."""
+
+    def handled(self, seconds: float) -> None:
+        """Record the time user code spent handling a received message."""
+
+    def acked(self, count: int = 1) -> None:
+        """Record messages acked."""
+
+    def nacked(self, count: int = 1) -> None:
+        """Record messages rejected."""
+
+    def reconnected(self) -> None:
+        """Record a reconnect after a connection error."""
+
+    def spooled(self, count: int, num_bytes: int) -> None:
+        """Record messages spooled to disk, since they couldn't be published."""
+
+    def replayed(self, count: int, seconds: float) -> None:
+        """Record spooled messages published, with one round trip to the broker."""
+
+
+class Metrics:
+    """Instrumentation factory (no-ops).
+
+    Subclasses override `for_queue()`.
+    """
+
+    def for_queue(self, backend: str, queue: str) -> QueueMetrics:
+        """Get the hooks for a queue."""
+        return NO_METRICS
+
+
+NO_METRICS = QueueMetrics()
+
+
+class PrometheusMetrics(Metrics):
+    """Export metrics with `prometheus_client`, labelled by backend and queue.
+
+    Counters: messages sent, received, acked, nacked, spooled and
+    replayed, and reconnects. Histograms: serialize time, publish
+    latency, replay batch latency, handler time, and payload size.
+    Gauge: in-flight (received, but not yet acked or rejected) messages.
+
+    Requires the optional `prometheus-client` package. Serve the
+    metrics with `prometheus_client.start_http_server()` (or similar).
+
+    Args:
+        namespace (str): prefix of the metric names (default: 'mqclient')
+        registry (Optional[CollectorRegistry]): registry for the metrics (default: prometheus_client's default registry)
+    """
+
+    def __init__(self, namespace: str = 'mqclient', registry: Optional[Any] = None) -> None:
+        try:
+            import prometheus_client  # type: ignore  # pylint: disable=C0415
+        except ImportError as e:
+            raise ImportError("PrometheusMetrics requires the 'prometheus-client' package (pip install MQClient[prometheus])") from e
+
+        kwargs = {'namespace': namespace, 'labelnames': ['backend', 'queue']}  # type: Dict[str, Any]
+        if registry is not None:
+            kwargs['registry'] = registry
+        self.sent = prometheus_client.Counter('messages_sent', 'Messages sent', **kwargs)
+        self.received = prometheus_client.Counter('messages_received', 'Messages received', **kwargs)
+        self.acked = prometheus_client.Counter('messages_acked', 'Messages acked', **kwargs)
+        self.nacked = prometheus_client.Counter('messages_nacked', 'Messages rejected', **kwargs)
+        self.reconnects = prometheus_client.Counter('reconnects', 'Reconnects after connection errors', **kwargs)
+        self.spooled = prometheus_client.Counter('messages_spooled', 'Messages spooled to disk', **kwargs)
+        self.replayed = prometheus_client.Counter('messages_replayed', 'Spooled messages published', **kwargs)
+        self.replay_seconds = prometheus_client.Histogram('replay_seconds', 'Time to publish a batch of spooled messages', **kwargs)
+        self.serialize_seconds = prometheus_client.Histogram('serialize_seconds', 'Time to serialize a message', **kwargs)
+        self.publish_seconds = prometheus_client.Histogram('publish_seconds', 'Time to publish a message (or batch)', **kwargs)
+        self.handler_seconds = prometheus_client.Histogram('handler_seconds', 'Time spent handling a received message', **kwargs)
+        self.payload_bytes = prometheus_client.Histogram('payload_bytes', 'Size of sent and received messages', **kwargs,
+                                                         buckets=[2**i for i in range(6, 30, 2)] + [float('inf')])
+        self.in_flight = prometheus_client.Gauge('messages_in_flight', 'Messages received, but not yet acked or rejected', **kwargs)
+        self._queues = {}  # type: Dict[Tuple[str, str], QueueMetrics]
+
+    def for_queue(self, backend: str, queue: str) -> QueueMetrics:
+        """Get the hooks for a queue."""
+        key = (backend, queue)
+        if key not in self._queues:
+            self._queues[key] = _PrometheusQueueMetrics(self, backend, queue)
+        return self._queues[key]
+
+
+class _PrometheusQueueMetrics(QueueMetrics):
+    """Prometheus hooks for one queue, bound to its labels."""
+
+    def __init__(self, metrics: PrometheusMetrics, backend: str, queue: str) -> None:
+        labels = {'backend': backend, 'queue': queue}
+        self._sent = metrics.sent.labels(**labels)
+        self._received = metrics.received.labels(**labels)
+        self._acked = metrics.acked.labels(**labels)
+        self._nacked = metrics.nacked.labels(**labels)
+        self._reconnects = metrics.reconnects.labels(**labels)
+        self._spooled = metrics.spooled.labels(**labels)
+        self._replayed = metrics.replayed.labels(**labels)
+        self._replay_seconds = metrics.replay_seconds.labels(**labels)
+        self._serialize_seconds = metrics.serialize_seconds.labels(**labels)
+        self._publish_seconds = metrics.publish_seconds.labels(**labels)
+        self._handler_seconds = metrics.handler_seconds.labels(**labels)
+        self._payload_bytes = metrics.payload_bytes.labels(**labels)
+        self._in_flight = metrics.in_flight.labels(**labels)
+
+    def serialized(self, num_bytes: int, seconds: float) -> None:
+        """Record a message serialized, for sending."""
+        self._payload_bytes.observe(num_bytes)
+        self._serialize_seconds.observe(seconds)
+
+    def published(self, count: int, seconds: float) -> None:
+        """Record messages published, with one round trip to the broker."""
+        self._sent.inc(count)
+        self._publish_seconds.observe(seconds)
+
+    def received(self, num_bytes: int) -> None:
+        """Record a message received (not yet acked/rejected)."""
+        self._received.inc()
+        self._payload_bytes.observe(num_bytes)
+        self._in_flight.inc()
+
+    def handled(self, seconds: float) -> None:
+        """Record the time user code spent handling a received message."""
+        self._handler_seconds.observe(seconds)
+
+    def acked(self, count: int = 1) -> None:
+        """Record messages acked."""
+        self._acked.inc(count)
+        self._in_flight.dec(count)
+
+    def nacked(self, count: int = 1) -> None:
+        """Record messages rejected."""
+        self._nacked.inc(count)
+        self._in_flight.dec(count)
+
+    def reconnected(self) -> None:
+        """Record a reconnect after a connection error."""
+        self._reconnects.inc()
+
+    def spooled(self, count: int, num_bytes: int) -> None:
+        """Record messages spooled to disk, since they couldn't be published."""
+        self._spooled.inc(count)
+
+    def replayed(self, count: int, seconds: float) -> None:
+        """Record spooled messages published, with one round trip to the broker."""
+        self._replayed.inc(count)
+        self._replay_seconds.observe(seconds)
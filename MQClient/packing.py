@@ -0,0 +1,68 @@
+"""Client-side packing of many small messages into one broker message.
+
+Brokers have a per-message overhead (bookkeeping, acks, frames), so
+many small items are cheaper to send packed into envelopes (see
+`serializers.EnvelopeSerializer`). A `Queue` with a `PackingPolicy`
+packs what it sends with `send_many()` and `send_buffered()`, and its
+`recv()` transparently unpacks envelopes, yielding each item.
+
+Acks are per envelope: an envelope is acked once all of its items
+are processed. If the consumer raises mid-envelope, the items not yet
+processed (including the failed one) are re-sent as a new envelope,
+and the original envelope is acked, so processed items aren't
+redelivered. Without `requeue_remainder`, the whole envelope is
+rejected (and redelivered) instead.
+"""
+
+from typing import List
+
+from .serializers import EnvelopeSerializer
+
+_ENVELOPE = EnvelopeSerializer()
+
+
+class PackingPolicy:
+    """When to pack serialized messages into envelopes.
+
+    An envelope holds at most `max_items` messages and `max_bytes`
+    bytes, but a larger message is sent on its own. A lone message is
+    sent as-is, not in an envelope.
+
+    Args:
+        max_items (int): max number of messages per envelope (default: 100)
+        max_bytes (int): max size of an envelope's messages, in bytes (default: 65536)
+        linger (float): max seconds `send_buffered()` waits for more messages before sending (default: 0)
+        requeue_remainder (bool): on a consumer error mid-envelope, re-send the unprocessed items, instead of redelivering the whole envelope (default: True)
+    """
+
+    def __init__(self, max_items: int = 100, max_bytes: int = 65536, linger: float = 0.0,
+                 requeue_remainder: bool = True) -> None:
+        if max_items < 1 or max_bytes < 1:
+            raise ValueError('max_items and max_bytes must be positive')
+        if linger < 0:
+            raise ValueError('linger must be non-negative')
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.linger = linger
+        self.requeue_remainder = requeue_remainder
+
+    def pack(self, raws: List[bytes]) -> List[bytes]:
+        """Pack serialized messages (in order) into as few envelopes as allowed."""
+        packed = []  # type: List[bytes]
+        group = []  # type: List[bytes]
+        size = 0
+        for raw in raws:
+            if group and (len(group) == self.max_items or size + len(raw) > self.max_bytes):
+                packed.append(self._seal(group))
+                group, size = [], 0
+            group.append(raw)
+            size += len(raw)
+        if group:
+            packed.append(self._seal(group))
+        return packed
+
+    @staticmethod
+    def _seal(group: List[bytes]) -> bytes:
+        if len(group) == 1:
+            return group[0]
+        return _ENVELOPE.dumps(group)
@@ -1,12 +1,159 @@
 """Queue class encapsulating a pub-sub messaging system."""
 
+import asyncio
+import collections
+import concurrent.futures
 import contextlib
+import itertools
 import logging
-import pickle
+import threading
+import time
 import uuid
-from typing import Any, Generator, Optional
+from typing import (Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Generator, Iterable,
+                    Iterator, List, Optional, Tuple)
 
-from .backend_interface import Backend, MessageGeneratorContext, Pub, Sub
+from .backend_interface import (AsyncBackend, AsyncMessageGeneratorContext, AsyncPub,
+                                AsyncSub, Backend, Message, MessageGeneratorContext, MessageID,
+                                MultiSub, Pub, Sub)
+from .claimcheck import ClaimCheck, claim_key
+from .compressors import Compressor, decompress
+from .metrics import Metrics, QueueMetrics
+from .packing import PackingPolicy
+from .retry import RetryPolicy
+from .serializers import PickleSerializer, Serializer, loads, unpack
+from .spool import Spool
+from .tracing import Tracer
+
+
+class _BufferedSender:
+    """Publish messages from a bounded buffer, in batches, on a background thread.
+
+    The thread uses its own pub queue (from `create_pub`), since
+    backend connections aren't thread-safe. Each message's future is
+    resolved once its batch is sent, or fails with the send's error.
+
+    With `pack`, each batch is packed into envelopes before sending,
+    and the thread waits up to `linger` seconds for a full batch.
+    """
+
+    def __init__(self, create_pub: Callable[[], Pub], max_size: int, batch_size: int,
+                 pack: Optional[Callable[[List[bytes]], List[bytes]]] = None, linger: float = 0.0) -> None:
+        if max_size < 1 or batch_size < 1:
+            raise ValueError('send buffer size and batch size must be positive')
+        self.create_pub = create_pub
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.pack = pack
+        self.linger = linger
+        self.cond = threading.Condition()
+        self.buffer = collections.deque()  # type: Deque[Tuple[bytes, concurrent.futures.Future]]  # type: ignore[type-arg]
+        self.unfinished = 0  # buffered, or being sent
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='MQClient-sender', daemon=True)
+        self.thread.start()
+
+    def put(self, raw: bytes, timeout: Optional[float]) -> 'concurrent.futures.Future[None]':
+        """Buffer a message, waiting up to `timeout` seconds for room."""
+        future = concurrent.futures.Future()  # type: concurrent.futures.Future[None]
+        with self.cond:
+            if not self.cond.wait_for(lambda: len(self.buffer) < self.max_size or self.closed, timeout):
+                raise TimeoutError('send buffer is full')
+            if self.closed:
+                raise RuntimeError('send buffer is closed')
+            self.buffer.append((raw, future))
+            self.unfinished += 1
+            self.cond.notify_all()
+        return future
+
+    def flush(self, timeout: Optional[float]) -> None:
+        """Wait up to `timeout` seconds until all buffered messages are sent."""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.unfinished == 0, timeout):
+                raise TimeoutError('send buffer was not flushed in time')
+
+    def close(self, timeout: Optional[float]) -> None:
+        """Send all buffered messages, then stop the thread."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+
+    def _run(self) -> None:
+        pub = None  # type: Optional[Pub]
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.buffer or self.closed)
+                if self.linger:
+                    self.cond.wait_for(lambda: len(self.buffer) >= self.batch_size or self.closed, self.linger)
+                if not self.buffer:  # closed
+                    break
+                batch = [self.buffer.popleft() for _ in range(min(self.batch_size, len(self.buffer)))]
+                self.cond.notify_all()  # there's room
+
+            taken = len(batch)  # incl. cancelled futures, which are dropped
+            batch = [(raw, f) for raw, f in batch if f.set_running_or_notify_cancel()]
+            try:
+                if batch:
+                    if not pub:
+                        pub = self.create_pub()
+                    raws = [raw for raw, _ in batch]
+                    if self.pack:
+                        raws = self.pack(raws)
+                    start = time.monotonic()
+                    pub.send_messages(raws)
+                    pub.metrics.published(len(batch), time.monotonic() - start)
+            except Exception as e:  # pylint: disable=W0703
+                logging.warning(f"Background send of {len(batch)} messages failed: {e!r}")
+                for _, future in batch:
+                    future.set_exception(e)
+                if pub:  # reconnect for the next batch
+                    pub.close()
+                    pub = None
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+            finally:
+                with self.cond:
+                    self.unfinished -= taken
+                    self.cond.notify_all()
+
+        if pub:
+            pub.close()
+
+
+def _retry_create(policy: RetryPolicy, create: Callable[[], Any]) -> Any:
+    """Return `create()`, retrying per `policy`; raise the last error if it never succeeds."""
+    error = None  # type: Optional[Exception]
+    for i in policy.attempts():
+        try:
+            return create()
+        except Exception as e:  # pylint: disable=W0703
+            logging.debug(f"Failed to create queue on attempt #{i+1} ({e.__class__.__name__}).")
+            error = e
+    assert error
+    raise error
+
+
+async def _async_retry_create(policy: RetryPolicy, create: Callable[[], Awaitable[Any]]) -> Any:
+    """Return `await create()`, retrying per `policy`; raise the last error if it never succeeds."""
+    error = None  # type: Optional[Exception]
+    async for i in policy.async_attempts():
+        try:
+            return await create()
+        except Exception as e:  # pylint: disable=W0703
+            logging.debug(f"Failed to create queue on attempt #{i+1} ({e.__class__.__name__}).")
+            error = e
+    assert error
+    raise error
+
+
+def _loads_all(raw: Any) -> List[Any]:
+    """Deserialize a message, or each item of an envelope."""
+    raw = decompress(raw)  # once, for both
+    items = unpack(raw)
+    if items is None:
+        return [loads(raw)]
+    return [loads(item) for item in items]
 
 
 class Queue:
@@ -17,18 +164,57 @@ class Queue:
         address (str): address of queue (default: 'localhost')
         name (str): name of queue (default: <random string>)
         prefetch (int): size of prefetch buffer for receiving messages (default: 1)
+        serializer (Serializer): serializer for sent messages; received messages' codecs are auto-detected (default: PickleSerializer())
+        compressor (Compressor): compressor for sent messages above its threshold; received messages are auto-detected (default: None)
+        send_buffer_size (int): max number of messages buffered by `send_buffered()` (default: 10000)
+        send_batch_size (int): max number of messages per batch published by `send_buffered()`'s thread (default: 100)
+        retry_policy (RetryPolicy): how to retry creating (connecting) pub/sub queues; retries of an open connection are up to the backend (default: no retries)
+        metrics (Metrics): instrumentation, e.g. `metrics.PrometheusMetrics()` (default: none)
+        tracer (Tracer): record per-message phase timings of `recv()` (default: None)
+        packing (PackingPolicy): pack messages sent with `send_many()` and `send_buffered()` into envelopes, which are unpacked on receipt; `recv_one()` yields an envelope's items as a list (default: None)
+        spool (Spool): spool messages that `send()`/`send_many()` can't publish, and replay them (first) once the backend is back (default: None)
+        claim_check (ClaimCheck): offload large messages to a blob store, sending references instead; received messages' blobs are deleted once acked (default: None)
     """
 
     def __init__(self, backend: Backend, address: str = 'localhost',
-                 name: str = '', prefetch: int = 1) -> None:
+                 name: str = '', prefetch: int = 1,
+                 serializer: Optional[Serializer] = None,
+                 compressor: Optional[Compressor] = None,
+                 send_buffer_size: int = 10000,
+                 send_batch_size: int = 100,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 metrics: Optional[Metrics] = None,
+                 tracer: Optional[Tracer] = None,
+                 packing: Optional[PackingPolicy] = None,
+                 spool: Optional[Spool] = None,
+                 claim_check: Optional[ClaimCheck] = None) -> None:
         self._backend = backend
         self._address = address
         self._name = name if name else uuid.uuid4().hex
         self._prefetch = prefetch
+        self._serializer = serializer if serializer else PickleSerializer()
+        self._compressor = compressor
         self._pub_queue = None  # type: Optional[Pub]
         self._sub_queue = None  # type: Optional[Sub]
         self.message_generator_context = None  # type: Optional[MessageGeneratorContext]
         self._propagate_recv_error = False
+        self._sub_lock = threading.RLock()
+        self._sub_idle_deadline = None  # type: Optional[float]  # with keep_open, when the unused sub queue expires
+        self._send_buffer_size = send_buffer_size
+        self._send_batch_size = send_batch_size
+        self._sender = None  # type: Optional[_BufferedSender]
+        self._sender_lock = threading.Lock()
+        self._retry_policy = retry_policy if retry_policy else RetryPolicy(max_attempts=1)
+        self._metrics = (metrics if metrics else Metrics()).for_queue(backend.__class__.__module__.rsplit('.', 1)[-1],
+                                                                      self._name)
+        self._tracer = tracer
+        self._packing = packing
+        self._spool = spool
+        self._spool_retry_at = 0.0
+        self._claim_check = claim_check
+        self._claims = {}  # type: Dict[MessageID, str]  # received message id -> blob key
+        self._fan_outs = {}  # type: Dict[Tuple[str, ...], FanOutQueue]  # for `publish_to()`, by queue names
+        self._fan_outs_lock = threading.Lock()
 
     @property
     def backend(self) -> Backend:
@@ -45,6 +231,46 @@ class Queue:
         """Get name of queue."""
         return self._name
 
+    @property
+    def serializer(self) -> Serializer:
+        """Get serializer used for sending messages."""
+        return self._serializer
+
+    @property
+    def compressor(self) -> Optional[Compressor]:
+        """Get compressor used for sending messages, if any."""
+        return self._compressor
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """Get retry policy used for creating pub/sub queues."""
+        return self._retry_policy
+
+    @property
+    def metrics(self) -> QueueMetrics:
+        """Get instrumentation hooks for this queue."""
+        return self._metrics
+
+    @property
+    def tracer(self) -> Optional[Tracer]:
+        """Get tracer of per-message phase timings, if any."""
+        return self._tracer
+
+    @property
+    def packing(self) -> Optional[PackingPolicy]:
+        """Get policy for packing sent messages into envelopes, if any."""
+        return self._packing
+
+    @property
+    def spool(self) -> Optional[Spool]:
+        """Get spool for messages that couldn't be published, if any."""
+        return self._spool
+
+    @property
+    def claim_check(self) -> Optional[ClaimCheck]:
+        """Get claim-check offload of large messages, if any."""
+        return self._claim_check
+
     @property
     def prefetch(self) -> int:
         """Get size of prefetch buffer for receiving messages."""
@@ -63,7 +289,7 @@ class Queue:
     def raw_pub_queue(self) -> Pub:
         """Get publisher queue."""
         if not self._pub_queue:
-            self._pub_queue = self._backend.create_pub_queue(self._address, self._name)
+            self._pub_queue = self._create_pub_queue()
 
         if not self._pub_queue:
             raise Exception("Pub queue failed to be created.")
@@ -74,6 +300,12 @@ class Queue:
         logging.debug("Deleter Queue.raw_pub_queue")
         self._close_pub_queue()
 
+    def _create_pub_queue(self) -> Pub:
+        pub = _retry_create(self._retry_policy,
+                            lambda: self._backend.create_pub_queue(self._address, self._name))  # type: Pub
+        pub.metrics = self._metrics
+        return pub
+
     def _close_pub_queue(self) -> None:
         if self._pub_queue:
             logging.debug("Closing Queue._pub_queue")
@@ -84,8 +316,12 @@ class Queue:
     def raw_sub_queue(self) -> Sub:
         """Get subscriber queue."""
         if not self._sub_queue:
-            self._sub_queue = self._backend.create_sub_queue(
-                self._address, self._name, self._prefetch)
+            self._sub_queue = _retry_create(self._retry_policy, lambda: self._backend.create_sub_queue(
+                self._address, self._name, self._prefetch))
+            self._sub_queue.metrics = self._metrics
+            self._sub_queue.tracer = self._tracer
+            if self._claim_check:
+                self._sub_queue.on_ack = self.release_claims
 
         if not self._sub_queue:
             raise Exception("Sub queue failed to be created.")
@@ -97,26 +333,306 @@ class Queue:
         self._close_sub_queue()
 
     def _close_sub_queue(self) -> None:
-        if self._sub_queue:
-            logging.debug("Closing Queue._sub_queue")
-            self._sub_queue.close()
-            self._sub_queue = None
+        with self._sub_lock:
+            self._sub_idle_deadline = None
+            if self._sub_queue:
+                logging.debug("Closing Queue._sub_queue")
+                self._sub_queue.close()
+                self._sub_queue = None
+                self._claims.clear()  # message ids may be reused by the next connection
+
+    def _expire_idle_sub_queue(self) -> None:
+        """Close the sub queue if it went unused past its idle deadline.
+
+        Checked by the thread using the queue, rather than by a timer's
+        thread, since backend connections aren't thread-safe.
+        """
+        deadline, self._sub_idle_deadline = self._sub_idle_deadline, None
+        if deadline is not None and time.monotonic() >= deadline:
+            logging.debug("Queue._sub_queue is idle")
+            self._close_sub_queue()
+
+    def _set_sub_idle_deadline(self, idle_timeout: float) -> None:
+        """Expire the sub queue if it is not used within `idle_timeout` seconds."""
+        self._sub_idle_deadline = time.monotonic() + idle_timeout
 
     def close(self) -> None:
-        """Close all connections."""
+        """Close all connections.
+
+        Messages buffered by `send_buffered()` are sent first.
+        """
+        with self._sender_lock:
+            if self._sender:
+                self._sender.close(None)
+                self._sender = None
         self._close_sub_queue()
         self._close_pub_queue()
+        with self._fan_outs_lock:
+            for fan_out in self._fan_outs.values():
+                fan_out.close()
+            self._fan_outs.clear()
+
+    def _dumps(self, data: Any) -> bytes:
+        start = time.monotonic()
+        raw = self._serializer.dumps(data)
+        if self._compressor:
+            raw = self._compressor.compress_message(raw)
+        self._metrics.serialized(len(raw), time.monotonic() - start)
+        return raw
+
+    def _seal(self, raws: List[bytes], start: Optional[float] = None) -> List[bytes]:
+        """Pack serialized messages into envelopes, and compress those.
+
+        Record each envelope as serialized, since `start` (default: now).
+        """
+        assert self._packing
+        start = start if start is not None else time.monotonic()
+        sealed = self._packing.pack(raws)
+        if self._compressor:
+            sealed = [self._compressor.compress_message(raw) for raw in sealed]
+        seconds = (time.monotonic() - start) / len(sealed) if sealed else 0.0
+        for raw in sealed:
+            self._metrics.serialized(len(raw), seconds)
+        return self._offload(sealed)
+
+    def _offload(self, raws: List[bytes]) -> List[bytes]:
+        """Replace large messages with claim-check references, if configured."""
+        if not self._claim_check:
+            return raws
+        return self._claim_check.offload(raws)
+
+    def _resolve(self, msg: Message) -> Any:
+        """Get a received message's data, fetching it if it's a claim-check reference."""
+        if not self._claim_check:
+            return msg.data
+        key = claim_key(msg.data)
+        if key is None:
+            self._claims.pop(msg.msg_id, None)
+            return msg.data
+        self._claims[msg.msg_id] = key
+        return self._claim_check.fetch(key)
+
+    def decode(self, msg: Message) -> List[Any]:
+        """Decode a message received from `raw_sub_queue`, like `recv()` does.
+
+        Fetches the data of a claim-check reference (remembering its
+        claim, until `release_claims()` or `drop_claims()`), and unpacks
+        an envelope into its items.
+
+        Args:
+            msg (Message): the received message
+
+        Returns:
+            List[Any] -- the message's data, or its envelope's items
+        """
+        return _loads_all(self._resolve(msg))
+
+    def release_claims(self, msg_ids: List[MessageID]) -> None:
+        """Delete the claim-check blobs of messages, once they're acked.
+
+        Call this after acking messages from `raw_sub_queue` directly;
+        messages without a claim are skipped.
+
+        Args:
+            msg_ids (List[MessageID]): the acked messages' ids
+        """
+        keys = [self._claims.pop(msg_id) for msg_id in msg_ids if msg_id in self._claims]
+        if keys:
+            assert self._claim_check
+            self._claim_check.release(keys)
+
+    def drop_claims(self, msg_ids: List[MessageID]) -> None:
+        """Forget the claims of rejected messages, keeping their blobs for redelivery.
+
+        Call this before rejecting messages from `raw_sub_queue` directly.
+
+        Args:
+            msg_ids (List[MessageID]): the rejected messages' ids
+        """
+        for msg_id in msg_ids:
+            self._claims.pop(msg_id, None)
+
+    def _requeue_items(self, items: List[memoryview]) -> None:
+        """Re-send an envelope's unprocessed items."""
+        sealed = self._seal([bytes(item) for item in items])
+        pub = self.raw_pub_queue
+        start = time.monotonic()
+        pub.send_messages(sealed)
+        self._metrics.published(len(items), time.monotonic() - start)
 
     def send(self, data: Any) -> None:
         """Send a message to the queue.
 
         Args:
-            data (Any): object of data to send (must be picklable)
+            data (Any): object of data to send (must be serializable)
+        """
+        raw_data = self._dumps(data)
+        if self._claim_check:
+            raw_data = self._claim_check.offload([raw_data])[0]
+        if self._spool is not None:
+            self._send_or_spool([raw_data])
+            return
+        pub = self.raw_pub_queue
+        start = time.monotonic()
+        pub.send_message(raw_data)
+        self._metrics.published(1, time.monotonic() - start)
+
+    def _send_or_spool(self, raws: List[bytes]) -> None:
+        """Publish messages, unless they can't be yet, then spool them.
+
+        Spooled messages are replayed first, to keep them in order.
+        After a failed, or slow, publish, messages are spooled until
+        the spool's `retry_interval` has passed.
         """
-        raw_data = pickle.dumps(data, protocol=4)
-        self.raw_pub_queue.send_message(raw_data)
+        assert self._spool is not None
+        if time.monotonic() < self._spool_retry_at or not self.replay_spool():
+            self._spool.append(raws)
+            self._metrics.spooled(len(raws), sum(len(raw) for raw in raws))
+            return
+
+        try:
+            pub = self.raw_pub_queue
+            start = time.monotonic()
+            if len(raws) == 1:
+                pub.send_message(raws[0])
+            else:
+                pub.send_messages(raws)
+            seconds = time.monotonic() - start
+        except Exception as e:  # pylint: disable=W0703
+            logging.warning(f"Failed to publish {len(raws)} messages, so spooling them: {e!r}")
+            self._close_pub_queue()
+            self._spool_retry_at = time.monotonic() + self._spool.retry_interval
+            self._spool.append(raws)
+            self._metrics.spooled(len(raws), sum(len(raw) for raw in raws))
+            return
+        self._metrics.published(len(raws), seconds)
+        self._check_slow_send(seconds)
+
+    def _check_slow_send(self, seconds: float) -> bool:
+        """Back off to spooling if a publish took longer than the spool's `slow_send`."""
+        assert self._spool is not None
+        if self._spool.slow_send is None or seconds <= self._spool.slow_send:
+            return False
+        logging.warning(f"Publishing took {seconds:.3f} seconds, so spooling for {self._spool.retry_interval} seconds.")
+        self._spool_retry_at = time.monotonic() + self._spool.retry_interval
+        return True
+
+    def replay_spool(self, batch_size: int = 1000) -> bool:
+        """Publish the spooled messages, in order, in batches.
+
+        After a failed (or slow) attempt, don't try again until the
+        spool's `retry_interval` has passed.
+
+        Args:
+            batch_size (int): max number of messages per batch (default: 1000)
+
+        Returns:
+            bool -- whether the spool is now empty
+        """
+        if self._spool is None or not self._spool.pending:
+            return True
+        if time.monotonic() < self._spool_retry_at:
+            return False
+
+        logging.info(f"Replaying {self._spool.pending} spooled messages.")
+        while self._spool.pending:
+            batch = self._spool.peek(batch_size)
+            try:
+                pub = self.raw_pub_queue
+                start = time.monotonic()
+                pub.send_messages(batch)
+                seconds = time.monotonic() - start
+            except Exception as e:  # pylint: disable=W0703
+                logging.warning(f"Failed to replay spooled messages ({self._spool.pending} left): {e!r}")
+                self._close_pub_queue()
+                self._spool_retry_at = time.monotonic() + self._spool.retry_interval
+                return False
+            self._spool.commit(len(batch))
+            self._metrics.replayed(len(batch), seconds)
+            if self._check_slow_send(seconds):
+                return not self._spool.pending
+        return True
+
+    def send_many(self, data: Iterable[Any], batch_size: int = 1000) -> None:
+        """Send many messages to the queue, in batches.
+
+        Each batch is published with a single round trip to the broker.
+        With `packing`, each batch is packed into envelopes. With a
+        `spool`, batches that can't be published are spooled.
+
+        Args:
+            data (Iterable[Any]): objects of data to send (each must be serializable)
+            batch_size (int): max number of messages per batch (default: 1000)
+        """
+        if batch_size < 1:
+            raise Exception('batch_size must be positive')
+
+        it = iter(data)
+        while True:
+            items = list(itertools.islice(it, batch_size))
+            if not items:
+                break
+            if self._packing:
+                start = time.monotonic()
+                batch = self._seal([self._serializer.dumps(d) for d in items], start)
+            else:
+                batch = self._offload([self._dumps(d) for d in items])
+            if self._spool is not None:
+                self._send_or_spool(batch)
+                continue
+            pub = self.raw_pub_queue
+            start = time.monotonic()
+            pub.send_messages(batch)
+            self._metrics.published(len(items), time.monotonic() - start)
+
+    def send_buffered(self, data: Any, timeout: Optional[float] = None) -> 'concurrent.futures.Future[None]':
+        """Send a message to the queue, without waiting for the broker.
+
+        The message is serialized, then added to a bounded buffer,
+        which a background thread publishes in batches (on its own
+        connection). If the buffer is full, this blocks until there's
+        room, or raises `TimeoutError` after `timeout` seconds.
 
-    def recv(self, timeout: int = 60) -> MessageGeneratorContext:
+        The returned future resolves once the message is sent, or
+        fails with the send's error. Use its `add_done_callback()` for
+        a callback, and `flush()` to wait for all buffered messages.
+
+        Args:
+            data (Any): object of data to send (must be serializable)
+            timeout (Optional[float]): max seconds to wait for room in the buffer (default: wait forever)
+
+        Returns:
+            concurrent.futures.Future -- resolved when the message is sent
+        """
+        raw_data = self._serializer.dumps(data) if self._packing else self._dumps(data)
+        with self._sender_lock:
+            if not self._sender:
+                if self._packing:
+                    self._sender = _BufferedSender(self._create_pub_queue,
+                                                   self._send_buffer_size, self._send_batch_size,
+                                                   pack=self._seal, linger=self._packing.linger)
+                else:
+                    self._sender = _BufferedSender(self._create_pub_queue,
+                                                   self._send_buffer_size, self._send_batch_size,
+                                                   pack=self._offload if self._claim_check else None)
+            sender = self._sender
+        return sender.put(raw_data, timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until all messages from `send_buffered()` are sent (or failed).
+
+        Raises `TimeoutError` if that takes longer than `timeout` seconds.
+
+        Keyword Arguments:
+            timeout {Optional[float]} -- max seconds to wait (default: {None})
+        """
+        with self._sender_lock:
+            sender = self._sender
+        if sender:
+            sender.flush(timeout)
+
+    def recv(self, timeout: int = 60, ack_batch_size: int = 1,
+             ack_interval: Optional[float] = None) -> MessageGeneratorContext:
         """Receive a stream of messages from the queue.
 
         This returns a context manager/ generator. It's iterator stops
@@ -126,7 +642,13 @@ class Queue:
         Multiple calls to `recv()` and/or recycling an instance are both okay,
         however if the queue has not been closed (e.g. premature termination
         of the iterator by a consumer-sider raised exception) the original
-        parameters (`timeout`) are reused.
+        parameters (`timeout`, etc.) are reused.
+
+        Processed messages are acked in batches of `ack_batch_size`, or
+        once the oldest un-acked message is `ack_interval` seconds old.
+        Pending acks are sent before a message is rejected, and when
+        the stream stops. Larger batches mean fewer round-trips to the
+        broker, but more redelivered messages if the consumer dies.
 
         Example:
             with queue.recv() as stream:
@@ -135,45 +657,722 @@ class Queue:
 
         Keyword Arguments:
             timeout {int} -- seconds to wait idle before stopping (default: {60})
+            ack_batch_size {int} -- number of processed messages to ack at once (default: {1})
+            ack_interval {Optional[float]} -- max seconds to hold a processed message's ack (default: {None})
 
         Returns:
             MessageGeneratorContext -- context manager and generator object
         """
+        with self._sub_lock:
+            self._expire_idle_sub_queue()
         if (not self.message_generator_context) or (not self._sub_queue) or self._sub_queue.was_closed:
             logging.debug("Creating new MessageGeneratorContext instance.")
+            requeue = None  # type: Optional[Callable[[List[memoryview]], None]]
+            if self._packing and self._packing.requeue_remainder:
+                requeue = self._requeue_items
             self.message_generator_context = MessageGeneratorContext(sub=self.raw_sub_queue,
                                                                      timeout=timeout,
-                                                                     propagate_error=self._propagate_recv_error)
+                                                                     propagate_error=self._propagate_recv_error,
+                                                                     ack_batch_size=ack_batch_size,
+                                                                     ack_interval=ack_interval,
+                                                                     requeue=requeue,
+                                                                     resolve=self._resolve if self._claim_check else None,
+                                                                     on_reject=self.drop_claims if self._claim_check else None)
         return self.message_generator_context
 
     @contextlib.contextmanager
-    def recv_one(self) -> Generator[Any, None, None]:
+    def recv_one(self, keep_open: bool = False, idle_timeout: float = 60) -> Generator[Any, None, None]:
         """Receive one message from the queue.
 
         This is a context manager. If an exception is raised, the message is rejected.
 
+        By default, the queue is closed afterwards. With `keep_open`,
+        the sub queue stays connected for the next `recv_one()` call;
+        if that's more than `idle_timeout` seconds later, it reconnects.
+
         Decorators:
             contextlib.contextmanager
 
+        Keyword Arguments:
+            keep_open {bool} -- keep the sub queue connected for reuse (default: {False})
+            idle_timeout {float} -- with `keep_open`, seconds unused before closing the sub queue (default: {60})
+
         Yields:
             Any -- object of data received, or None if queue is empty
 
         Raises:
             Exception -- [description]
         """
-        msg = self.raw_sub_queue.get_message()
+        with self._sub_lock:
+            self._expire_idle_sub_queue()
+            msg = self.raw_sub_queue.get_message()
+            if not msg:
+                if keep_open:
+                    self._set_sub_idle_deadline(idle_timeout)
+                raise Exception('No message available')
+            self._metrics.received(len(msg.data))
+            handed_out = time.monotonic()
+            try:
+                try:
+                    yield loads(self._resolve(msg))
+                finally:
+                    self._metrics.handled(time.monotonic() - handed_out)
+            except Exception:
+                self.drop_claims([msg.msg_id])
+                self.raw_sub_queue.reject_message(msg.msg_id)
+                raise
+            else:
+                self.raw_sub_queue.ack_message(msg.msg_id)
+                self.release_claims([msg.msg_id])
+            finally:
+                if keep_open:
+                    self._set_sub_idle_deadline(idle_timeout)
+                else:
+                    self.close()
+
+    @contextlib.contextmanager
+    def recv_batch(self, max_items: int = 100, max_wait: float = 1.0,
+                   keep_open: bool = False, idle_timeout: float = 60) -> Generator[List[Any], None, None]:
+        """Receive a batch of messages from the queue.
+
+        This is a context manager, yielding a list of up to `max_items`
+        objects, which is empty if no messages arrive within `max_wait`
+        seconds. The batch is acked if the block exits cleanly, and
+        rejected if an exception is raised (all-or-nothing).
+
+        The batch is filled from the prefetch buffer, so a batch is
+        at most `prefetch` messages on some backends (e.g. RabbitMQ).
+        Envelopes (see `packing`) are unpacked into the batch, so it may
+        have more than `max_items` objects.
+
+        Example:
+            with queue.recv_batch(max_items=500) as batch:
+                process(batch)
+
+        Decorators:
+            contextlib.contextmanager
+
+        Keyword Arguments:
+            max_items {int} -- max number of messages in the batch (default: {100})
+            max_wait {float} -- max seconds to wait for the batch to fill (default: {1.0})
+            keep_open {bool} -- keep the sub queue connected for reuse (default: {False})
+            idle_timeout {float} -- with `keep_open`, seconds unused before closing the sub queue (default: {60})
+
+        Yields:
+            List[Any] -- objects of data received
+        """
+        if max_items < 1:
+            raise ValueError('max_items must be positive')
+
+        with self._sub_lock:
+            self._expire_idle_sub_queue()
+            msgs = []  # type: List[Message]
+            try:
+                msgs = self.raw_sub_queue.get_messages(max_items, timeout_millis=int(max_wait * 1000))
+                for msg in msgs:
+                    self._metrics.received(len(msg.data))
+                handed_out = time.monotonic()
+                try:
+                    yield [d for msg in msgs for d in self.decode(msg)]
+                finally:
+                    if msgs:
+                        self._metrics.handled(time.monotonic() - handed_out)
+            except Exception:
+                self.drop_claims([msg.msg_id for msg in msgs])
+                for msg in msgs:
+                    self.raw_sub_queue.reject_message(msg.msg_id)
+                raise
+            else:
+                if msgs:
+                    self.raw_sub_queue.ack_messages([msg.msg_id for msg in msgs])
+                    self.release_claims([msg.msg_id for msg in msgs])
+            finally:
+                if keep_open:
+                    self._set_sub_idle_deadline(idle_timeout)
+                else:
+                    self.close()
+
+    def __repr__(self) -> str:
+        """Return string of basic properties/attributes."""
+        return f"Queue({self.backend.__class__.__name__}, address={self.address}, name={self.name}, prefetch={self.prefetch}, pub={bool(self._pub_queue)}, sub={bool(self._sub_queue)})"
+
+
+class MultiQueue:
+    """User-facing consumer of many queues at once (fan-in).
+
+    The queues share one connection (per the backend), and messages
+    are received in arrival order. When several queues have messages
+    waiting, they take turns, in proportion to their `weights`.
+
+    Args:
+        backend (Backend): the backend to use
+        names (List[str]): names of queues
+        address (str): address of queues (default: 'localhost')
+        prefetch (int): size of each queue's prefetch buffer for receiving messages (default: 1)
+        weights (Dict[str, int]): queues' fairness weights, by name (default: 1 each)
+        retry_policy (RetryPolicy): how to retry creating (connecting) the sub queue (default: no retries)
+        metrics (Metrics): instrumentation, e.g. `metrics.PrometheusMetrics()`; labelled with all queues' names (default: none)
+    """
+
+    def __init__(self, backend: Backend, names: List[str], address: str = 'localhost',
+                 prefetch: int = 1,
+                 weights: Optional[Dict[str, int]] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 metrics: Optional[Metrics] = None) -> None:
+        if not names:
+            raise ValueError('at least one queue name is required')
+        self._backend = backend
+        self._names = list(names)
+        self._address = address
+        self._prefetch = prefetch
+        self._weights = dict(weights) if weights else {}
+        self._sub_queue = None  # type: Optional[MultiSub]
+        self._retry_policy = retry_policy if retry_policy else RetryPolicy(max_attempts=1)
+        self._metrics = (metrics if metrics else Metrics()).for_queue(backend.__class__.__module__.rsplit('.', 1)[-1],
+                                                                      ', '.join(self._names))
+
+    @property
+    def backend(self) -> Backend:
+        """Get backend instance responsible for managing queuing service."""
+        return self._backend
+
+    @property
+    def address(self) -> str:
+        """Get address of the queuing daemon."""
+        return self._address
+
+    @property
+    def names(self) -> List[str]:
+        """Get names of queues."""
+        return list(self._names)
+
+    @property
+    def prefetch(self) -> int:
+        """Get size of each queue's prefetch buffer for receiving messages."""
+        return self._prefetch
+
+    @property
+    def metrics(self) -> QueueMetrics:
+        """Get instrumentation hooks for these queues."""
+        return self._metrics
+
+    @property
+    def raw_sub_queue(self) -> MultiSub:
+        """Get subscriber queue."""
+        if not self._sub_queue:
+            self._sub_queue = _retry_create(self._retry_policy, lambda: self._backend.create_multi_sub_queue(
+                self._address, self._names, self._prefetch, self._weights))
+            self._sub_queue.metrics = self._metrics
+
+        if not self._sub_queue:
+            raise Exception("Sub queue failed to be created.")
+        return self._sub_queue
+
+    @raw_sub_queue.deleter
+    def raw_sub_queue(self) -> None:
+        logging.debug("Deleter MultiQueue.raw_sub_queue")
+        self.close()
+
+    def close(self) -> None:
+        """Close all connections."""
+        if self._sub_queue:
+            logging.debug("Closing MultiQueue._sub_queue")
+            self._sub_queue.close()
+            self._sub_queue = None
+
+    @contextlib.contextmanager
+    def recv(self, timeout: int = 60) -> Generator[Iterator[Tuple[str, Any]], None, None]:
+        """Receive a stream of messages from all the queues.
+
+        This is a context manager, yielding an iterator of
+        `(queue name, data)` pairs. It stops when no messages are
+        received for `timeout` seconds. Each message is acked when the
+        next one is requested (or the block exits cleanly). If an
+        exception is raised, the current message is rejected. The
+        queues are closed afterwards.
+
+        Example:
+            with multi_queue.recv() as stream:
+                for name, data in stream:
+                    ...
+
+        Decorators:
+            contextlib.contextmanager
+
+        Keyword Arguments:
+            timeout {int} -- seconds to wait idle before stopping (default: {60})
+
+        Yields:
+            Iterator[Tuple[str, Any]] -- queue names and objects of data received
+        """
+        sub = self.raw_sub_queue
+        current = None  # type: Optional[Tuple[str, Message]]
+        handed_out = 0.0
+
+        def settle(ack: bool) -> None:
+            nonlocal current
+            if current:
+                name, msg = current
+                current = None
+                self._metrics.handled(time.monotonic() - handed_out)
+                if ack:
+                    sub.ack_message(name, msg.msg_id)
+                else:
+                    sub.reject_message(name, msg.msg_id)
+
+        def stream() -> Generator[Tuple[str, Any], None, None]:
+            nonlocal current, handed_out
+            while True:
+                settle(ack=True)
+                picked = sub.get_message(timeout_millis=timeout * 1000)
+                if not picked:
+                    logging.info("MultiQueue.recv(): no messages; stopping.")
+                    return
+                current = picked
+                name, msg = picked
+                self._metrics.received(len(msg.data))
+                handed_out = time.monotonic()
+                yield name, loads(msg.data)
+
+        try:
+            yield stream()
+        except Exception:
+            settle(ack=False)
+            raise
+        else:
+            settle(ack=True)
+        finally:
+            self.close()
+
+    def __repr__(self) -> str:
+        """Return string of basic properties/attributes."""
+        return f"MultiQueue({self.backend.__class__.__name__}, address={self.address}, names={self.names}, prefetch={self.prefetch}, sub={bool(self._sub_queue)})"
+
+
+class FanOutQueue:
+    """User-facing publisher to many queues at once (fan-out).
+
+    Each message is serialized once, and published to every queue
+    in one batch, on one connection: via a fanout exchange on
+    RabbitMQ, or pipelined to a producer per topic on Pulsar.
+
+    Args:
+        backend (Backend): the backend to use
+        names (List[str]): names of queues
+        address (str): address of queues (default: 'localhost')
+        serializer (Serializer): serializer for sent messages (default: PickleSerializer())
+        compressor (Compressor): compressor for sent messages above its threshold (default: None)
+        retry_policy (RetryPolicy): how to retry creating (connecting) the pub queue (default: no retries)
+        metrics (Metrics): instrumentation, e.g. `metrics.PrometheusMetrics()`; labelled with all queues' names (default: none)
+    """
+
+    def __init__(self, backend: Backend, names: List[str], address: str = 'localhost',
+                 serializer: Optional[Serializer] = None,
+                 compressor: Optional[Compressor] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 metrics: Optional[Metrics] = None) -> None:
+        if not names:
+            raise ValueError('at least one queue name is required')
+        self._backend = backend
+        self._names = list(names)
+        self._address = address
+        self._serializer = serializer if serializer else PickleSerializer()
+        self._compressor = compressor
+        self._pub_queue = None  # type: Optional[Pub]
+        self._retry_policy = retry_policy if retry_policy else RetryPolicy(max_attempts=1)
+        self._metrics = (metrics if metrics else Metrics()).for_queue(backend.__class__.__module__.rsplit('.', 1)[-1],
+                                                                      ', '.join(self._names))
+
+    @property
+    def backend(self) -> Backend:
+        """Get backend instance responsible for managing queuing service."""
+        return self._backend
+
+    @property
+    def address(self) -> str:
+        """Get address of the queuing daemon."""
+        return self._address
+
+    @property
+    def names(self) -> List[str]:
+        """Get names of queues."""
+        return list(self._names)
+
+    @property
+    def metrics(self) -> QueueMetrics:
+        """Get instrumentation hooks for these queues."""
+        return self._metrics
+
+    @property
+    def raw_pub_queue(self) -> Pub:
+        """Get publisher queue."""
+        if not self._pub_queue:
+            self._pub_queue = _retry_create(self._retry_policy, lambda: self._backend.create_fan_out_pub_queue(
+                self._address, self._names))
+            self._pub_queue.metrics = self._metrics
+
+        if not self._pub_queue:
+            raise Exception("Pub queue failed to be created.")
+        return self._pub_queue
+
+    @raw_pub_queue.deleter
+    def raw_pub_queue(self) -> None:
+        logging.debug("Deleter FanOutQueue.raw_pub_queue")
+        self.close()
+
+    def close(self) -> None:
+        """Close all connections."""
+        if self._pub_queue:
+            logging.debug("Closing FanOutQueue._pub_queue")
+            self._pub_queue.close()
+            self._pub_queue = None
+
+    def _dumps(self, data: Any) -> bytes:
+        start = time.monotonic()
+        raw = self._serializer.dumps(data)
+        if self._compressor:
+            raw = self._compressor.compress_message(raw)
+        self._metrics.serialized(len(raw), time.monotonic() - start)
+        return raw
+
+    def send(self, data: Any) -> None:
+        """Send a message to every queue.
+
+        Args:
+            data (Any): object of data to send (must be serializable)
+        """
+        raw_data = self._dumps(data)
+        pub = self.raw_pub_queue
+        start = time.monotonic()
+        pub.send_message(raw_data)
+        self._metrics.published(1, time.monotonic() - start)
+
+    def send_many(self, data: Iterable[Any], batch_size: int = 1000) -> None:
+        """Send many messages to every queue, in batches.
+
+        Args:
+            data (Iterable[Any]): objects of data to send (each must be serializable)
+            batch_size (int): max number of messages per batch (default: 1000)
+        """
+        if batch_size < 1:
+            raise Exception('batch_size must be positive')
+
+        it = iter(data)
+        while True:
+            batch = [self._dumps(d) for d in itertools.islice(it, batch_size)]
+            if not batch:
+                break
+            pub = self.raw_pub_queue
+            start = time.monotonic()
+            pub.send_messages(batch)
+            self._metrics.published(len(batch), time.monotonic() - start)
+
+    def __repr__(self) -> str:
+        """Return string of basic properties/attributes."""
+        return f"FanOutQueue({self.backend.__class__.__name__}, address={self.address}, names={self.names}, pub={bool(self._pub_queue)})"
+
+
+def publish_to(queues: List[Queue], data: Any) -> None:
+    """Send a message to each of `queues`, serializing it once.
+
+    The queues must share a backend (instance) and address; the
+    first queue's serializer and compressor are used. The message is
+    published in one batch, on a connection that's kept open for these
+    queues until the first queue is closed (or the send fails).
+
+    Args:
+        queues (List[Queue]): queues to send to
+        data (Any): object of data to send (must be serializable)
+    """
+    if not queues:
+        return
+    first = queues[0]
+    if any(q.backend is not first.backend or q.address != first.address for q in queues):
+        raise ValueError('queues must share a backend and address')
+
+    names = tuple(q.name for q in queues)
+    with first._fan_outs_lock:  # pylint: disable=W0212
+        fan_out = first._fan_outs.get(names)  # pylint: disable=W0212
+        if not fan_out:
+            fan_out = FanOutQueue(first.backend, list(names), first.address,
+                                  serializer=first.serializer, compressor=first.compressor,
+                                  retry_policy=first.retry_policy)
+            first._fan_outs[names] = fan_out  # pylint: disable=W0212
+    try:
+        fan_out.send(data)
+    except Exception:
+        with first._fan_outs_lock:  # pylint: disable=W0212
+            if first._fan_outs.get(names) is fan_out:  # pylint: disable=W0212
+                del first._fan_outs[names]  # pylint: disable=W0212
+        fan_out.close()
+        raise
+
+
+class AsyncQueue:
+    """User-facing asyncio queue library.
+
+    Mirrors `Queue`, but for use in an asyncio event loop.
+
+    Args:
+        backend (AsyncBackend): the asyncio backend to use
+        address (str): address of queue (default: 'localhost')
+        name (str): name of queue (default: <random string>)
+        prefetch (int): size of prefetch buffer for receiving messages (default: 1)
+        serializer (Serializer): serializer for sent messages; received messages' codecs are auto-detected (default: PickleSerializer())
+        compressor (Compressor): compressor for sent messages above its threshold; received messages are auto-detected (default: None)
+        retry_policy (RetryPolicy): how to retry creating (connecting) pub/sub queues; retries of an open connection are up to the backend (default: no retries)
+        metrics (Metrics): instrumentation, e.g. `metrics.PrometheusMetrics()`; async backends don't report acks or reconnects (default: none)
+        packing (PackingPolicy): pack messages sent with `send_many()` into envelopes; `recv()` and `recv_one()` yield an envelope's items as a list (default: None)
+        claim_check (ClaimCheck): not supported, since blob stores are blocking; use `Queue` (default: None)
+    """
+
+    def __init__(self, backend: AsyncBackend, address: str = 'localhost',
+                 name: str = '', prefetch: int = 1,
+                 serializer: Optional[Serializer] = None,
+                 compressor: Optional[Compressor] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 metrics: Optional[Metrics] = None,
+                 packing: Optional[PackingPolicy] = None,
+                 claim_check: Optional[ClaimCheck] = None) -> None:
+        if prefetch < 1:
+            raise Exception('prefetch must be positive')
+        if claim_check:
+            raise Exception('AsyncQueue does not support claim_check; use Queue')
+        self._backend = backend
+        self._address = address
+        self._name = name if name else uuid.uuid4().hex
+        self._prefetch = prefetch
+        self._serializer = serializer if serializer else PickleSerializer()
+        self._compressor = compressor
+        self._pub_queue = None  # type: Optional[AsyncPub]
+        self._sub_queue = None  # type: Optional[AsyncSub]
+        self.message_generator_context = None  # type: Optional[AsyncMessageGeneratorContext]
+        self._propagate_recv_error = False
+        self._sub_idle_handle = None  # type: Optional[asyncio.TimerHandle]
+        self._retry_policy = retry_policy if retry_policy else RetryPolicy(max_attempts=1)
+        self._metrics = (metrics if metrics else Metrics()).for_queue(backend.__class__.__module__.rsplit('.', 1)[-1],
+                                                                      self._name)
+        self._packing = packing
+
+    @property
+    def backend(self) -> AsyncBackend:
+        """Get backend instance responsible for managing queuing service."""
+        return self._backend
+
+    @property
+    def address(self) -> str:
+        """Get address of the queuing daemon."""
+        return self._address
+
+    @property
+    def name(self) -> str:
+        """Get name of queue."""
+        return self._name
+
+    @property
+    def serializer(self) -> Serializer:
+        """Get serializer used for sending messages."""
+        return self._serializer
+
+    @property
+    def compressor(self) -> Optional[Compressor]:
+        """Get compressor used for sending messages, if any."""
+        return self._compressor
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """Get retry policy used for creating pub/sub queues."""
+        return self._retry_policy
+
+    @property
+    def metrics(self) -> QueueMetrics:
+        """Get the queue's metrics."""
+        return self._metrics
+
+    @property
+    def packing(self) -> Optional[PackingPolicy]:
+        """Get packing policy used for `send_many()`, if any."""
+        return self._packing
+
+    @property
+    def prefetch(self) -> int:
+        """Get size of prefetch buffer for receiving messages."""
+        return self._prefetch
+
+    async def raw_pub_queue(self) -> AsyncPub:
+        """Get publisher queue."""
+        if not self._pub_queue:
+            self._pub_queue = await _async_retry_create(
+                self._retry_policy, lambda: self._backend.create_pub_queue(self._address, self._name))
+
+        if not self._pub_queue:
+            raise Exception("Pub queue failed to be created.")
+        return self._pub_queue
+
+    async def raw_sub_queue(self) -> AsyncSub:
+        """Get subscriber queue."""
+        if not self._sub_queue:
+            self._sub_queue = await _async_retry_create(self._retry_policy, lambda: self._backend.create_sub_queue(
+                self._address, self._name, self._prefetch))
+
+        if not self._sub_queue:
+            raise Exception("Sub queue failed to be created.")
+        return self._sub_queue
+
+    async def _close_pub_queue(self) -> None:
+        if self._pub_queue:
+            logging.debug("Closing AsyncQueue._pub_queue")
+            await self._pub_queue.close()
+            self._pub_queue = None
+
+    async def _close_sub_queue(self) -> None:
+        self._cancel_sub_idle_timer()
+        if self._sub_queue:
+            logging.debug("Closing AsyncQueue._sub_queue")
+            sub, self._sub_queue = self._sub_queue, None
+            await sub.close()
+
+    def _cancel_sub_idle_timer(self) -> None:
+        if self._sub_idle_handle:
+            self._sub_idle_handle.cancel()
+            self._sub_idle_handle = None
+
+    def _start_sub_idle_timer(self, idle_timeout: float) -> None:
+        """Close the sub queue if it is not used within `idle_timeout` seconds."""
+        self._cancel_sub_idle_timer()
+        self._sub_idle_handle = asyncio.get_running_loop().call_later(
+            idle_timeout, lambda: asyncio.ensure_future(self._close_sub_queue()))
+
+    async def close(self) -> None:
+        """Close all connections."""
+        await self._close_sub_queue()
+        await self._close_pub_queue()
+
+    def _dumps(self, data: Any) -> bytes:
+        start = time.monotonic()
+        raw = self._serializer.dumps(data)
+        if self._compressor:
+            raw = self._compressor.compress_message(raw)
+        self._metrics.serialized(len(raw), time.monotonic() - start)
+        return raw
+
+    def _seal(self, items: List[Any]) -> List[bytes]:
+        """Serialize items, and pack them into envelopes, and compress those."""
+        assert self._packing
+        start = time.monotonic()
+        sealed = self._packing.pack([self._serializer.dumps(d) for d in items])
+        if self._compressor:
+            sealed = [self._compressor.compress_message(raw) for raw in sealed]
+        seconds = (time.monotonic() - start) / len(sealed) if sealed else 0.0
+        for raw in sealed:
+            self._metrics.serialized(len(raw), seconds)
+        return sealed
+
+    async def send(self, data: Any) -> None:
+        """Send a message to the queue.
+
+        Args:
+            data (Any): object of data to send (must be serializable)
+        """
+        raw_data = self._dumps(data)
+        pub = await self.raw_pub_queue()
+        start = time.monotonic()
+        await pub.send_message(raw_data)
+        self._metrics.published(1, time.monotonic() - start)
+
+    async def send_many(self, data: Iterable[Any], batch_size: int = 1000) -> None:
+        """Send many messages to the queue, in batches.
+
+        With `packing`, each batch is packed into envelopes.
+
+        Args:
+            data (Iterable[Any]): objects of data to send (each must be serializable)
+            batch_size (int): max number of messages per batch (default: 1000)
+        """
+        if batch_size < 1:
+            raise Exception('batch_size must be positive')
+
+        pub = await self.raw_pub_queue()
+        it = iter(data)
+        while True:
+            items = list(itertools.islice(it, batch_size))
+            if not items:
+                break
+            batch = self._seal(items) if self._packing else [self._dumps(d) for d in items]
+            start = time.monotonic()
+            await pub.send_messages(batch)
+            self._metrics.published(len(items), time.monotonic() - start)
+
+    def recv(self, timeout: int = 60) -> AsyncMessageGeneratorContext:
+        """Receive a stream of messages from the queue.
+
+        Same semantics as `Queue.recv()`.
+
+        Example:
+            async with queue.recv() as stream:
+                async for data in stream:
+                    ...
+
+        Keyword Arguments:
+            timeout {int} -- seconds to wait idle before stopping (default: {60})
+
+        Returns:
+            AsyncMessageGeneratorContext -- async context manager and async iterator object
+        """
+        if (not self.message_generator_context) or (not self._sub_queue) or self._sub_queue.was_closed:
+            logging.debug("Creating new AsyncMessageGeneratorContext instance.")
+            if self._sub_queue and self._sub_queue.was_closed:
+                self._sub_queue = None
+            self.message_generator_context = AsyncMessageGeneratorContext(sub_factory=self.raw_sub_queue,
+                                                                          timeout=timeout,
+                                                                          propagate_error=self._propagate_recv_error)
+        return self.message_generator_context
+
+    @contextlib.asynccontextmanager
+    async def recv_one(self, keep_open: bool = False, idle_timeout: float = 60) -> AsyncGenerator[Any, None]:
+        """Receive one message from the queue.
+
+        This is an async context manager. If an exception is raised, the message is rejected.
+
+        Same `keep_open` semantics as `Queue.recv_one()`.
+
+        Keyword Arguments:
+            keep_open {bool} -- keep the sub queue connected for reuse (default: {False})
+            idle_timeout {float} -- with `keep_open`, seconds unused before closing the sub queue (default: {60})
+
+        Yields:
+            Any -- object of data received
+
+        Raises:
+            Exception -- if no message is available
+        """
+        self._cancel_sub_idle_timer()
+        sub = await self.raw_sub_queue()
+        msg = await sub.get_message()
         if not msg:
+            if keep_open:
+                self._start_sub_idle_timer(idle_timeout)
+            else:
+                await self.close()
             raise Exception('No message available')
+        self._metrics.received(len(msg.data))
+        handed_out = time.monotonic()
         try:
-            yield pickle.loads(msg.data)
+            try:
+                yield loads(msg.data)
+            finally:
+                self._metrics.handled(time.monotonic() - handed_out)
         except Exception:
-            self.raw_sub_queue.reject_message(msg.msg_id)
+            await sub.reject_message(msg.msg_id)
             raise
         else:
-            self.raw_sub_queue.ack_message(msg.msg_id)
+            await sub.ack_message(msg.msg_id)
         finally:
-            self.close()
+            if keep_open:
+                self._start_sub_idle_timer(idle_timeout)
+            else:
+                await self.close()
 
     def __repr__(self) -> str:
         """Return string of basic properties/attributes."""
-        return f"Queue({self.backend.__class__.__name__}, address={self.address}, name={self.name}, prefetch={self.prefetch}, pub={bool(self._pub_queue)}, sub={bool(self._sub_queue)})"
+        return f"AsyncQueue({self.backend.__class__.__name__}, address={self.address}, name={self.name}, prefetch={self.prefetch}, pub={bool(self._pub_queue)}, sub={bool(self._sub_queue)})"
@@ -0,0 +1,121 @@
+"""Retry policy for reconnecting to a broker."""
+
+import asyncio
+import random
+import threading
+import time
+from typing import AsyncGenerator, Generator, Optional
+
+
+class RetryPolicy:
+    """How many times, and how long, to retry an operation.
+
+    The wait before retry #n is `base_delay * multiplier**(n-1)` seconds,
+    capped at `max_delay`. With `jitter`, the wait is uniformly random
+    between 0 and that ("full jitter"), so that many clients don't
+    reconnect in lockstep after a broker restarts. Retrying stops after
+    `max_attempts` attempts, or if the next wait would go past
+    `deadline` seconds since the first attempt.
+
+    One policy can be shared by many queues (and threads); its
+    `retries` and `exhausted` counters are totals across all of them.
+
+    Example:
+        for attempt in policy.attempts():  # waits before each retry
+            try:
+                return func()
+            except ConnectionError:
+                pass
+        raise Exception('gave up')
+
+    Args:
+        max_attempts (int): max number of attempts, including the first (default: 3)
+        base_delay (float): seconds to wait before the first retry (default: 1.0)
+        multiplier (float): factor by which the wait grows per retry (default: 2.0)
+        max_delay (float): max seconds to wait before a retry (default: 30.0)
+        jitter (bool): randomize waits (default: True)
+        deadline (Optional[float]): max seconds from the first attempt to the last (default: None)
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0,
+                 multiplier: float = 2.0, max_delay: float = 30.0,
+                 jitter: bool = True, deadline: Optional[float] = None) -> None:
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be positive')
+        if base_delay < 0 or max_delay < 0 or multiplier < 1:
+            raise ValueError('delays must be non-negative, and multiplier at least 1')
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retries = 0  # number of retries made
+        self.exhausted = 0  # number of times retrying was given up
+        self._lock = threading.Lock()
+
+    def backoff(self, retry: int) -> float:
+        """Get the seconds to wait before retry number `retry` (1-based)."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (retry - 1))
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
+
+    def _next_delay(self, attempt: int, start: float) -> Optional[float]:
+        """Get the wait before attempt number `attempt` (0-based), or None to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if self.deadline is not None and time.monotonic() - start + delay > self.deadline:
+            return None
+        return delay
+
+    def _count(self, retried: bool) -> None:
+        with self._lock:
+            if retried:
+                self.retries += 1
+            else:
+                self.exhausted += 1
+
+    def attempts(self) -> Generator[int, None, None]:
+        """Yield attempt numbers (from 0), sleeping before each retry.
+
+        Stop iterating from the loop (`return`/`break`) once an attempt
+        succeeds; if the loop ends on its own, retrying was given up.
+        """
+        start = time.monotonic()
+        yield 0
+        attempt = 1
+        while True:
+            delay = self._next_delay(attempt, start)
+            if delay is None:
+                self._count(retried=False)
+                return
+            time.sleep(delay)
+            self._count(retried=True)
+            yield attempt
+            attempt += 1
+
+    async def async_attempts(self) -> AsyncGenerator[int, None]:
+        """Yield attempt numbers (from 0), asynchronously sleeping before each retry.
+
+        Same as `attempts()`, but for use in an asyncio event loop.
+        """
+        start = time.monotonic()
+        yield 0
+        attempt = 1
+        while True:
+            delay = self._next_delay(attempt, start)
+            if delay is None:
+                self._count(retried=False)
+                return
+            await asyncio.sleep(delay)
+            self._count(retried=True)
+            yield attempt
+            attempt += 1
+
+    def __repr__(self) -> str:
+        """Return string of basic properties/attributes."""
+        return (f"RetryPolicy(max_attempts={self.max_attempts}, base_delay={self.base_delay}, "
+                f"multiplier={self.multiplier}, max_delay={self.max_delay}, jitter={self.jitter}, "
+                f"deadline={self.deadline}, retries={self.retries}, exhausted={self.exhausted})")
@@ -0,0 +1,236 @@
+"""Serializers for converting message data to and from bytes.
+
+Every serialized message starts with a small header (`MAGIC` + a
+one-byte codec id), so the consumer auto-detects the codec via
+`loads()`. Messages without a header are treated as legacy
+(headerless) pickles. Compressed messages (see `compressors`) are
+transparently decompressed first.
+"""
+
+import json
+import pickle
+import struct
+from typing import Any, Dict, List, Optional, Type
+
+from . import compressors
+
+MAGIC = b'MQ'
+HEADER_LEN = len(MAGIC) + 1
+
+_COUNT = struct.Struct('!I')
+_LENGTH = struct.Struct('!Q')
+
+
+class Serializer:
+    """Serializer interface.
+
+    Subclasses set a unique `codec_id` and are registered with
+    `register()`, so consumers can decode them.
+    """
+
+    codec_id = -1
+
+    @property
+    def header(self) -> bytes:
+        """Get the header prepended to each serialized message."""
+        return MAGIC + bytes([self.codec_id])
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize `data`, including the header."""
+        raise NotImplementedError()
+
+    def loads(self, payload: memoryview) -> Any:
+        """Deserialize `payload` (the message without its header)."""
+        raise NotImplementedError()
+
+
+class PickleSerializer(Serializer):
+    """Pickle serializer.
+
+    With protocol 5+, large buffers (e.g. numpy arrays) are pickled
+    out-of-band and appended after the pickle stream, and are
+    deserialized as zero-copy (read-only) views of the message.
+
+    Args:
+        protocol (int): pickle protocol (default: 4)
+    """
+
+    codec_id = 1
+
+    def __init__(self, protocol: int = 4) -> None:
+        if protocol > pickle.HIGHEST_PROTOCOL:
+            raise ValueError(f"pickle protocol {protocol} is not supported (max: {pickle.HIGHEST_PROTOCOL})")
+        self.protocol = protocol
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize `data`, including the header.
+
+        Layout: header, buffer count, pickle length, buffer lengths,
+        pickle stream, out-of-band buffers.
+        """
+        buffers = []  # type: List[Any]
+        if self.protocol >= 5:
+            stream = pickle.dumps(data, protocol=self.protocol, buffer_callback=buffers.append)
+            raws = [b.raw() for b in buffers]
+        else:
+            stream = pickle.dumps(data, protocol=self.protocol)
+            raws = []
+
+        lengths = [_LENGTH.pack(len(stream))] + [_LENGTH.pack(r.nbytes) for r in raws]
+        return b''.join([self.header, _COUNT.pack(len(raws))] + lengths + [stream] + raws)
+
+    def loads(self, payload: memoryview) -> Any:
+        """Deserialize `payload`."""
+        count = _COUNT.unpack_from(payload)[0]
+        offset = _COUNT.size
+        lengths = [_LENGTH.unpack_from(payload, offset + i * _LENGTH.size)[0] for i in range(count + 1)]
+        offset += len(lengths) * _LENGTH.size
+
+        chunks = []
+        for length in lengths:
+            chunks.append(payload[offset:offset + length])
+            offset += length
+
+        if count:
+            return pickle.loads(chunks[0], buffers=chunks[1:])  # type: ignore  # py3.8+
+        return pickle.loads(chunks[0])
+
+
+class JSONSerializer(Serializer):
+    """JSON serializer (UTF-8).
+
+    Only JSON-compatible data is supported; tuples become lists.
+    """
+
+    codec_id = 2
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize `data`, including the header."""
+        return self.header + json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, payload: memoryview) -> Any:
+        """Deserialize `payload`."""
+        return json.loads(bytes(payload))
+
+
+class MsgpackSerializer(Serializer):
+    """Compact binary serializer, using MessagePack.
+
+    Requires the optional `msgpack` package.
+    """
+
+    codec_id = 3
+
+    def __init__(self) -> None:
+        try:
+            import msgpack  # type: ignore  # pylint: disable=C0415
+        except ImportError as e:
+            raise ImportError("MsgpackSerializer requires the 'msgpack' package (pip install MQClient[msgpack])") from e
+        self._msgpack = msgpack
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize `data`, including the header."""
+        return self.header + self._msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, payload: memoryview) -> Any:
+        """Deserialize `payload`."""
+        return self._msgpack.unpackb(payload, raw=False)
+
+
+class RawSerializer(Serializer):
+    """Passthrough serializer for bytes-like data.
+
+    `loads()` returns a zero-copy `memoryview` of the received message.
+    """
+
+    codec_id = 4
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize `data`, including the header."""
+        return b''.join([self.header, data])
+
+    def loads(self, payload: memoryview) -> Any:
+        """Deserialize `payload`."""
+        return payload
+
+
+class EnvelopeSerializer(Serializer):
+    """Envelope of many already-serialized messages, sent as one (see `packing`).
+
+    `loads()` returns the list of deserialized items; use `unpack()`
+    to get the items' raw messages instead.
+    """
+
+    codec_id = 5
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize `data` (a list of serialized messages), including the header.
+
+        Layout: header, item count, item lengths, items.
+        """
+        lengths = [_LENGTH.pack(len(raw)) for raw in data]
+        return b''.join([self.header, _COUNT.pack(len(data))] + lengths + list(data))
+
+    def loads(self, payload: memoryview) -> Any:
+        """Deserialize `payload`, and each of its items."""
+        return [loads(item) for item in self.unpack(payload)]
+
+    @staticmethod
+    def unpack(payload: memoryview) -> List[memoryview]:
+        """Split `payload` into its items' raw messages (zero-copy)."""
+        count = _COUNT.unpack_from(payload)[0]
+        offset = _COUNT.size
+        lengths = [_LENGTH.unpack_from(payload, offset + i * _LENGTH.size)[0] for i in range(count)]
+        offset += count * _LENGTH.size
+
+        items = []
+        for length in lengths:
+            items.append(payload[offset:offset + length])
+            offset += length
+        return items
+
+
+_CODECS = {}  # type: Dict[int, Type[Serializer]]
+_DECODERS = {}  # type: Dict[int, Serializer]
+
+
+def register(serializer: Type[Serializer]) -> Type[Serializer]:
+    """Register a serializer class, so its messages can be decoded."""
+    if not 0 <= serializer.codec_id <= 255:
+        raise ValueError(f"codec_id must be a single byte (not {serializer.codec_id})")
+    if _CODECS.get(serializer.codec_id, serializer) is not serializer:
+        raise ValueError(f"codec_id {serializer.codec_id} is already registered")
+    _CODECS[serializer.codec_id] = serializer
+    return serializer
+
+
+for _serializer in [PickleSerializer, JSONSerializer, MsgpackSerializer, RawSerializer, EnvelopeSerializer]:
+    register(_serializer)
+
+
+def loads(raw: Any) -> Any:
+    """Deserialize a message, auto-detecting its codec from the header.
+
+    `raw` may be any bytes-like object; it isn't copied (unless
+    decompressed, or the codec needs `bytes`).
+    """
+    raw = compressors.decompress(raw)
+    view = memoryview(raw)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        return pickle.loads(raw)  # legacy, headerless
+
+    codec_id = view[len(MAGIC)]
+    if codec_id not in _DECODERS:
+        if codec_id not in _CODECS:
+            raise ValueError(f"Unknown serializer codec_id: {codec_id}")
+        _DECODERS[codec_id] = _CODECS[codec_id]()
+    return _DECODERS[codec_id].loads(view[HEADER_LEN:])
+
+
+def unpack(raw: Any) -> Optional[List[memoryview]]:
+    """Get the raw messages packed in an envelope, or None if `raw` isn't one."""
+    raw = compressors.decompress(raw)
+    view = memoryview(raw)
+    if bytes(view[:HEADER_LEN]) != MAGIC + bytes([EnvelopeSerializer.codec_id]):
+        return None
+    return EnvelopeSerializer.unpack(view[HEADER_LEN:])
@@ -0,0 +1,247 @@
+"""Durable local spool for messages that couldn't be published.
+
+A `Queue` with a `Spool` appends serialized messages to it when the
+backend is unavailable (or, with `slow_send`, too slow), and replays
+them (in order, in batches) once it's back, before sending anything
+new.
+
+The spool is a directory of append-only, memory-mapped segment files,
+plus a `cursor` file with the replay position. Each record is its
+length and CRC-32 (4-byte big-endian ints), then its bytes, written in
+one go; a zero length marks the end of a segment's records. A record
+whose length or checksum doesn't match (torn by a crash mid-write)
+ends the segment too, and is overwritten by the next append.
+Fully-replayed segments are deleted.
+
+Replay is at-least-once: if the process dies after publishing a batch,
+but before recording that, the batch is replayed again.
+"""
+
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('!II')  # length, crc32
+_CURSOR = struct.Struct('!QQ')  # segment number, offset
+_SEGMENT_NAME = re.compile(r'^(\d{20})\.seg$')
+
+
+class SpoolFull(Exception):
+    """Raised when appending would take the spool past its `max_bytes`."""
+
+
+class _Segment:
+    """A memory-mapped segment file, with its records' end offset."""
+
+    def __init__(self, path: str, number: int, size: int) -> None:
+        self.path = path
+        self.number = number
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            if os.fstat(f.fileno()).st_size < size:
+                f.truncate(size)
+            self.mmap = mmap.mmap(f.fileno(), 0)
+        self.end = self._find_end()
+
+    @property
+    def size(self) -> int:
+        return len(self.mmap)
+
+    def _find_end(self) -> int:
+        """Find the end of the complete records (skipping a torn one)."""
+        offset = 0
+        while offset + _HEADER.size <= self.size:
+            length, crc = _HEADER.unpack_from(self.mmap, offset)
+            start = offset + _HEADER.size
+            if not length or start + length > self.size or zlib.crc32(self.mmap[start:start + length]) != crc:
+                if length:
+                    LOGGER.warning("Spool segment %s has a torn record at %s; ignoring it.", self.path, offset)
+                break
+            offset = start + length
+        return offset
+
+    def fits(self, length: int) -> bool:
+        return self.end + _HEADER.size + length <= self.size
+
+    def append(self, raw: bytes) -> None:
+        record = _HEADER.pack(len(raw), zlib.crc32(raw)) + raw
+        self.mmap[self.end:self.end + len(record)] = record
+        self.end += len(record)
+
+    def read(self, offset: int) -> Tuple[bytes, int]:
+        """Return the record at `offset`, and the next record's offset."""
+        length = _HEADER.unpack_from(self.mmap, offset)[0]
+        start = offset + _HEADER.size
+        return self.mmap[start:start + length], start + length
+
+    def count(self, offset: int) -> int:
+        """Count the records from `offset` on."""
+        count = 0
+        while offset < self.end:
+            offset += _HEADER.size + _HEADER.unpack_from(self.mmap, offset)[0]
+            count += 1
+        return count
+
+    def close(self, delete: bool = False) -> None:
+        self.mmap.close()
+        if delete:
+            os.remove(self.path)
+
+
+class Spool:
+    """Disk-backed FIFO of serialized messages, which survives restarts.
+
+    Not safe to share between processes; a `Queue`'s spool should be
+    its own directory.
+
+    Args:
+        directory (str): where to keep the segment files (created if needed)
+        segment_size (int): size of each (pre-allocated) segment file, in bytes (default: 16 MiB)
+        max_bytes (int): max disk usage; appending past it raises `SpoolFull` (default: 1 GiB)
+        retry_interval (float): min seconds between replay attempts, after a failed one (default: 1.0)
+        sync (bool): flush each append to disk, instead of only when a segment fills or on `close()` (default: False)
+        slow_send (float): if a publish takes longer than this many seconds, spool messages
+            instead, until `retry_interval` has passed (default: None, never)
+    """
+
+    def __init__(self, directory: str, segment_size: int = 16 * 2**20, max_bytes: int = 2**30,
+                 retry_interval: float = 1.0, sync: bool = False, slow_send: Optional[float] = None) -> None:
+        if segment_size <= _HEADER.size or max_bytes < segment_size:
+            raise ValueError('segment_size must fit a record, and max_bytes a segment')
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self.retry_interval = retry_interval
+        self.sync = sync
+        self.slow_send = slow_send
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        numbers = sorted(int(m.group(1)) for m in map(_SEGMENT_NAME.match, os.listdir(directory)) if m)
+        self._segments = [_Segment(self._path(n), n, self.segment_size) for n in numbers]
+        self._cursor = self._read_cursor()
+        while self._segments and self._segments[0].number < self._cursor[0]:  # replayed, but not deleted
+            self._segments.pop(0).close(delete=True)
+        self.pending = sum(s.count(self._cursor[1] if s.number == self._cursor[0] else 0)
+                           for s in self._segments if s.number >= self._cursor[0])
+        if self.pending:
+            LOGGER.info("Spool %s has %s messages to replay.", directory, self.pending)
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self.directory, f'{number:020d}.seg')
+
+    def _read_cursor(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, 'cursor'), 'rb') as f:
+                return _CURSOR.unpack(f.read(_CURSOR.size))  # type: ignore
+        except (FileNotFoundError, struct.error):
+            return (self._segments[0].number if self._segments else 0, 0)
+
+    def _write_cursor(self) -> None:
+        path = os.path.join(self.directory, 'cursor')
+        with open(path + '.tmp', 'wb') as f:
+            f.write(_CURSOR.pack(*self._cursor))
+        os.replace(path + '.tmp', path)
+
+    @property
+    def disk_usage(self) -> int:
+        """Get the total size of the segment files, in bytes."""
+        return sum(s.size for s in self._segments)
+
+    def __len__(self) -> int:
+        """Get the number of messages waiting to be replayed."""
+        return self.pending
+
+    def append(self, raws: List[bytes]) -> None:
+        """Append messages, in order.
+
+        Raises `SpoolFull` (having appended none) if they don't fit in `max_bytes`.
+        """
+        if not all(raws):
+            raise ValueError('cannot spool an empty message')
+        with self._lock:
+            needed = self._bytes_needed(raws)
+            if needed and self.disk_usage + needed > self.max_bytes:
+                raise SpoolFull(f'spool {self.directory} is full ({self.disk_usage} bytes)')
+
+            for raw in raws:
+                if not self._segments or not self._segments[-1].fits(len(raw)):
+                    self._add_segment(len(raw))
+                self._segments[-1].append(raw)
+                self.pending += 1
+            if self.sync and self._segments:
+                self._segments[-1].mmap.flush()
+
+    def _bytes_needed(self, raws: List[bytes]) -> int:
+        """Get the size of the new segments needed for `raws`."""
+        free = self._segments[-1].size - self._segments[-1].end if self._segments else 0
+        needed = 0
+        for raw in raws:
+            length = _HEADER.size + len(raw)
+            if length > free:
+                free = max(self.segment_size, length)
+                needed += free
+            free -= length
+        return needed
+
+    def _add_segment(self, length: int) -> None:
+        if self._segments:
+            self._segments[-1].mmap.flush()
+        number = self._segments[-1].number + 1 if self._segments else self._cursor[0]
+        size = max(self.segment_size, _HEADER.size + length)
+        self._segments.append(_Segment(self._path(number), number, size))
+
+    def peek(self, max_items: int) -> List[bytes]:
+        """Get up to `max_items` of the oldest messages, without removing them."""
+        with self._lock:
+            raws = []  # type: List[bytes]
+            number, offset = self._cursor
+            for segment in self._segments:
+                if segment.number < number:
+                    continue
+                if segment.number > number:
+                    offset = 0
+                while offset < segment.end and len(raws) < max_items:
+                    raw, offset = segment.read(offset)
+                    raws.append(raw)
+                if len(raws) >= max_items:
+                    break
+            return raws
+
+    def commit(self, count: int) -> None:
+        """Remove the oldest `count` messages (after they're replayed)."""
+        with self._lock:
+            number, offset = self._cursor
+            while count and self._segments:
+                segment = self._segments[0]
+                if segment.number != number:
+                    number, offset = segment.number, 0
+                while count and offset < segment.end:
+                    offset = segment.read(offset)[1]
+                    count -= 1
+                    self.pending -= 1
+                if offset < segment.end or len(self._segments) == 1:  # not done with it
+                    break
+                self._segments.pop(0).close(delete=True)
+
+            if not self.pending and self._segments:  # all replayed, so free the disk
+                number, offset = self._segments[-1].number + 1, 0
+                for segment in self._segments:
+                    segment.close(delete=True)
+                self._segments = []
+            self._cursor = (number, offset)
+            self._write_cursor()
+
+    def close(self) -> None:
+        """Flush and close the segment files."""
+        with self._lock:
+            for segment in self._segments:
+                segment.mmap.flush()
+                segment.close()
+            self._segments = []
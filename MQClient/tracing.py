@@ -0,0 +1,107 @@
+"""Opt-in per-message phase timings, for profiling slow consumers.
+
+A consumed message's time is split into phases:
+
+    - wait: blocked on the broker (in `Sub.message_generator()`)
+    - decode: deserializing (in `MessageGeneratorContext`)
+    - process: the consumer's own code, until it asks for the next message
+    - ack: acking (or rejecting) the message
+
+Timings of the most recent messages are kept in a ring buffer, and
+summarized by `Tracer.summary()`.
+"""
+
+import collections
+import logging
+import math
+import threading
+import time
+from typing import Deque, Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+PHASES = ('wait', 'decode', 'process', 'ack')
+
+
+class Tracer:
+    """Record per-message phase timings into a ring buffer.
+
+    Backends call `begin()` when a message arrives, and the consumer
+    side calls `add()` for its later phases. A message's timings are
+    kept once the next message begins, or on `end()`.
+
+    One tracer can be shared by many queues (and threads), but then its
+    records mix their messages' phases.
+
+    Args:
+        capacity (int): number of recent messages to keep (default: 10000)
+        log_interval (Optional[float]): log a summary every this many seconds, at INFO (default: never)
+    """
+
+    def __init__(self, capacity: int = 10000, log_interval: Optional[float] = None) -> None:
+        if capacity < 1:
+            raise ValueError('capacity must be positive')
+        self.records = collections.deque(maxlen=capacity)  # type: Deque[Dict[str, float]]
+        self.log_interval = log_interval
+        self._current = None  # type: Optional[Dict[str, float]]
+        self._last_log = time.monotonic()
+        self._lock = threading.Lock()
+
+    def begin(self, wait: float) -> None:
+        """Start a new message's record, after waiting `wait` seconds for it.
+
+        The previous message's record is kept.
+        """
+        self.end()
+        self._current = {'wait': wait}
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add `seconds` to the current message's `phase`."""
+        if self._current is not None:
+            self._current[phase] = self._current.get(phase, 0.0) + seconds
+
+    def end(self) -> None:
+        """Keep the current message's record, if any."""
+        if self._current is None:
+            return
+        record, self._current = self._current, None
+        with self._lock:
+            self.records.append(record)
+            log = self.log_interval is not None and time.monotonic() - self._last_log >= self.log_interval
+            if log:
+                self._last_log = time.monotonic()
+        if log:
+            LOGGER.info("Message phase timings: %s", self.summary())
+
+    def clear(self) -> None:
+        """Forget all records."""
+        with self._lock:
+            self.records.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Summarize the recorded timings, per phase.
+
+        Each phase has its `mean`, `p50`, `p95` and `max` (in seconds),
+        and its `share` of the total time across all phases.
+        """
+        with self._lock:
+            records = list(self.records)
+
+        totals = {phase: sum(r.get(phase, 0.0) for r in records) for phase in PHASES}
+        grand_total = sum(totals.values())
+        summary = {}  # type: Dict[str, Dict[str, float]]
+        for phase in PHASES:
+            values = sorted(r.get(phase, 0.0) for r in records)
+            summary[phase] = {'mean': totals[phase] / len(values) if values else 0.0,
+                              'p50': _percentile(values, 50),
+                              'p95': _percentile(values, 95),
+                              'max': values[-1] if values else 0.0,
+                              'share': totals[phase] / grand_total if grand_total else 0.0}
+        return summary
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Get the `pct` percentile of sorted `values` (nearest-rank)."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
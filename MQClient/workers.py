@@ -0,0 +1,146 @@
+"""Consume a queue's messages concurrently, in a thread or process pool."""
+
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .backend_interface import Message
+from .queue import Queue
+
+
+def _handle_all(handler: Callable[[Any], Any], items: List[Any]) -> Tuple[float, Optional[Exception]]:
+    """Call `handler` on each of a message's items, in turn.
+
+    Return the seconds it took, and the error it raised, if any.
+    """
+    start = time.monotonic()
+    try:
+        for item in items:
+            handler(item)
+    except Exception as e:  # pylint: disable=W0703
+        return time.monotonic() - start, e
+    return time.monotonic() - start, None
+
+
+class WorkerPool:
+    """Consume messages from one `Queue`, handling them in a pool.
+
+    Messages are received, acked, and rejected on the thread calling
+    `run()` (backend connections are not thread-safe), while `handler`
+    runs in a `ThreadPoolExecutor`, or with `processes`, a
+    `ProcessPoolExecutor` (then `handler` and the data must be
+    picklable). At most `queue.prefetch` messages are in flight at
+    once, so set the queue's prefetch to at least `workers`.
+
+    Each message is acked once its handler returns, or rejected if it
+    raises, in whichever order the handlers finish. The handlers' time
+    is recorded to the queue's metrics, as by `queue.recv()`. Messages are
+    decoded as by `queue.recv()`: claim-check references are fetched,
+    and an envelope's items are handled in turn, by one worker, and
+    acked (or rejected) together.
+
+    Example:
+        pool = WorkerPool(Queue(backend, name='jobs', prefetch=32), process, workers=32)
+        pool.run()
+
+    Args:
+        queue (Queue): the queue to consume
+        handler (Callable[[Any], Any]): called on each message's data
+        workers (int): size of the pool (default: the executor's default)
+        processes (bool): use a process pool, instead of a thread pool (default: False)
+    """
+
+    def __init__(self, queue: Queue, handler: Callable[[Any], Any],
+                 workers: Optional[int] = None, processes: bool = False) -> None:
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.processes = processes
+        self.processed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop receiving messages, and let `run()` drain those in flight.
+
+        Safe to call from another thread, or a signal handler.
+        """
+        self._stop.set()
+
+    def run(self, timeout: int = 60, poll_interval: float = 0.1) -> None:
+        """Receive and handle messages until stopped.
+
+        Stop after `stop()`, or once no messages are received (and none
+        are in flight) for `timeout` seconds. Either way, or on error,
+        in-flight messages are finished and settled before the queue
+        is closed.
+
+        Keyword Arguments:
+            timeout {int} -- seconds to wait idle before stopping (default: {60})
+            poll_interval {float} -- max seconds between checks for a stop, or for finished handlers (default: {0.1})
+        """
+        self._stop.clear()
+        executor_class = concurrent.futures.ProcessPoolExecutor if self.processes else concurrent.futures.ThreadPoolExecutor
+        in_flight = {}  # type: Dict[concurrent.futures.Future, Message]  # type: ignore[type-arg]
+        idle_since = time.monotonic()
+
+        with executor_class(max_workers=self.workers) as executor:
+            try:
+                while not self._stop.is_set():
+                    self._settle(in_flight, poll_interval if len(in_flight) >= self.queue.prefetch else 0)
+                    if len(in_flight) >= self.queue.prefetch:
+                        continue
+
+                    msg = self.queue.raw_sub_queue.get_message(timeout_millis=int(poll_interval * 1000))
+                    if not msg:
+                        if not in_flight and time.monotonic() - idle_since >= timeout:
+                            logging.info("WorkerPool: no messages in idle timeout window.")
+                            break
+                        continue
+                    idle_since = time.monotonic()
+                    self.queue.metrics.received(len(msg.data))
+
+                    try:
+                        items = self.queue.decode(msg)
+                    except Exception:  # pylint: disable=W0703
+                        logging.warning("WorkerPool: could not decode message. Rejecting.", exc_info=True)
+                        self._reject(msg)
+                        continue
+                    in_flight[executor.submit(_handle_all, self.handler, items)] = msg
+            finally:
+                logging.debug(f"WorkerPool: draining {len(in_flight)} in-flight messages.")
+                self._settle(in_flight, None)
+                self.queue.close()
+
+    def _settle(self, in_flight: Dict[concurrent.futures.Future, Message],  # type: ignore[type-arg]
+                timeout: Optional[float]) -> None:
+        """Ack/reject finished messages, waiting up to `timeout` seconds for one.
+
+        If `timeout` is None, wait for all of them.
+        """
+        if not in_flight:
+            return
+        return_when = concurrent.futures.ALL_COMPLETED if timeout is None else concurrent.futures.FIRST_COMPLETED
+        done, _ = concurrent.futures.wait(in_flight, timeout=timeout, return_when=return_when)
+
+        for future in done:
+            msg = in_flight.pop(future)
+            try:
+                seconds, exc = future.result()
+                self.queue.metrics.handled(seconds)
+            except Exception as e:  # pylint: disable=W0703  # e.g. a broken process pool
+                exc = e
+            if exc:
+                logging.warning(f"WorkerPool: handler raised {exc!r}. Rejecting message.")
+                self._reject(msg)
+            else:
+                self.processed += 1
+                self.queue.raw_sub_queue.ack_message(msg.msg_id)
+                self.queue.release_claims([msg.msg_id])
+
+    def _reject(self, msg: Message) -> None:
+        self.failed += 1
+        self.queue.drop_claims([msg.msg_id])
+        self.queue.raw_sub_queue.reject_message(msg.msg_id)
@@ -0,0 +1,76 @@
+"""Benchmark bytes-on-wire and CPU cost of compression.
+
+Compare each compressor against the uncompressed pickle path, on
+JSON-like event payloads. No broker is needed. Prints JSON.
+"""
+
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+# local imports
+from MQClient import compressors, serializers
+
+
+def make_payload(num_events: int, seed: int = 0) -> Dict[str, Any]:
+    """Make a compressible, JSON-like event payload."""
+    rand = random.Random(seed)
+    return {
+        'run': 123456,
+        'events': [{'id': i,
+                    'type': rand.choice(['InIce', 'IceTop', 'DeepCore']),
+                    'charge': round(rand.uniform(0, 100), 3),
+                    'pulses': [rand.randint(0, 5160) for _ in range(10)]}
+                   for i in range(num_events)],
+    }
+
+
+def bench(payload: Any, compressor: Optional[compressors.Compressor], repeat: int) -> Dict[str, Any]:
+    """Time serializing+compressing and decompressing+deserializing `payload`."""
+    serializer = serializers.PickleSerializer()
+
+    def dumps() -> bytes:
+        raw = serializer.dumps(payload)
+        return compressor.compress_message(raw) if compressor else raw
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        raw = dumps()
+    encode = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serializers.loads(raw)
+    decode = (time.perf_counter() - start) / repeat
+
+    return {'compressor': compressor.__class__.__name__ if compressor else None,
+            'bytes': len(raw),
+            'encode_us': encode * 1e6,
+            'decode_us': decode * 1e6}
+
+
+def main(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Run the benchmark for each payload size and compressor."""
+    available = [c for c in [compressors.ZlibCompressor,  # type: ignore
+                             compressors.LZMACompressor,
+                             compressors.LZ4Compressor] if compressors.is_available(c)]
+    results = []
+    for size in sizes:
+        payload = make_payload(size)
+        baseline = bench(payload, None, repeat)
+        results.append(dict(baseline, num_events=size, ratio=1.0))
+        for compressor_class in available:
+            result = bench(payload, compressor_class(threshold=0), repeat)
+            results.append(dict(result, num_events=size, ratio=baseline['bytes'] / result['bytes']))
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Compression benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000], help='number of events per payload')
+    parser.add_argument('--repeat', type=int, default=100, help='repetitions per measurement')
+    args = parser.parse_args()
+
+    print(json.dumps(main(args.sizes, args.repeat), indent=2))
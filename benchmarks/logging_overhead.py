@@ -0,0 +1,56 @@
+"""Benchmark per-message cost of debug logging, with DEBUG disabled.
+
+Compare the old style (an eager f-string, formatting the message's
+full payload, sent to the root logger) against the current style (a
+module-level logger, with lazy %-args and a truncated payload repr),
+for each payload size. No broker is needed. Prints JSON.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+# local imports
+from MQClient.backend_interface import Message
+from MQClient.backends import log_msgs
+
+LOGGER = logging.getLogger('MQClient.benchmarks')
+
+
+def log_before(msg: Message) -> None:
+    """Log like `message_generator()` used to."""
+    logging.debug(f"{log_msgs.MSGGEN_YIELDING_MESSAGE} [Message(msg_id={msg.msg_id!r}, data={msg.data!r})]")
+
+
+def log_after(msg: Message) -> None:
+    """Log like `message_generator()` does now."""
+    LOGGER.debug("%s [%s]", log_msgs.MSGGEN_YIELDING_MESSAGE, msg)
+
+
+def bench(size: int, repeat: int) -> Dict[str, Any]:
+    """Time each logging style on a `size`-byte message."""
+    msg = Message(0, b'x' * size)
+    result = {'bytes': size}  # type: Dict[str, Any]
+    for name, log in [('before', log_before), ('after', log_after)]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            log(msg)
+        result[f'{name}_us'] = (time.perf_counter() - start) / repeat * 1e6
+    return result
+
+
+def main(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Run the benchmark for each payload size, with DEBUG disabled."""
+    logging.getLogger().setLevel(logging.INFO)
+    return [bench(size, repeat) for size in sizes]
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Logging overhead benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 1_000_000, 10_000_000], help='payload sizes in bytes')
+    parser.add_argument('--repeat', type=int, default=100, help='repetitions per measurement')
+    args = parser.parse_args()
+
+    print(json.dumps(main(args.sizes, args.repeat), indent=2))
@@ -0,0 +1,163 @@
+"""Benchmark throughput and end-to-end latency of `Queue` on a backend.
+
+Producers `Queue.send()` timestamped payloads, while consumers take
+them via `Queue.recv()` or `Queue.recv_one()`, each in its own thread
+(so latencies share one clock). Runs every combination of payload
+size, prefetch and ack mode. Prints JSON.
+
+The 'memory' backend needs no broker; the others need one running
+(see `resources/`).
+"""
+
+import itertools
+import json
+import math
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# local imports
+from MQClient import Queue, backends
+from MQClient.backend_interface import Backend
+
+BACKENDS = {'memory': backends.memory.Backend,
+            'rabbitmq': backends.rabbitmq.Backend,
+            'pulsar': backends.apachepulsar.Backend}
+
+# ack mode -> `Queue.recv()`'s ack_batch_size (`None` means use `Queue.recv_one()`)
+ACK_MODES = {'single': 1, 'batch': 100, 'recv_one': None}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Get the `pct` percentile of sorted `values` (nearest-rank)."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+class _Stats:
+    """Thread-safe tally of received messages."""
+
+    def __init__(self, num_messages: int) -> None:
+        self.num_messages = num_messages
+        self.lock = threading.Lock()
+        self.latencies = []  # type: List[float]
+        self.last_recv = 0.0
+        self.done = threading.Event()
+
+    def add(self, sent: float) -> None:
+        now = time.perf_counter()
+        with self.lock:
+            self.latencies.append(now - sent)
+            self.last_recv = now
+            if len(self.latencies) >= self.num_messages:
+                self.done.set()
+
+
+def produce(queue: Queue, num_messages: int, payload: bytes) -> None:
+    """Send `num_messages` timestamped payloads."""
+    for _ in range(num_messages):
+        queue.send({'sent': time.perf_counter(), 'payload': payload})
+    queue.close()
+
+
+def consume(queue: Queue, stats: _Stats, ack_batch_size: Optional[int], timeout: int) -> None:
+    """Receive messages until all have arrived, or `timeout` seconds idle."""
+    try:
+        if ack_batch_size is None:
+            idle_since = time.monotonic()
+            while not stats.done.is_set() and time.monotonic() - idle_since < timeout:
+                try:
+                    with queue.recv_one(keep_open=True) as data:
+                        stats.add(data['sent'])
+                except Exception:  # pylint: disable=W0703
+                    continue  # no message available
+                idle_since = time.monotonic()
+        else:
+            with queue.recv(timeout=timeout, ack_batch_size=ack_batch_size, ack_interval=1) as stream:
+                for data in stream:
+                    stats.add(data['sent'])
+                    if stats.done.is_set():
+                        break
+                stream.message_generator.close()  # flush acks before closing the queue
+    finally:
+        queue.close()
+
+
+def bench(backend: Backend, address: str, payload_size: int, prefetch: int,
+          ack_mode: str, num_messages: int, producers: int, consumers: int,
+          timeout: int) -> Dict[str, Any]:
+    """Run one benchmark, and get its throughput and latency stats."""
+    name = uuid.uuid4().hex
+    payload = b'x' * payload_size
+    stats = _Stats(num_messages)
+
+    threads = [threading.Thread(target=consume,
+                                args=(Queue(backend, address=address, name=name, prefetch=prefetch),
+                                      stats, ACK_MODES[ack_mode], timeout))
+               for _ in range(consumers)]
+    # spread messages over producers, the first few sending one extra
+    threads += [threading.Thread(target=produce,
+                                 args=(Queue(backend, address=address, name=name),
+                                       num_messages // producers + (1 if i < num_messages % producers else 0),
+                                       payload))
+                for i in range(producers)]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    received = len(stats.latencies)
+    elapsed = (stats.last_recv - start) if received else 0.0
+    latencies = sorted(stats.latencies)
+    return {'payload_size': payload_size,
+            'prefetch': prefetch,
+            'ack_mode': ack_mode,
+            'producers': producers,
+            'consumers': consumers,
+            'sent': num_messages,
+            'received': received,
+            'seconds': elapsed,
+            'msgs_per_sec': received / elapsed if elapsed else None,
+            'mb_per_sec': received * payload_size / elapsed / 1e6 if elapsed else None,
+            'latency_p50_ms': _millis(percentile(latencies, 50)),
+            'latency_p99_ms': _millis(percentile(latencies, 99)),
+            'latency_p999_ms': _millis(percentile(latencies, 99.9))}
+
+
+def _millis(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else seconds * 1000
+
+
+def main(backend_name: str, address: str, sizes: List[int], prefetches: List[int],
+         ack_modes: List[str], num_messages: int, producers: int, consumers: int,
+         timeout: int) -> List[Dict[str, Any]]:
+    """Run the benchmark for each payload size, prefetch and ack mode."""
+    backend = BACKENDS[backend_name]()
+    results = []
+    for size, prefetch, ack_mode in itertools.product(sizes, prefetches, ack_modes):
+        result = bench(backend, address, size, prefetch, ack_mode,
+                       num_messages, producers, consumers, timeout)
+        results.append(dict(result, backend=backend_name))
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Queue throughput & latency benchmark')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='memory', help='backend to benchmark')
+    parser.add_argument('--address', default='localhost', help='address of the broker')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000], help='payload sizes, in bytes')
+    parser.add_argument('--prefetch', type=int, nargs='+', default=[1, 100], help='subscribers\' prefetch values')
+    parser.add_argument('--ack-modes', choices=sorted(ACK_MODES), nargs='+', default=['single', 'batch'], help='how consumers receive & ack')
+    parser.add_argument('--messages', type=int, default=10000, help='number of messages per run')
+    parser.add_argument('--producers', type=int, default=1, help='number of producer threads')
+    parser.add_argument('--consumers', type=int, default=1, help='number of consumer threads')
+    parser.add_argument('--timeout', type=int, default=5, help='seconds a consumer waits idle before giving up')
+    args = parser.parse_args()
+
+    print(json.dumps(main(args.backend, args.address, args.sizes, args.prefetch, args.ack_modes,
+                          args.messages, args.producers, args.consumers, args.timeout), indent=2))
@@ -0,0 +1,86 @@
+"""Run integration tests for given asyncio backend, on AsyncQueue class."""
+
+import logging
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import AsyncQueue
+from MQClient.backend_interface import AsyncBackend
+
+from .utils import DATA_LIST, _log_recv, _log_recv_multiple, _log_send
+
+logging.getLogger().setLevel(logging.DEBUG)
+
+
+class PubSubAsyncQueue:
+    """Integration test suite for AsyncQueue objects."""
+
+    backend = None  # type: AsyncBackend
+
+    @pytest.mark.asyncio  # type: ignore
+    async def test_10(self, queue_name: str) -> None:
+        """Test one pub, one sub."""
+        pub_sub = AsyncQueue(self.backend, name=queue_name)
+        await pub_sub.send(DATA_LIST[0])
+        _log_send(DATA_LIST[0])
+
+        async with pub_sub.recv_one() as d:
+            _log_recv(d)
+            assert d == DATA_LIST[0]
+
+        for d in DATA_LIST:
+            await pub_sub.send(d)
+            _log_send(d)
+
+        async with pub_sub.recv(timeout=1) as gen:
+            i = 0
+            async for d in gen:
+                _log_recv(d)
+                assert d == DATA_LIST[i]
+                i += 1
+
+    @pytest.mark.asyncio  # type: ignore
+    async def test_13(self, queue_name: str) -> None:
+        """Test one pub sending in batches, one sub."""
+        pub = AsyncQueue(self.backend, name=queue_name)
+        await pub.send_many(DATA_LIST, batch_size=4)
+        for d in DATA_LIST:
+            _log_send(d)
+
+        sub = AsyncQueue(self.backend, name=queue_name)
+        async with sub.recv(timeout=1) as gen:
+            received_data = [d async for d in gen]
+        _log_recv_multiple(received_data)
+
+        assert received_data == DATA_LIST
+        await pub.close()
+
+    @pytest.mark.asyncio  # type: ignore
+    async def test_60(self, queue_name: str) -> None:
+        """Test recv() fail and recovery, with multiple recv() calls."""
+        pub = AsyncQueue(self.backend, name=queue_name)
+        for d in DATA_LIST:
+            await pub.send(d)
+            _log_send(d)
+
+        class TestException(Exception):  # pylint: disable=C0115
+            pass
+
+        sub = AsyncQueue(self.backend, name=queue_name)
+        async with sub.recv(timeout=1) as gen:
+            i = 0
+            async for d in gen:
+                if i == 2:
+                    raise TestException()
+                _log_recv(d)
+                assert d == DATA_LIST[i]
+                i += 1
+
+        # continue where we left off
+        async with sub.recv(timeout=1) as gen:
+            async for d in gen:
+                _log_recv(d)
+                assert d == DATA_LIST[i]
+                i += 1
+        await pub.close()
@@ -9,6 +9,7 @@ import pytest  # type: ignore
 # local imports
 from MQClient import Queue
 from MQClient.backend_interface import Backend
+from MQClient.serializers import JSONSerializer
 
 from .utils import DATA_LIST, _log_recv, _log_recv_multiple, _log_send
 
@@ -76,6 +77,87 @@ class PubSubQueue:
             _log_recv(d)
             assert d == DATA_LIST[0]
 
+    def test_13(self, queue_name: str) -> None:
+        """Test one pub sending in batches, one sub."""
+        pub = Queue(self.backend, name=queue_name)
+        pub.send_many(DATA_LIST, batch_size=4)
+        for d in DATA_LIST:
+            _log_send(d)
+
+        sub = Queue(self.backend, name=queue_name)
+        with sub.recv(timeout=1) as gen:
+            received_data = list(gen)
+        _log_recv_multiple(received_data)
+
+        assert received_data == DATA_LIST
+
+    def test_14(self, queue_name: str) -> None:
+        """Test a non-default serializer, auto-detected by the sub."""
+        pub = Queue(self.backend, name=queue_name, serializer=JSONSerializer())
+        for d in DATA_LIST:
+            pub.send(d)
+            _log_send(d)
+
+        sub = Queue(self.backend, name=queue_name)
+        with sub.recv(timeout=1) as gen:
+            received_data = list(gen)
+        _log_recv_multiple(received_data)
+
+        assert received_data == DATA_LIST
+
+    def test_15(self, queue_name: str) -> None:
+        """Test one pub, one sub reusing its connection for recv_one()."""
+        pub = Queue(self.backend, name=queue_name)
+        sub = Queue(self.backend, name=queue_name)
+
+        for data in DATA_LIST:
+            pub.send(data)
+            _log_send(data)
+            with sub.recv_one(keep_open=True) as d:
+                _log_recv(d)
+                assert d == data
+        assert sub._sub_queue  # pylint: disable=W0212
+        sub.close()
+
+    def test_16(self, queue_name: str) -> None:
+        """Test one pub, one sub acking in batches, then nothing redelivered."""
+        pub = Queue(self.backend, name=queue_name)
+        pub.send_many(DATA_LIST)
+
+        sub = Queue(self.backend, name=queue_name, prefetch=4)
+        with sub.recv(timeout=1, ack_batch_size=3) as gen:
+            received_data = list(gen)
+        _log_recv_multiple(received_data)
+        assert received_data == DATA_LIST
+
+        with sub.recv(timeout=1) as gen:
+            assert not list(gen)
+
+    def test_17(self, queue_name: str) -> None:
+        """Test one pub, one sub receiving in batches."""
+        pub = Queue(self.backend, name=queue_name)
+        pub.send_many(DATA_LIST)
+
+        sub = Queue(self.backend, name=queue_name, prefetch=4)
+        received_data = []  # type: List[Any]
+        for _ in range(len(DATA_LIST)):
+            with sub.recv_batch(max_items=4, max_wait=1, keep_open=True) as batch:
+                assert len(batch) <= 4
+                received_data.extend(batch)
+            if len(received_data) == len(DATA_LIST):
+                break
+        _log_recv_multiple(received_data)
+        assert received_data == DATA_LIST
+
+        # a rejected batch is redelivered
+        pub.send(DATA_LIST[0])
+        with pytest.raises(ValueError):
+            with sub.recv_batch(max_wait=1) as batch:
+                assert batch == [DATA_LIST[0]]
+                raise ValueError()
+        with sub.recv_batch(max_wait=1) as batch:
+            assert batch == [DATA_LIST[0]]
+
     def test_20(self, queue_name: str) -> None:
         """Test one pub, multiple subs, ordered/alternatingly."""
         pub = Queue(self.backend, name=queue_name)
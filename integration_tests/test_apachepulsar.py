@@ -3,6 +3,7 @@
 # local imports
 from MQClient.backends import apachepulsar
 
+from .common_async_queue_tests import PubSubAsyncQueue
 from .common_backend_interface_tests import PubSubBackendInterface
 from .common_queue_tests import PubSubQueue
 from .utils import queue_name  # pytest.fixture # noqa: F401 # pylint: disable=W0611
@@ -14,6 +15,18 @@ class TestPulsarQueue(PubSubQueue):
     backend = apachepulsar.Backend()
 
 
+class TestPulsarQueueSharedConnections(PubSubQueue):
+    """Run PubSubQueue integration tests with Pulsar backend, with pooled connections."""
+
+    backend = apachepulsar.Backend(share_connections=True)
+
+
+class TestPulsarAsyncQueue(PubSubAsyncQueue):
+    """Run PubSubAsyncQueue integration tests with Pulsar asyncio backend."""
+
+    backend = apachepulsar.AsyncBackend()
+
+
 class TestPulsarBackendInterface(PubSubBackendInterface):
     """Run PubSubBackendInterface integration tests with Pulsar backend."""
 
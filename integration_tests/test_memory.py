@@ -0,0 +1,20 @@
+"""Run integration tests for in-memory backend."""
+
+# local imports
+from MQClient.backends import memory
+
+from .common_backend_interface_tests import PubSubBackendInterface
+from .common_queue_tests import PubSubQueue
+from .utils import queue_name  # pytest.fixture # noqa: F401 # pylint: disable=W0611
+
+
+class TestMemoryQueue(PubSubQueue):
+    """Run PubSubQueue integration tests with in-memory backend."""
+
+    backend = memory.Backend()
+
+
+class TestMemoryBackend(PubSubBackendInterface):
+    """Run PubSubBackendInterface integration tests with in-memory backend."""
+
+    backend = memory.Backend()
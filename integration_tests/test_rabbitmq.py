@@ -3,6 +3,7 @@
 # local imports
 from MQClient.backends import rabbitmq
 
+from .common_async_queue_tests import PubSubAsyncQueue
 from .common_backend_interface_tests import PubSubBackendInterface
 from .common_queue_tests import PubSubQueue
 from .utils import queue_name  # pytest.fixture # noqa: F401 # pylint: disable=W0611
@@ -14,6 +15,18 @@ class TestRabbitMQQueue(PubSubQueue):
     backend = rabbitmq.Backend()
 
 
+class TestRabbitMQQueueSharedConnections(PubSubQueue):
+    """Run PubSubQueue integration tests with RabbitMQ backend, with pooled connections."""
+
+    backend = rabbitmq.Backend(share_connections=True)
+
+
+class TestRabbitMQAsyncQueue(PubSubAsyncQueue):
+    """Run PubSubAsyncQueue integration tests with RabbitMQ asyncio backend."""
+
+    backend = rabbitmq.AsyncBackend()
+
+
 class TestRabbitMQBackend(PubSubBackendInterface):
     """Run PubSubBackendInterface integration tests with RabbitMQ backend."""
 
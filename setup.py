@@ -22,6 +22,10 @@ setuptools.setup(
     python_requires='>=3.7',
     extras_require={
         'RabbitMQ': ['pika'],
+        'msgpack': ['msgpack'],
+        'lz4': ['lz4'],
+        'prometheus': ['prometheus-client'],
+        's3': ['boto3'],
         'tests': ['pytest', 'pytest-asyncio', 'pytest-flake8', 'pytest-mypy', 'pytest-mock'],
     }
 )
@@ -67,6 +67,10 @@ class BackendUnitTest:
         """Test sending message."""
         raise NotImplementedError()
 
+    def test_send_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test sending a batch of messages."""
+        raise NotImplementedError()
+
     def test_get_message(self, mock_con: Any, queue_name: str) -> None:
         """Test getting message."""
         raise NotImplementedError()
@@ -77,6 +81,10 @@ class BackendUnitTest:
         q.ack_message(12)
         self._get_mock_ack(mock_con).assert_called_with(12)
 
+    def test_ack_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test acking a batch of messages."""
+        raise NotImplementedError()
+
     def test_reject_message(self, mock_con: Any, queue_name: str) -> None:
         """Test rejecting message."""
         q = self.backend.create_sub_queue("localhost", queue_name)
@@ -1,7 +1,10 @@
 """Unit Tests for Pulsar Backend."""
 
+import unittest
 from typing import Any, List
+from unittest.mock import MagicMock, call
 
+import pulsar  # type: ignore
 import pytest  # type: ignore
 
 # local imports
@@ -60,6 +63,19 @@ class TestUnitApachePulsar(BackendUnitTest):
         q.send_message(b"foo, bar, baz")
         mock_con.return_value.create_producer.return_value.send.assert_called_with(b'foo, bar, baz')
 
+    def test_send_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test sending a batch of messages."""
+        q = self.backend.create_pub_queue("localhost", queue_name)
+        producer = mock_con.return_value.create_producer.return_value
+        producer.send_async.side_effect = lambda msg, callback: callback(pulsar.Result.Ok, None)
+        q.send_messages([b"foo", b"bar", b"baz"])
+        assert producer.send_async.call_count == 3
+        producer.flush.assert_called_once()
+
+        producer.send_async.side_effect = lambda msg, callback: callback(pulsar.Result.Timeout, None)
+        with pytest.raises(Exception):
+            q.send_messages([b"foo"])
+
     def test_get_message(self, mock_con: Any, queue_name: str) -> None:
         """Test getting message."""
         q = self.backend.create_sub_queue("localhost", queue_name)
@@ -71,6 +87,91 @@ class TestUnitApachePulsar(BackendUnitTest):
         assert m.msg_id == 12
         assert m.data == b'foo, bar'
 
+    def test_get_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test getting a batch of messages, with batch_receive()."""
+        q = self.backend.create_sub_queue("localhost", queue_name, prefetch=2)
+        consumer = mock_con.return_value.subscribe.return_value
+
+        def received(i: int) -> Any:
+            msg = MagicMock()
+            msg.data.return_value = f'foo-{i}'.encode('utf-8')
+            msg.message_id.return_value = i
+            return msg
+
+        consumer.batch_receive.side_effect = [[received(0), received(1)], [received(2)]]
+        msgs = q.get_messages(1)
+        assert [m.msg_id for m in msgs] == [0]
+        assert msgs[0].data == b'foo-0'
+
+        # left over from the 1st batch_receive()
+        m = q.get_message()
+        assert m is not None
+        assert m.msg_id == 1
+        consumer.receive.assert_not_called()
+
+        msgs = q.get_messages(2, timeout_millis=0)
+        assert [m.msg_id for m in msgs] == [2]
+        assert consumer.batch_receive.call_count == 2
+
+    def test_get_messages_without_batch_receive(self, mock_con: Any, queue_name: str, monkeypatch: Any) -> None:
+        """Test that older clients (no batch_receive()) receive one message at a time."""
+        monkeypatch.setattr(apachepulsar, 'HAS_BATCH_RECEIVE', False)
+        q = self.backend.create_sub_queue("localhost", queue_name, prefetch=2)
+        assert 'batch_receive_policy' not in mock_con.return_value.subscribe.call_args[1]
+
+        self._enqueue_mock_messages(mock_con, [b'a', b'b'], [1, 2])
+        msgs = q.get_messages(2)
+        assert [m.msg_id for m in msgs] == [1, 2]
+        mock_con.return_value.subscribe.return_value.batch_receive.assert_not_called()
+
+    def test_multi_sub_without_batch_receive(self, mock_con: Any, queue_name: str, monkeypatch: Any) -> None:
+        """Test that older clients' multi-subscriptions poll with receive()."""
+        monkeypatch.setattr(apachepulsar, 'HAS_BATCH_RECEIVE', False)
+        q = self.backend.create_multi_sub_queue("localhost", [queue_name])
+        assert 'batch_receive_policy' not in mock_con.return_value.subscribe.call_args[1]
+
+        self._enqueue_mock_messages(mock_con, [b'a'], [1])
+        received = q.get_message()
+        assert received and received[0] == queue_name and received[1].msg_id == 1
+        mock_con.return_value.subscribe.return_value.batch_receive.assert_not_called()
+
+    def test_ack_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test acking a batch of messages, individually."""
+        q = self.backend.create_sub_queue("localhost", queue_name)
+        q.ack_messages([12, 13, 14])
+        assert self._get_mock_ack(mock_con).call_args_list == [call(12), call(13), call(14)]
+        mock_con.return_value.subscribe.return_value.acknowledge_cumulative.assert_not_called()
+
+    def test_message_generator_ack_batch(self, mock_con: Any, queue_name: str) -> None:
+        """Test message generator acking in batches."""
+        q = self.backend.create_sub_queue("localhost", queue_name)
+        self._enqueue_mock_messages(mock_con, [b'a', b'b', b'c'], [1, 2, 3])
+
+        ack = self._get_mock_ack(mock_con)
+        for msg in q.message_generator(ack_batch_size=2):
+            assert msg is not None
+            if msg.msg_id == 2:
+                ack.assert_not_called()
+            if msg.msg_id == 3:
+                assert ack.call_args_list == [call(1), call(2)]
+
+        assert ack.call_args_list == [call(1), call(2), call(3)]
+        self._get_mock_close(mock_con).assert_called()
+
+    def test_share_connections(self, mock_con: Any, queue_name: str) -> None:
+        """Test sharing one pooled client, with a producer/consumer per queue."""
+        backend = apachepulsar.Backend(share_connections=True)
+        pub = backend.create_pub_queue("localhost", queue_name)
+        sub = backend.create_sub_queue("localhost", queue_name)
+        mock_con.assert_called_once()
+
+        pub.close()
+        mock_con.return_value.create_producer.return_value.close.assert_called()
+        mock_con.return_value.close.assert_not_called()
+        sub.close()
+        mock_con.return_value.subscribe.return_value.close.assert_called()
+        mock_con.return_value.close.assert_called_once()
+
     def test_message_generator_upstream_error(self, mock_con: Any, queue_name: str) -> None:
         """Failure-test message generator.
 
@@ -89,3 +190,42 @@ class TestUnitApachePulsar(BackendUnitTest):
         with pytest.raises(Exception):
             _ = list(q.message_generator(propagate_error=False))
         self._get_mock_close(mock_con).assert_called()
+
+
+class TestUnitAsyncApachePulsar:
+    """Unit test suite for the asyncio Apache Pulsar backend."""
+
+    backend = apachepulsar.AsyncBackend()
+
+    @pytest.fixture  # type: ignore
+    def mock_con(self, mocker: Any) -> Any:
+        """Patch mock_con."""
+        return mocker.patch('pulsar.Client')
+
+    @pytest.mark.asyncio  # type: ignore
+    async def test_send_messages(self, mock_con: Any) -> None:
+        """Test sending messages."""
+        q = await self.backend.create_pub_queue("localhost", "foo")
+        producer = mock_con.return_value.create_producer.return_value
+        producer.send_async.side_effect = lambda msg, callback: callback(pulsar.Result.Ok, None)
+        await q.send_messages([b"foo", b"bar"])
+        await q.send_message(b"baz")
+        producer.send_async.assert_called_with(b"baz", unittest.mock.ANY)
+        assert producer.send_async.call_count == 3
+
+        producer.send_async.side_effect = lambda msg, callback: callback(pulsar.Result.Timeout, None)
+        with pytest.raises(Exception):
+            await q.send_message(b"foo")
+
+    @pytest.mark.asyncio  # type: ignore
+    async def test_message_generator(self, mock_con: Any) -> None:
+        """Test message generator."""
+        q = await self.backend.create_sub_queue("localhost", "foo")
+        consumer = mock_con.return_value.subscribe.return_value
+        consumer.receive.return_value.data.side_effect = [b'foo', b'bar', None]
+        consumer.receive.return_value.message_id.side_effect = [1, 2, None]
+
+        msgs = [m async for m in q.message_generator()]
+        assert [m.data for m in msgs if m] == [b'foo', b'bar']
+        consumer.acknowledge.assert_called_with(2)
+        mock_con.return_value.close.assert_called()
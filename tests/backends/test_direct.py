@@ -0,0 +1,157 @@
+"""Unit Tests for the direct-socket (brokerless) backend."""
+
+import os
+import socket
+import tempfile
+import threading
+import uuid
+from typing import List
+from unittest.mock import MagicMock
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import direct, queuestore
+
+
+def _address() -> str:
+    """Get a free local TCP address."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f'tcp://127.0.0.1:{s.getsockname()[1]}'
+
+
+def test_parse_address() -> None:
+    """Test the accepted address formats."""
+    assert direct._parse_address('localhost')[2] == f'tcp://localhost:{direct.DEFAULT_PORT}'  # pylint: disable=W0212
+    assert direct._parse_address('tcp://host:1234')[1:] == (('host', 1234), 'tcp://host:1234')  # pylint: disable=W0212
+    assert direct._parse_address('ipc:///tmp/q.sock')[1] == '/tmp/q.sock'  # pylint: disable=W0212
+    assert direct._parse_address('tcp://:1234')[1] == ('localhost', 1234)  # pylint: disable=W0212
+
+
+def test_send_recv() -> None:
+    """Test sending, acking and rejecting over TCP."""
+    address, name = _address(), uuid.uuid4().hex
+    pub = direct.Backend().create_pub_queue(address, name)
+    pub.send_messages([b'0', b'1', b'2'])
+
+    sub = direct.Backend().create_sub_queue(address, name, prefetch=2)
+    msgs = sub.get_messages(3, timeout_millis=1000)
+    assert [bytes(m.data) for m in msgs] == [b'0', b'1']  # limited by prefetch
+    sub.reject_message(msgs[0].msg_id)
+    sub.ack_message(msgs[1].msg_id)
+
+    msgs = sub.get_messages(2, timeout_millis=1000)
+    assert [bytes(m.data) for m in msgs] == [b'0', b'2']  # rejected message is requeued first
+    sub.ack_messages([m.msg_id for m in msgs])
+    assert sub.get_message(timeout_millis=100) is None
+    sub.close()
+
+
+def test_close_requeues_unacked() -> None:
+    """Test that a disconnected subscriber's un-acked messages go to others."""
+    address, name = _address(), uuid.uuid4().hex
+    direct.Backend().create_pub_queue(address, name).send_messages([b'0', b'1'])
+
+    sub_0 = direct.Backend().create_sub_queue(address, name, prefetch=2)
+    assert sub_0.get_message(timeout_millis=1000)
+    sub_0.close()
+
+    sub_1 = direct.Backend().create_sub_queue(address, name, prefetch=2)
+    msgs = sub_1.get_messages(2, timeout_millis=1000)
+    assert sorted(bytes(m.data) for m in msgs) == [b'0', b'1']
+
+
+def test_competing_consumers() -> None:
+    """Test that messages are load-balanced among subscribers, each once."""
+    address, name = _address(), uuid.uuid4().hex
+    pub = direct.Backend().create_pub_queue(address, name)
+    data = [str(i).encode() for i in range(500)]
+    received = []  # type: List[bytes]
+    lock = threading.Lock()
+
+    def consume() -> None:
+        sub = direct.Backend().create_sub_queue(address, name, prefetch=10)
+        while True:
+            msg = sub.get_message(timeout_millis=300)
+            if not msg:
+                break
+            sub.ack_message(msg.msg_id)
+            with lock:
+                received.append(bytes(msg.data))
+        sub.close()
+
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for t in threads:
+        t.start()
+    pub.send_messages(data)
+    for t in threads:
+        t.join()
+
+    assert sorted(received) == sorted(data)
+
+
+def test_queue_ipc() -> None:
+    """Test a `Queue` over a Unix socket."""
+    path = os.path.join(tempfile.mkdtemp(), 'q.sock')
+    q = Queue(direct.Backend(), address=f'ipc://{path}')
+    q.send_many(range(10))
+
+    with q.recv(timeout=1) as stream:
+        assert list(stream) == list(range(10))
+
+
+def test_settle_unknown_returns_no_credit() -> None:
+    """Test that only a successful ack/nack returns the subscriber's credit."""
+    queue = queuestore.get_queue('direct-test', uuid.uuid4().hex)
+    queue.publish([b'0'])
+    consumer = direct._Consumer(queue, MagicMock(), prefetch=2)  # pylint: disable=W0212
+    msg = queue.deliver(consumer.consumer_id, 0, 1, 0)[0]
+    consumer.outstanding = 1
+
+    consumer.settle(int(msg.msg_id), requeue=False)
+    assert consumer.outstanding == 0
+    consumer.settle(int(msg.msg_id), requeue=False)  # duplicate
+    consumer.settle(12345, requeue=True)  # unknown
+    assert consumer.outstanding == 0
+
+
+def test_bad_frame_drops_connection() -> None:
+    """Test that the server drops a subscriber sending anything but acks/nacks."""
+    address, name = _address(), uuid.uuid4().hex
+    direct.Backend().create_pub_queue(address, name)
+
+    with socket.create_connection(direct._parse_address(address)[1]) as sock:  # pylint: disable=W0212
+        sock.sendall(direct._frame(direct.SUBSCRIBE, 1, name.encode()))  # pylint: disable=W0212
+        sock.sendall(direct._frame(direct.SUBSCRIBE, 1, b'garbage'))  # pylint: disable=W0212
+        sock.settimeout(5)
+        assert sock.recv(65536) == b''
+
+
+def test_stale_ipc_socket() -> None:
+    """Test that a socket left by a dead server is replaced."""
+    path = os.path.join(tempfile.mkdtemp(), 'q.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(path)
+
+    q = Queue(direct.Backend(), address=f'ipc://{path}')
+    q.send(1)
+    assert os.stat(path).st_mode & 0o777 == 0o600  # owner only
+    with q.recv_one() as data:
+        assert data == 1
+
+
+def test_generator_releases_buffer() -> None:
+    """Test that a message generator's prefetched messages are released when it ends."""
+    address, name = _address(), uuid.uuid4().hex
+    direct.Backend().create_pub_queue(address, name).send_messages([b'0', b'1', b'2'])
+
+    sub_0 = direct.Backend().create_sub_queue(address, name, prefetch=3)
+    gen = sub_0.message_generator(timeout=1)
+    msg = next(gen)
+    assert msg and bytes(msg.data) == b'0'
+    gen.close()
+
+    sub_1 = direct.Backend().create_sub_queue(address, name, prefetch=3)
+    msgs = sub_1.get_messages(2, timeout_millis=1000)
+    assert [bytes(m.data) for m in msgs] == [b'1', b'2']
+    assert sub_0.get_message(timeout_millis=100) is None  # reconnected
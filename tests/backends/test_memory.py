@@ -0,0 +1,138 @@
+"""Unit Tests for the in-memory backend."""
+
+import threading
+import uuid
+from typing import List
+
+# local imports
+from MQClient.backend_interface import Message
+from MQClient.backends import memory
+
+
+def _name() -> str:
+    return uuid.uuid4().hex
+
+
+def test_prefetch_reserves_messages() -> None:
+    """Test that a subscriber's prefetched messages aren't given to others."""
+    name = _name()
+    pub = memory.Backend().create_pub_queue('localhost', name)
+    pub.send_messages([b'0', b'1', b'2', b'3'])
+
+    sub_0 = memory.Backend().create_sub_queue('localhost', name, prefetch=2)
+    sub_1 = memory.Backend().create_sub_queue('localhost', name, prefetch=2)
+
+    assert sub_0.get_message() == Message(0, b'0')  # reserves 1 & 2
+    assert sub_1.get_messages(2, timeout_millis=0) == [Message(0, b'3')]
+    assert sub_0.get_messages(2, timeout_millis=0) == [Message(0, b'1'), Message(0, b'2')]
+
+
+def test_reject_redelivers_in_order() -> None:
+    """Test that a rejected message is requeued ahead of reserved ones."""
+    name = _name()
+    pub = memory.Backend().create_pub_queue('localhost', name)
+    pub.send_messages([b'0', b'1', b'2'])
+
+    sub = memory.Backend().create_sub_queue('localhost', name, prefetch=2)
+    msg = sub.get_message()
+    assert msg
+    sub.reject_message(msg.msg_id)
+
+    redelivered = sub.get_message()
+    assert redelivered == msg
+    assert redelivered.msg_id != msg.msg_id  # type: ignore
+    assert sub.get_messages(2, timeout_millis=0) == [Message(0, b'1'), Message(0, b'2')]
+
+
+def test_close_requeues_unacked() -> None:
+    """Test that closing a subscriber requeues its un-acked messages."""
+    name = _name()
+    pub = memory.Backend().create_pub_queue('localhost', name)
+    pub.send_messages([b'0', b'1', b'2'])
+
+    sub_0 = memory.Backend().create_sub_queue('localhost', name, prefetch=2)
+    msg = sub_0.get_message()
+    assert msg
+    sub_0.ack_message(msg.msg_id)
+    sub_0.get_message()
+    sub_0.close()
+
+    sub_1 = memory.Backend().create_sub_queue('localhost', name)
+    assert sub_1.get_messages(3, timeout_millis=0) == [Message(0, b'1'), Message(0, b'2')]
+
+
+def test_competing_consumers() -> None:
+    """Test that concurrent subscribers each get a distinct share of messages."""
+    name = _name()
+    pub = memory.Backend().create_pub_queue('localhost', name)
+    data = [str(i).encode() for i in range(1000)]
+    received = []  # type: List[bytes]
+    lock = threading.Lock()
+
+    def consume() -> None:
+        sub = memory.Backend().create_sub_queue('localhost', name, prefetch=10)
+        while True:
+            msg = sub.get_message(timeout_millis=200)
+            if not msg:
+                break
+            sub.ack_message(msg.msg_id)
+            with lock:
+                received.append(bytes(msg.data))
+        sub.close()
+
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for t in threads:
+        t.start()
+    pub.send_messages(data)
+    for t in threads:
+        t.join()
+
+    assert sorted(received) == sorted(data)
+
+
+def test_multi_sub() -> None:
+    """Test that a multi-queue subscriber receives from each queue, with acks and rejects."""
+    names = [_name(), _name()]
+    for i, name in enumerate(names):
+        memory.Backend().create_pub_queue('localhost', name).send_messages([b'%d' % i])
+
+    sub = memory.Backend().create_multi_sub_queue('localhost', names, prefetch=2)
+    received = [sub.get_message(timeout_millis=0) for _ in range(2)]
+    assert {name: bytes(msg.data) for name, msg in received if msg} == {names[0]: b'0', names[1]: b'1'}  # type: ignore
+    assert sub.get_message(timeout_millis=0) is None
+
+    for name, msg in received:  # type: ignore
+        sub.reject_message(name, msg.msg_id)
+    sub.close()
+
+    sub = memory.Backend().create_multi_sub_queue('localhost', names[1:])
+    picked = sub.get_message(timeout_millis=0)
+    assert picked and bytes(picked[1].data) == b'1'
+    sub.ack_message(picked[0], picked[1].msg_id)
+    assert sub.get_message(timeout_millis=0) is None
+
+
+def test_multi_sub_waits() -> None:
+    """Test that a multi-queue subscriber wakes up for any queue's message."""
+    names = [_name(), _name()]
+    sub = memory.Backend().create_multi_sub_queue('localhost', names)
+
+    pub = memory.Backend().create_pub_queue('localhost', names[1])
+    timer = threading.Timer(0.1, lambda: pub.send_messages([b'x']))
+    timer.start()
+    picked = sub.get_message(timeout_millis=5000)
+    timer.join()
+    assert picked and picked[0] == names[1]
+
+
+def test_fan_out_pub() -> None:
+    """Test that a fan-out publisher sends each message to every queue."""
+    names = [_name(), _name()]
+    pub = memory.Backend().create_fan_out_pub_queue('localhost', names)
+    pub.send_message(b'0')
+    pub.send_messages([b'1', b'2'])
+
+    for name in names:
+        sub = memory.Backend().create_sub_queue('localhost', name)
+        msgs = sub.get_messages(5, timeout_millis=0)
+        assert [bytes(msg.data) for msg in msgs] == [b'0', b'1', b'2']
@@ -0,0 +1,72 @@
+"""Unit Tests for the connection pool."""
+
+import threading
+from typing import Any, List
+from unittest.mock import MagicMock
+
+# local imports
+from MQClient.backends.pool import ConnectionPool
+
+
+def test_acquire_release() -> None:
+    """Test that connections are shared, and closed by the last release."""
+    connect, close = MagicMock(side_effect=lambda a: MagicMock(address=a)), MagicMock()
+    pool = ConnectionPool(connect, close)
+
+    con_a = pool.acquire('a')
+    assert pool.acquire('a') is con_a
+    con_b = pool.acquire('b')
+    assert con_b is not con_a
+    assert connect.call_count == 2
+    assert pool.refcount(con_a) == 2
+
+    pool.release('a', con_a)
+    close.assert_not_called()
+    pool.release('a', con_a)
+    close.assert_called_once_with(con_a)
+    assert pool.refcount(con_a) == 0
+
+    # a new connection is made after the last release
+    assert pool.acquire('a') is not con_a
+
+
+def test_dead_connection() -> None:
+    """Test that a dead connection is replaced, but not closed under its users."""
+    connect, close = MagicMock(side_effect=lambda a: MagicMock(alive=True)), MagicMock()
+    pool = ConnectionPool(connect, close, is_alive=lambda c: c.alive)
+
+    con_0 = pool.acquire('a')
+    con_0.alive = False
+    con_1 = pool.acquire('a')
+    assert con_1 is not con_0
+
+    pool.release('a', con_0)
+    close.assert_called_once_with(con_0)
+    assert pool.acquire('a') is con_1
+
+    pool.discard('a', con_1)
+    assert pool.acquire('a') is not con_1
+
+
+def test_per_thread() -> None:
+    """Test that per-thread pools don't share connections across threads."""
+    pool = ConnectionPool(lambda a: MagicMock(), MagicMock(), per_thread=True)
+    cons = []  # type: List[Any]
+    lock = threading.Lock()
+    barrier = threading.Barrier(2)  # keep both threads alive, so their idents differ
+
+    def acquire() -> None:
+        with lock:
+            cons.append(pool.acquire('a'))
+            cons.append(pool.acquire('a'))
+        barrier.wait()
+
+    threads = [threading.Thread(target=acquire) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert cons[0] is cons[1]
+    assert cons[2] is cons[3]
+    assert cons[0] is not cons[2]
@@ -1,9 +1,11 @@
 """Unit Tests for RabbitMQ/Pika Backend."""
 
+import asyncio
 import unittest
 from typing import Any, List
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, call
 
+import pika  # type: ignore
 import pytest  # type: ignore
 
 # local imports
@@ -67,15 +69,172 @@ class TestUnitRabbitMQ(BackendUnitTest):
             body=b'foo, bar, baz',
         )
 
+    def test_send_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test sending a batch of messages."""
+        q = self.backend.create_pub_queue("localhost", queue_name)
+        impl = mock_con.return_value.channel.return_value._impl  # pylint: disable=W0212
+
+        def process_data_events(**kwargs: Any) -> None:
+            if not impl.basic_publish.called:  # confirm mode selected
+                impl.confirm_delivery.call_args[1]['callback'](MagicMock())
+                return
+            method = pika.spec.Basic.Ack(delivery_tag=impl.basic_publish.call_count, multiple=True)
+            impl.confirm_delivery.call_args[0][0](MagicMock(method=method))
+
+        mock_con.return_value.process_data_events.side_effect = process_data_events
+        q.send_messages([b"foo", b"bar", b"baz"])
+        assert impl.basic_publish.call_count == 3
+        impl.basic_publish.assert_called_with('', queue_name, b'baz')
+        assert mock_con.return_value.process_data_events.call_count == 2  # confirm.select, then all 3 acks
+        assert not q._unconfirmed  # type: ignore  # pylint: disable=W0212
+
+    def test_send_messages_nack(self, mock_con: Any, queue_name: str) -> None:
+        """Test that a batch with a nacked message raises."""
+        q = self.backend.create_pub_queue("localhost", queue_name)
+        impl = mock_con.return_value.channel.return_value._impl  # pylint: disable=W0212
+
+        def process_data_events(**kwargs: Any) -> None:
+            if not impl.basic_publish.called:
+                impl.confirm_delivery.call_args[1]['callback'](MagicMock())
+                return
+            on_confirm = impl.confirm_delivery.call_args[0][0]
+            on_confirm(MagicMock(method=pika.spec.Basic.Ack(delivery_tag=1, multiple=False)))
+            on_confirm(MagicMock(method=pika.spec.Basic.Nack(delivery_tag=2, multiple=False)))
+
+        mock_con.return_value.process_data_events.side_effect = process_data_events
+        with pytest.raises(Exception, match='nack'):
+            q.send_messages([b"foo", b"bar"])
+
     def test_get_message(self, mock_con: Any, queue_name: str) -> None:
-        """Test getting message."""
-        q = self.backend.create_sub_queue("localhost", queue_name)
-        fake_message = (MagicMock(delivery_tag=12), None, b'foo, bar')
-        mock_con.return_value.channel.return_value.basic_get.return_value = fake_message
+        """Test getting message, pushed into the consumer's buffer."""
+        q = self.backend.create_sub_queue("localhost", queue_name, prefetch=2)
+        channel = mock_con.return_value.channel.return_value
+
+        def push(*args: Any, **kwargs: Any) -> None:
+            on_message = channel.basic_consume.call_args[0][1]
+            on_message(channel, MagicMock(delivery_tag=12), None, b'foo, bar')
+            on_message(channel, MagicMock(delivery_tag=13), None, b'baz')
+            mock_con.return_value.process_data_events.side_effect = None
+
+        mock_con.return_value.process_data_events.side_effect = push
         m = q.get_message()
         assert m is not None
         assert m.msg_id == 12
         assert m.data == b'foo, bar'
+        channel.basic_consume.assert_called_once()
+        channel.basic_get.assert_not_called()
+
+        # drained from buffer
+        m = q.get_message(timeout_millis=0)
+        assert m is not None
+        assert m.msg_id == 13
+
+        # timeout
+        q.ack_message(12)
+        assert q.get_message(timeout_millis=10) is None
+        mock_con.return_value.process_data_events.assert_called()
+        channel.basic_get.assert_not_called()
+
+        # blocked by prefetch (2 un-acked), so get directly
+        channel.basic_consume.call_args[0][1](channel, MagicMock(delivery_tag=14), None, b'baz')
+        assert q.get_message(timeout_millis=0) is not None
+        channel.basic_get.return_value = (MagicMock(delivery_tag=15), None, b'baz')
+        m = q.get_message(timeout_millis=0)
+        assert m is not None
+        assert m.msg_id == 15
+        channel.basic_get.assert_called_once_with(queue_name)
+
+    def test_ack_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test acking a batch of messages, with one cumulative ack."""
+        q = self.backend.create_sub_queue("localhost", queue_name)
+        q.ack_messages([12, 14, 13])
+        self._get_mock_ack(mock_con).assert_called_once_with(14, multiple=True)
+
+        q.ack_messages([15])
+        self._get_mock_ack(mock_con).assert_called_with(15)
+
+    def test_message_generator_ack_batch(self, mock_con: Any, queue_name: str) -> None:
+        """Test message generator acking in batches, capped at prefetch."""
+        q = self.backend.create_sub_queue("localhost", queue_name, prefetch=3)
+        self._enqueue_mock_messages(mock_con, [b'a', b'b', b'c', b'd', b'e'], [1, 2, 3, 4, 5])
+
+        assert len(list(q.message_generator(ack_batch_size=10))) == 5
+        acks = [call(3, multiple=True), call(5, multiple=True)]
+        assert self._get_mock_ack(mock_con).call_args_list == acks
+        self._get_mock_close(mock_con).assert_called()
+
+    def test_message_generator_ack_batch_then_reject(self, mock_con: Any, queue_name: str) -> None:
+        """Test message generator acking its pending batch before a reject."""
+        q = self.backend.create_sub_queue("localhost", queue_name, prefetch=10)
+        self._enqueue_mock_messages(mock_con, [b'a', b'b', b'c'], [1, 2, 3])
+
+        gen = q.message_generator(ack_batch_size=10)
+        for msg in gen:
+            assert msg is not None
+            if msg.msg_id == 3:
+                with pytest.raises(ValueError):
+                    gen.throw(ValueError('oops'))
+                break
+
+        self._get_mock_ack(mock_con).assert_called_once_with(2, multiple=True)
+        self._get_mock_nack(mock_con).assert_called_once_with(3)
+
+    def test_get_messages(self, mock_con: Any, queue_name: str) -> None:
+        """Test getting a batch of messages, capped at prefetch."""
+        q = self.backend.create_sub_queue("localhost", queue_name, prefetch=2)
+        channel = mock_con.return_value.channel.return_value
+
+        def push(*args: Any, **kwargs: Any) -> None:
+            on_message = channel.basic_consume.call_args[0][1]
+            for i in range(len(q._buffer), 2):  # pylint: disable=W0212
+                on_message(channel, MagicMock(delivery_tag=i), None, b'foo')
+
+        mock_con.return_value.process_data_events.side_effect = push
+        msgs = q.get_messages(5, timeout_millis=10)
+        assert [m.msg_id for m in msgs] == [0, 1]
+        mock_con.return_value.process_data_events.assert_called_once()
+
+        # blocked by prefetch (2 un-acked), so get directly
+        channel.basic_get.side_effect = [(MagicMock(delivery_tag=2), None, b'bar'), (None, None, None)]
+        msgs = q.get_messages(5, timeout_millis=10)
+        assert [m.msg_id for m in msgs] == [2]
+        mock_con.return_value.process_data_events.assert_called_once()
+
+        q.ack_messages([0, 1])
+        mock_con.return_value.process_data_events.side_effect = None
+        assert not q.get_messages(5, timeout_millis=10)
+
+    def test_get_message_then_message_generator(self, mock_con: Any, queue_name: str) -> None:
+        """Test that message_generator() requeues get_message()'s buffered messages."""
+        q = self.backend.create_sub_queue("localhost", queue_name, prefetch=2)
+        channel = mock_con.return_value.channel.return_value
+
+        def push(*args: Any, **kwargs: Any) -> None:
+            on_message = channel.basic_consume.call_args[0][1]
+            on_message(channel, MagicMock(delivery_tag=12), None, b'foo')
+            on_message(channel, MagicMock(delivery_tag=13), None, b'bar')
+
+        mock_con.return_value.process_data_events.side_effect = push
+        assert q.get_message() is not None
+        self._enqueue_mock_messages(mock_con, [], [])
+        assert not list(q.message_generator())
+        channel.basic_cancel.assert_called_with(channel.basic_consume.return_value)
+        channel.basic_nack.assert_called_once_with(13)
+
+    def test_share_connections(self, mock_con: Any, queue_name: str) -> None:
+        """Test sharing one pooled connection, with a channel per queue."""
+        mock_con.return_value.is_closed = False
+        backend = rabbitmq.Backend(share_connections=True)
+        pub = backend.create_pub_queue("localhost", queue_name)
+        sub = backend.create_sub_queue("localhost", queue_name)
+        mock_con.assert_called_once()
+        assert mock_con.return_value.channel.call_count == 2
+
+        pub.close()
+        mock_con.return_value.channel.return_value.close.assert_called()
+        mock_con.return_value.close.assert_not_called()
+        sub.close()
+        mock_con.return_value.close.assert_called_once()
 
     def test_message_generator_upstream_error(self, mock_con: Any, queue_name: str) -> None:
         """Failure-test message generator.
@@ -97,3 +256,64 @@ class TestUnitRabbitMQ(BackendUnitTest):
         with pytest.raises(Exception):
             _ = list(q.message_generator(propagate_error=False))
         self._get_mock_close(mock_con).assert_called()
+
+
+class TestUnitAsyncRabbitMQ:
+    """Unit test suite for the asyncio RabbitMQ backend."""
+
+    backend = rabbitmq.AsyncBackend()
+
+    @pytest.fixture  # type: ignore
+    def mock_con(self, mocker: Any) -> Any:
+        """Patch mock_con, calling back on each channel/connection RPC."""
+
+        def open_connection(*args: Any, on_open_callback: Any, on_close_callback: Any, **kwargs: Any) -> Any:
+            mock.return_value.close.side_effect = lambda: on_close_callback(mock.return_value, None)
+            on_open_callback(mock.return_value)
+            return mock.return_value
+
+        def rpc(*args: Any, callback: Any = None, **kwargs: Any) -> None:
+            callback(None)
+
+        mock = mocker.patch('MQClient.backends.rabbitmq.AsyncioConnection')
+        mock.side_effect = open_connection
+        mock.return_value.is_closed = False
+        mock.return_value.is_closing = False
+        channel = MagicMock()
+        mock.return_value.channel.side_effect = lambda on_open_callback: on_open_callback(channel)
+        mock.return_value.channel.return_value = channel
+        for method in ['queue_declare', 'confirm_delivery', 'basic_qos']:
+            getattr(channel, method).side_effect = rpc
+        return mock
+
+    @pytest.mark.asyncio  # type: ignore
+    async def test_send_messages(self, mock_con: Any) -> None:
+        """Test sending messages, and waiting on their confirmations."""
+        q = await self.backend.create_pub_queue("localhost", "foo")
+        channel = mock_con.return_value.channel.return_value
+        on_confirm = channel.confirm_delivery.call_args[0][0]
+
+        def confirm(*args: Any, **kwargs: Any) -> None:
+            tag = channel.basic_publish.call_count
+            method = pika.spec.Basic.Ack(delivery_tag=tag, multiple=False)
+            asyncio.get_running_loop().call_soon(on_confirm, MagicMock(method=method))
+
+        channel.basic_publish.side_effect = confirm
+        await q.send_messages([b"foo", b"bar"])
+        channel.basic_publish.assert_called_with(exchange='', routing_key="foo", body=b"bar")
+        assert not q._unconfirmed  # pylint: disable=W0212
+
+    @pytest.mark.asyncio  # type: ignore
+    async def test_message_generator(self, mock_con: Any) -> None:
+        """Test message generator, fed by the consumer's buffer."""
+        q = await self.backend.create_sub_queue("localhost", "foo", prefetch=7)
+        channel = mock_con.return_value.channel.return_value
+        channel.basic_qos.assert_called_with(prefetch_count=7, global_qos=True, callback=unittest.mock.ANY)
+        on_message = channel.basic_consume.call_args[0][1]
+        for i, body in enumerate([b'foo', b'bar']):
+            on_message(channel, MagicMock(delivery_tag=i), None, body)
+
+        msgs = [m async for m in q.message_generator(timeout=0)]
+        assert [m.data for m in msgs if m] == [b'foo', b'bar']
+        channel.basic_ack.assert_called_with(1)
+        mock_con.return_value.close.assert_called()
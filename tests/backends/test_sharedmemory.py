@@ -0,0 +1,162 @@
+"""Unit Tests for the shared-memory ring-buffer backend."""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import uuid
+from typing import Iterator, Tuple
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import sharedmemory
+
+
+@pytest.fixture
+def queue_name() -> Iterator[Tuple[str, str]]:
+    """Get a new queue's address and name, and remove its segment afterwards."""
+    address, name = 'localhost', uuid.uuid4().hex
+    yield address, name
+    sharedmemory.unlink(address, name)
+
+
+def test_send_recv(queue_name: Tuple[str, str]) -> None:
+    """Test sending, acking and rejecting."""
+    pub = sharedmemory.Backend().create_pub_queue(*queue_name)
+    pub.send_messages([b'0', b'1', b'2'])
+
+    sub = sharedmemory.Backend().create_sub_queue(*queue_name)
+    msgs = sub.get_messages(2, timeout_millis=0)
+    assert [m.data for m in msgs] == [b'0', b'1']
+    sub.reject_message(msgs[0].msg_id)
+    sub.ack_message(msgs[1].msg_id)
+    with pytest.raises(Exception):
+        sub.ack_message(msgs[1].msg_id)
+
+    msgs = sub.get_messages(3, timeout_millis=0)
+    assert [m.data for m in msgs] == [b'0', b'2']  # rejected message is redelivered first
+    sub.ack_messages([m.msg_id for m in msgs])
+    assert sub.get_message(timeout_millis=10) is None
+    sub.close()
+    pub.close()
+
+
+def test_close_requeues_unacked(queue_name: Tuple[str, str]) -> None:
+    """Test that a closed subscriber's un-acked messages go to others."""
+    sharedmemory.Backend().create_pub_queue(*queue_name).send_messages([b'0', b'1'])
+
+    sub_0 = sharedmemory.Backend().create_sub_queue(*queue_name)
+    assert sub_0.get_message(timeout_millis=0)
+    sub_1 = sharedmemory.Backend().create_sub_queue(*queue_name)
+    assert sub_1.get_message(timeout_millis=0).data == b'1'  # type: ignore
+    sub_0.close()
+    assert sub_1.get_message(timeout_millis=0).data == b'0'  # type: ignore
+
+
+def test_wrap_around_and_full(queue_name: Tuple[str, str]) -> None:
+    """Test that acked space is reused, and that a full queue times out."""
+    backend = sharedmemory.Backend(size=1024, send_timeout=0.1)
+    pub = backend.create_pub_queue(*queue_name)
+    sub = backend.create_sub_queue(*queue_name)
+    for i in range(100):
+        pub.send_message(bytes([i]) * (50 + i))
+        msg = sub.get_message(timeout_millis=0)
+        assert msg and msg.data == bytes([i]) * (50 + i)
+        sub.ack_message(msg.msg_id)
+
+    pub.send_messages([b'x' * 400] * 2)
+    with pytest.raises(TimeoutError):
+        pub.send_message(b'x' * 400)
+    with pytest.raises(ValueError):
+        pub.send_message(b'x' * 2048)
+
+
+def _consume_and_die(address: str, name: str) -> None:
+    sub = sharedmemory.Backend().create_sub_queue(address, name)
+    assert sub.get_message(timeout_millis=1000)
+    os._exit(0)  # without acking, or closing  # pylint: disable=W0212
+
+
+def test_dead_subscriber(queue_name: Tuple[str, str]) -> None:
+    """Test that a dead process's un-acked messages are redelivered."""
+    sharedmemory.Backend().create_pub_queue(*queue_name).send_message(b'0')
+    proc = multiprocessing.get_context('fork').Process(target=_consume_and_die, args=queue_name)
+    proc.start()
+    proc.join()
+
+    sub = sharedmemory.Backend().create_sub_queue(*queue_name)
+    msg = sub.get_message(timeout_millis=0)
+    assert msg and msg.data == b'0'
+
+
+def _publish_and_die(address: str, name: str) -> None:
+    pub = sharedmemory.Backend().create_pub_queue(address, name)
+    pub.ring._set_record = lambda *args: os._exit(0)  # type: ignore  # die before marking it ready
+    pub.send_message(b'lost')
+
+
+def test_dead_publisher(queue_name: Tuple[str, str]) -> None:
+    """Test that a message left half-written by a dead process is dropped."""
+    proc = multiprocessing.get_context('fork').Process(target=_publish_and_die, args=queue_name)
+    proc.start()
+    proc.join()
+    pub = sharedmemory.Backend().create_pub_queue(*queue_name)
+    pub.send_message(b'0')
+
+    sub = sharedmemory.Backend().create_sub_queue(*queue_name)
+    msg = sub.get_message(timeout_millis=0)
+    assert msg and msg.data == b'0'
+    sub.ack_message(msg.msg_id)
+    head, tail, _ = sub.ring._state()  # type: ignore  # pylint: disable=W0212
+    assert head == tail  # the dead publisher's space is reclaimed
+
+
+def test_read_cursor(queue_name: Tuple[str, str]) -> None:
+    """Test that delivered messages aren't rescanned, unless requeued."""
+    pub = sharedmemory.Backend().create_pub_queue(*queue_name)
+    pub.send_messages([bytes([i]) for i in range(10)])
+    sub = sharedmemory.Backend().create_sub_queue(*queue_name)
+    ring = sub.ring
+    assert ring
+
+    msgs = sub.get_messages(10, timeout_millis=0)
+    head, tail, _ = ring._state()  # pylint: disable=W0212
+    assert ring._cursor(tail) == head  # pylint: disable=W0212
+
+    sub.reject_message(msgs[5].msg_id)
+    assert ring._cursor(tail) < head  # pylint: disable=W0212
+    msg = sub.get_message(timeout_millis=0)
+    assert msg and msg.data == bytes([5])
+    assert ring._cursor(tail) == head  # pylint: disable=W0212
+
+    sub.close()  # requeues all
+    sub = sharedmemory.Backend().create_sub_queue(*queue_name)
+    assert [m.data for m in sub.get_messages(10, timeout_millis=0)] == [bytes([i]) for i in range(10)]
+
+
+def _produce(address: str, name: str) -> None:
+    Queue(sharedmemory.Backend(), address=address, name=name).send_many(range(100))
+
+
+def test_queue_across_processes(queue_name: Tuple[str, str]) -> None:
+    """Test a `Queue` between processes, with a (suppressed) consumer error."""
+    proc = multiprocessing.get_context('fork').Process(target=_produce, args=queue_name)
+    proc.start()
+    proc.join()
+
+    q = Queue(sharedmemory.Backend(), address=queue_name[0], name=queue_name[1])
+    with q.recv(timeout=1) as stream:
+        for data in stream:
+            if data == 50:
+                raise ValueError()
+    with q.recv(timeout=0) as stream:
+        assert list(stream) == list(range(50, 100))
+
+
+def test_optional() -> None:
+    """Test that MQClient imports without this backend's dependencies (e.g. on Windows)."""
+    code = ("import sys; sys.modules['fcntl'] = None; import MQClient; "
+            "assert not hasattr(MQClient.backends, 'sharedmemory') and 'sharedmemory' not in MQClient.backends.__all__")
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -1,5 +1,8 @@
 """Unit test the backend interface."""
 
+import time
+from unittest.mock import MagicMock
+
 # local imports
 from MQClient import backend_interface
 
@@ -14,3 +17,66 @@ def test_Message() -> None:
     m = backend_interface.Message('foo', b'abc')
     assert m.msg_id == 'foo'
     assert m.data == b'abc'
+    assert repr(m) == "Message(msg_id='foo', data=b'abc')"
+
+    # large payloads are truncated
+    m = backend_interface.Message(1, b'x' * 10**6)
+    assert repr(m) == f"Message(msg_id=1, data={b'x' * backend_interface.REPR_DATA_LIMIT!r}... (1000000 bytes))"
+
+    # any bytes-like payload
+    buf = bytearray(b'abc')
+    m = backend_interface.Message(0, memoryview(buf))
+    assert m.data.obj is buf  # type: ignore
+    assert m == backend_interface.Message(1, b'abc')
+    assert repr(m) == "Message(msg_id=0, data=b'abc')"
+    assert not hasattr(m, '__dict__')
+
+
+def test_AckBatcher() -> None:
+    """Test AckBatcher flushing by size, and on demand."""
+    sub = MagicMock()
+    acker = backend_interface.AckBatcher(sub, batch_size=3)
+    acker.add(1)
+    acker.add(2)
+    sub.ack_messages.assert_not_called()
+    acker.add(3)
+    sub.ack_messages.assert_called_once_with([1, 2, 3])
+
+    acker.add(4)
+    acker.flush()
+    sub.ack_messages.assert_called_with([4])
+    acker.flush()  # nothing pending
+    assert sub.ack_messages.call_count == 2
+
+
+def test_AckBatcher_interval() -> None:
+    """Test AckBatcher flushing once the oldest pending ack is too old."""
+    sub = MagicMock()
+    acker = backend_interface.AckBatcher(sub, batch_size=100, interval=0.05)
+    acker.add(1)
+    time.sleep(0.05)
+    acker.add(2)
+    sub.ack_messages.assert_called_once_with([1, 2])
+
+
+def test_Sub_ack_messages() -> None:
+    """Test the default `Sub.ack_messages()`, acking individually."""
+    sub = backend_interface.Sub()
+    sub.ack_message = MagicMock()  # type: ignore
+    sub.ack_messages([1, 2])
+    assert sub.ack_message.call_count == 2
+
+
+def test_MultiSub_weights() -> None:
+    """Test that `MultiSub` picks buffered messages by weighted round-robin."""
+    sub = backend_interface.MultiSub()
+    sub._set_queues(['a', 'b'], {'a': 3})  # pylint: disable=W0212
+    for i in range(6):
+        sub._buffers['a'].append(backend_interface.Message(i, b'a'))  # pylint: disable=W0212
+        sub._buffers['b'].append(backend_interface.Message(i, b'b'))  # pylint: disable=W0212
+    sub._fill_buffers = MagicMock()  # type: ignore  # pylint: disable=W0212
+
+    picked = [sub.get_message() for _ in range(12)]
+    assert [p[0] for p in picked if p] == ['a', 'a', 'b', 'a'] * 2 + ['b'] * 4  # 3:1, while both have messages
+    assert [p[1].msg_id for p in picked if p and p[0] == 'a'] == list(range(6))  # in arrival order
+    assert sub.get_message() is None
@@ -0,0 +1,177 @@
+"""Unit test claim-check offload of large messages."""
+
+import mmap
+import os
+import uuid
+from typing import Any, Dict
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import memory, queuestore
+from MQClient.claimcheck import BlobStore, ClaimCheck, FileBlobStore, ReferenceSerializer, S3BlobStore, claim_key
+from MQClient.packing import PackingPolicy
+from MQClient.serializers import loads
+
+
+def _queue(tmp_path: Any, **kwargs: Any) -> Queue:
+    store = FileBlobStore(str(tmp_path))
+    return Queue(memory.Backend(), name=uuid.uuid4().hex, claim_check=ClaimCheck(store, threshold=1000), **kwargs)
+
+
+def _broker_messages(q: Queue) -> list:  # type: ignore[type-arg]
+    return list(queuestore.get_queue(q.address, q.name).ready)
+
+
+def _blobs(tmp_path: Any) -> int:
+    return len([f for f in os.listdir(tmp_path) if f.endswith('.blob')])
+
+
+def test_offload() -> None:
+    """Test that only large messages are offloaded, as references."""
+    stored = {}  # type: Dict[str, bytes]
+
+    class DictStore(BlobStore):
+        def put(self, key: str, data: bytes) -> None:
+            stored[key] = data
+
+    store = DictStore()
+    sent = ClaimCheck(store, threshold=100).offload([b'x' * 99, b'y' * 100])
+    assert sent[0] == b'x' * 99
+    assert stored[claim_key(sent[1])] == b'y' * 100  # type: ignore
+    assert claim_key(b'x' * 99) is None
+
+    with pytest.raises(ValueError):
+        loads(sent[1])  # can't be deserialized without a ClaimCheck
+    with pytest.raises(ValueError):
+        claim_key(ReferenceSerializer().dumps('../../etc/passwd'))
+    with pytest.raises(ValueError):
+        ClaimCheck(store, threshold=10)
+
+
+def test_file_blob_store(tmp_path: Any) -> None:
+    """Test the local filesystem store, memory-mapped or not."""
+    store = FileBlobStore(str(tmp_path))
+    store.put('a', b'data')
+    blob = store.get('a')
+    assert isinstance(blob, mmap.mmap) and blob[:] == b'data'
+    store.delete('a')
+    store.delete('a')
+    assert not os.listdir(tmp_path)
+
+    store = FileBlobStore(str(tmp_path), use_mmap=False)
+    store.put('b', b'data')
+    assert store.get('b') == b'data'
+
+
+def test_s3_blob_store() -> None:
+    """Test the S3 adapter's calls, with a fake client."""
+    objects = {}  # type: Dict[str, bytes]
+
+    class Body:  # pylint: disable=R0903
+        def __init__(self, data: bytes) -> None:
+            self.data = data
+
+        def read(self) -> bytes:
+            return self.data
+
+    class Client:
+        def put_object(self, Bucket: str, Key: str, Body: bytes) -> None:  # pylint: disable=C0103
+            objects[f'{Bucket}/{Key}'] = Body
+
+        def get_object(self, Bucket: str, Key: str) -> Dict[str, Any]:  # pylint: disable=C0103
+            return {'Body': Body(objects[f'{Bucket}/{Key}'])}
+
+        def delete_object(self, Bucket: str, Key: str) -> None:  # pylint: disable=C0103
+            objects.pop(f'{Bucket}/{Key}', None)
+
+    store = S3BlobStore('bucket', prefix='mq/', client=Client())
+    store.put('k', b'data')
+    assert objects == {'bucket/mq/k': b'data'}
+    assert store.get('k') == b'data'
+    store.delete('k')
+    assert not objects
+
+
+def test_recv_and_cleanup(tmp_path: Any) -> None:
+    """Test that large messages go through the store, and are deleted once acked."""
+    q = _queue(tmp_path)
+    big = b'x' * 10000
+    q.send(big)
+    q.send('small')
+    q.send_many([big, 'small'])
+    assert _blobs(tmp_path) == 2
+    assert all(len(raw) < 100 for raw in _broker_messages(q))
+
+    with q.recv(timeout=0) as stream:
+        assert list(stream) == [big, 'small', big, 'small']
+    assert _blobs(tmp_path) == 0
+
+
+def test_reject_keeps_blob(tmp_path: Any) -> None:
+    """Test that a rejected message's blob is kept, for redelivery."""
+    q = _queue(tmp_path)
+    q.send(b'x' * 10000)
+
+    with pytest.raises(ValueError):
+        with q.recv_one():
+            raise ValueError()
+    assert _blobs(tmp_path) == 1
+
+    with pytest.raises(ValueError):
+        with q.recv_batch():
+            raise ValueError()
+    assert _blobs(tmp_path) == 1
+
+    with q.recv_batch() as batch:
+        assert batch == [b'x' * 10000]
+    assert _blobs(tmp_path) == 0
+
+
+def test_packed_and_buffered(tmp_path: Any) -> None:
+    """Test that whole envelopes, and buffered sends, are offloaded."""
+    q = _queue(tmp_path, packing=PackingPolicy())
+    q.send_many([b'x' * 100] * 20)
+    q.send_buffered(b'y' * 2000).result(timeout=5)
+    assert _blobs(tmp_path) == 2
+
+    with q.recv(timeout=0) as stream:
+        assert list(stream) == [b'x' * 100] * 20 + [b'y' * 2000]
+    assert _blobs(tmp_path) == 0
+    q.close()
+
+
+def test_recv_reject_forgets_claim(tmp_path: Any) -> None:
+    """Test that a message rejected by `recv()` keeps its blob, and isn't tracked."""
+    q = _queue(tmp_path)
+    q._propagate_recv_error = True  # pylint: disable=W0212
+    q.send(b'x' * 10000)
+
+    with pytest.raises(ValueError):
+        with q.recv(timeout=0) as stream:
+            for _ in stream:
+                raise ValueError()
+    assert _blobs(tmp_path) == 1
+    assert not q._claims  # pylint: disable=W0212
+
+
+def test_raw_sub_queue_claims(tmp_path: Any) -> None:
+    """Test decoding, and settling the claims of, messages from `raw_sub_queue`."""
+    q = _queue(tmp_path)
+    q.send(b'x' * 10000)
+
+    msg = q.raw_sub_queue.get_message()
+    assert msg
+    assert q.decode(msg) == [b'x' * 10000]
+    q.drop_claims([msg.msg_id])
+    q.raw_sub_queue.reject_message(msg.msg_id)
+    assert _blobs(tmp_path) == 1
+
+    msg = q.raw_sub_queue.get_message()
+    assert msg
+    assert q.decode(msg) == [b'x' * 10000]
+    q.raw_sub_queue.ack_message(msg.msg_id)
+    q.release_claims([msg.msg_id])
+    assert _blobs(tmp_path) == 0
+    q.close()
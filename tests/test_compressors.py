@@ -0,0 +1,55 @@
+"""Unit test compressors."""
+
+import os
+import pickle
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import compressors, serializers
+
+DATA = {'event': 'foo', 'values': list(range(100)) * 20}
+
+
+@pytest.mark.parametrize('compressor_class', [  # type: ignore
+    compressors.ZlibCompressor,
+    compressors.LZMACompressor,
+    compressors.LZ4Compressor,
+])
+def test_round_trip(compressor_class: type) -> None:
+    """Test that compressed messages are auto-detected and decoded."""
+    if not compressors.is_available(compressor_class):
+        pytest.skip(f'{compressor_class.__name__} is not installed')
+
+    compressor = compressor_class(threshold=0)
+    raw = serializers.PickleSerializer().dumps(DATA)
+    compressed = compressor.compress_message(raw)
+    assert compressed.startswith(compressors.MAGIC + bytes([compressor.compressor_id]))
+    assert len(compressed) < len(raw)
+    assert compressors.decompress(compressed) == raw
+    assert serializers.loads(compressed) == DATA
+
+
+def test_threshold() -> None:
+    """Test that small messages are not compressed."""
+    raw = serializers.PickleSerializer().dumps(DATA)
+
+    compressor = compressors.ZlibCompressor(threshold=len(raw) + 1)
+    assert compressor.compress_message(raw) is raw
+
+    compressor = compressors.ZlibCompressor(threshold=len(raw))
+    assert compressor.compress_message(raw) is not raw
+
+
+def test_incompressible() -> None:
+    """Test that messages which don't shrink are sent uncompressed."""
+    raw = serializers.RawSerializer().dumps(os.urandom(2048))
+    assert compressors.ZlibCompressor(threshold=0).compress_message(raw) is raw
+
+
+def test_mixed_stream() -> None:
+    """Test decoding a mix of compressed, uncompressed, and legacy messages."""
+    compressor = compressors.ZlibCompressor(threshold=100)
+    stream = [compressor.compress_message(serializers.PickleSerializer().dumps(d)) for d in [1, DATA]]
+    stream.append(pickle.dumps(DATA, protocol=4))
+    assert [serializers.loads(raw) for raw in stream] == [1, DATA, DATA]
@@ -0,0 +1,109 @@
+"""Unit test instrumentation hooks."""
+
+import uuid
+from typing import Any, List, Tuple
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import memory
+from MQClient.metrics import Metrics, PrometheusMetrics, QueueMetrics
+from MQClient.workers import WorkerPool
+
+
+class RecordingMetrics(Metrics, QueueMetrics):
+    """Record every hook call."""
+
+    def __init__(self) -> None:
+        self.calls = []  # type: List[Tuple[str, Any]]
+        self.labels = None  # type: Any
+
+    def for_queue(self, backend: str, queue: str) -> QueueMetrics:
+        self.labels = (backend, queue)
+        return self
+
+    def serialized(self, num_bytes: int, seconds: float) -> None:
+        self.calls.append(('serialized', num_bytes))
+
+    def published(self, count: int, seconds: float) -> None:
+        self.calls.append(('published', count))
+
+    def received(self, num_bytes: int) -> None:
+        self.calls.append(('received', num_bytes))
+
+    def handled(self, seconds: float) -> None:
+        self.calls.append(('handled', None))
+
+    def acked(self, count: int = 1) -> None:
+        self.calls.append(('acked', count))
+
+    def nacked(self, count: int = 1) -> None:
+        self.calls.append(('nacked', count))
+
+
+def test_queue_hooks() -> None:
+    """Test that sending, receiving, acking and rejecting are recorded."""
+    metrics = RecordingMetrics()
+    name = uuid.uuid4().hex
+    q = Queue(memory.Backend(), name=name, metrics=metrics)
+    assert metrics.labels == ('memory', name)
+
+    q.send('foo')
+    q.send_many(['bar', 'baz'])
+    size = metrics.calls[0][1]
+    assert metrics.calls == [('serialized', size), ('published', 1),
+                             ('serialized', size), ('serialized', size), ('published', 2)]
+
+    metrics.calls.clear()
+    with q.recv_one() as data:
+        assert data == 'foo'
+    with pytest.raises(ValueError):
+        with q.recv_one():
+            raise ValueError()
+    assert metrics.calls == [('received', size), ('handled', None), ('acked', 1),
+                             ('received', size), ('handled', None), ('nacked', 1)]
+
+    metrics.calls.clear()
+    with q.recv(timeout=0) as stream:
+        assert sorted(stream) == ['bar', 'baz']
+    assert [c for c, _ in metrics.calls].count('received') == 2
+    assert [c for c, _ in metrics.calls].count('handled') == 2
+    assert sum(n for c, n in metrics.calls if c == 'acked') == 2
+
+
+def test_worker_pool_hooks() -> None:
+    """Test that a `WorkerPool`'s handled and failed messages are recorded, as `recv()`'s."""
+    metrics = RecordingMetrics()
+    q = Queue(memory.Backend(), name=uuid.uuid4().hex, metrics=metrics)
+    q.send_many(['foo', 'fail'])
+
+    def handler(data: str) -> None:
+        if data == 'fail':
+            pool.stop()
+            raise ValueError()
+
+    pool = WorkerPool(q, handler, workers=1)
+    pool.run(timeout=0)
+    calls = [c for c, _ in metrics.calls]
+    assert calls.count('received') == calls.count('handled') == pool.processed + pool.failed
+    assert calls.count('acked') == pool.processed == 1
+    assert calls.count('nacked') == pool.failed >= 1  # may be redelivered before stopping
+
+
+def test_prometheus() -> None:
+    """Test exporting to a prometheus registry."""
+    prometheus_client = pytest.importorskip('prometheus_client')
+    registry = prometheus_client.CollectorRegistry()
+    q = Queue(memory.Backend(), name='q', metrics=PrometheusMetrics(registry=registry))
+
+    q.send_many(['foo', 'bar'])
+    with q.recv_one():
+        pass
+
+    labels = {'backend': 'memory', 'queue': 'q'}
+    assert registry.get_sample_value('mqclient_messages_sent_total', labels) == 2
+    assert registry.get_sample_value('mqclient_messages_received_total', labels) == 1
+    assert registry.get_sample_value('mqclient_messages_acked_total', labels) == 1
+    assert registry.get_sample_value('mqclient_messages_in_flight', labels) == 0
+    assert registry.get_sample_value('mqclient_serialize_seconds_count', labels) == 2
@@ -0,0 +1,109 @@
+"""Unit test client-side packing of messages into envelopes."""
+
+import uuid
+from typing import Any
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import memory, queuestore
+from MQClient.compressors import ZlibCompressor
+from MQClient.packing import PackingPolicy
+from MQClient.serializers import EnvelopeSerializer, loads, unpack
+
+
+def _queue(packing: PackingPolicy) -> Queue:
+    return Queue(memory.Backend(), name=uuid.uuid4().hex, packing=packing)
+
+
+def _broker_messages(q: Queue) -> int:
+    """Count the ready messages in `q`'s in-memory queue."""
+    return len(queuestore.get_queue(q.address, q.name).ready)
+
+
+def test_pack() -> None:
+    """Test grouping by count and size."""
+    policy = PackingPolicy(max_items=3, max_bytes=10)
+    packed = policy.pack([b'a', b'b', b'c', b'd', b'0123456789ab', b'e'])
+    assert [unpack(p) for p in packed] == [[b'a', b'b', b'c'], None, None, None]
+    assert packed[1:] == [b'd', b'0123456789ab', b'e']  # lone messages aren't wrapped
+
+    envelope = EnvelopeSerializer().dumps([b'x', b'yz'])
+    assert unpack(envelope) == [b'x', b'yz']
+    assert unpack(b'x') is None
+
+    with pytest.raises(ValueError):
+        PackingPolicy(max_items=0)
+
+
+def test_send_many_recv() -> None:
+    """Test that items are sent in envelopes, and received one by one."""
+    q = _queue(PackingPolicy(max_items=10))
+    q.send_many(range(25))
+    assert _broker_messages(q) == 3
+    q.send('single')
+
+    with q.recv(timeout=0) as stream:
+        assert list(stream) == list(range(25)) + ['single']
+    assert _broker_messages(q) == 0
+
+
+def test_compressed_envelope(mocker: Any) -> None:
+    """Test that envelopes are compressed as a whole, and decompressed once."""
+    q = Queue(memory.Backend(), name=uuid.uuid4().hex, packing=PackingPolicy(),
+              compressor=ZlibCompressor(threshold=0))
+    q.send_many(['foo'] * 50)
+    assert loads(queuestore.get_queue(q.address, q.name).ready[0]) == ['foo'] * 50
+
+    q.send('bar')  # not packed
+    decompress = mocker.spy(ZlibCompressor, 'decompress')
+    with q.recv_batch(max_items=2) as batch:
+        assert batch == ['foo'] * 50 + ['bar']
+    assert decompress.call_count == 2
+
+
+def test_send_buffered_linger() -> None:
+    """Test that buffered sends linger to fill an envelope."""
+    q = _queue(PackingPolicy(linger=5))
+    q._send_batch_size = 4  # pylint: disable=W0212
+    futures = [q.send_buffered(i) for i in range(4)]
+    for f in futures:
+        f.result(timeout=5)
+    assert _broker_messages(q) == 1
+
+    with q.recv(timeout=0) as stream:
+        assert list(stream) == [0, 1, 2, 3]
+    q.close()
+
+
+def test_error_mid_envelope_requeues_remainder() -> None:
+    """Test that on error, only the unprocessed items are re-sent."""
+    q = _queue(PackingPolicy())
+    q.send_many(range(5))
+
+    seen = []
+    with q.recv(timeout=0) as stream:
+        for data in stream:
+            if data == 2:
+                raise ValueError()
+            seen.append(data)
+    with q.recv(timeout=0) as stream:
+        seen.extend(stream)
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_error_mid_envelope_rejects() -> None:
+    """Test that without `requeue_remainder`, the whole envelope is redelivered."""
+    q = _queue(PackingPolicy(requeue_remainder=False))
+    q.send_many(range(3))
+
+    seen = []
+    with q.recv(timeout=0) as stream:
+        for data in stream:
+            if data == 1:
+                raise ValueError()
+            seen.append(data)
+    with q.recv(timeout=0) as stream:
+        seen.extend(stream)
+    assert seen == [0, 0, 1, 2]
@@ -1,13 +1,21 @@
 """Unit test Queue class."""
 
+import asyncio
 import pickle
+import threading
+import time
 from functools import partial
-from typing import Any, Generator, List
-from unittest.mock import MagicMock
+from typing import Any, AsyncGenerator, Generator, List
+from unittest.mock import ANY, AsyncMock, MagicMock
+
+import pytest  # type: ignore
 
 # local imports
-from MQClient import Queue
+from MQClient import AsyncQueue, FanOutQueue, MultiQueue, Queue, publish_to
 from MQClient.backend_interface import Backend, Message
+from MQClient.compressors import ZlibCompressor
+from MQClient.packing import PackingPolicy
+from MQClient.serializers import JSONSerializer, PickleSerializer, loads, unpack
 
 
 def test_Queue_init() -> None:
@@ -45,7 +53,112 @@ def test_Queue_send() -> None:
     data = {'a': 1234}
     q.send(data)
 
-    q.raw_pub_queue.send_message.assert_called_with(pickle.dumps(data, protocol=4))  # type: ignore
+    q.raw_pub_queue.send_message.assert_called_with(PickleSerializer().dumps(data))  # type: ignore
+
+    q = Queue(backend, serializer=JSONSerializer())
+    q.send(data)
+    q.raw_pub_queue.send_message.assert_called_with(JSONSerializer().dumps(data))  # type: ignore
+
+    big_data = {'a': [1234] * 1000}
+    q = Queue(backend, compressor=ZlibCompressor())
+    q.send(big_data)
+    raw = q.raw_pub_queue.send_message.call_args[0][0]  # type: ignore
+    assert raw == ZlibCompressor().compress_message(PickleSerializer().dumps(big_data))
+    assert loads(raw) == big_data
+
+
+def test_Queue_send_many() -> None:
+    """Test send_many."""
+    backend = MagicMock()
+
+    q = Queue(backend)
+
+    data = [{'a': i} for i in range(5)]
+    q.send_many(data, batch_size=2)
+
+    calls = q.raw_pub_queue.send_messages.call_args_list  # type: ignore
+    assert [len(c[0][0]) for c in calls] == [2, 2, 1]
+    assert [m for c in calls for m in c[0][0]] == [PickleSerializer().dumps(d) for d in data]
+
+
+def test_Queue_send_buffered() -> None:
+    """Test send_buffered, publishing in batches on a background thread."""
+    backend = MagicMock()
+    pub = backend.create_pub_queue.return_value
+
+    q = Queue(backend, send_batch_size=2)
+
+    data = [{'a': i} for i in range(5)]
+    futures = [q.send_buffered(d) for d in data]
+    q.flush(timeout=1)
+
+    assert all(f.done() and f.exception() is None for f in futures)
+    calls = pub.send_messages.call_args_list
+    assert all(len(c[0][0]) <= 2 for c in calls)
+    assert [m for c in calls for m in c[0][0]] == [PickleSerializer().dumps(d) for d in data]
+    pub.send_message.assert_not_called()
+
+    q.close()
+    pub.close.assert_called_once()
+    assert not q._sender  # pylint: disable=W0212
+
+
+def test_Queue_send_buffered_error() -> None:
+    """Test that a failed background send fails its futures, then reconnects."""
+    backend = MagicMock()
+    pub = backend.create_pub_queue.return_value
+    pub.send_messages.side_effect = [Exception('broker down'), None]
+
+    q = Queue(backend)
+
+    future = q.send_buffered('a')
+    with pytest.raises(Exception, match='broker down'):
+        future.result(timeout=1)
+
+    q.send_buffered('b').result(timeout=1)
+    assert backend.create_pub_queue.call_count == 2
+    q.close()
+
+
+def test_Queue_send_buffered_backpressure() -> None:
+    """Test that send_buffered blocks, then times out, when the buffer is full."""
+    backend = MagicMock()
+    sending = threading.Event()
+    backend.create_pub_queue.return_value.send_messages.side_effect = lambda _: sending.wait()
+
+    q = Queue(backend, send_buffer_size=1, send_batch_size=1)
+
+    q.send_buffered('a')  # being sent (blocked)
+    time.sleep(0.1)
+    q.send_buffered('b')  # buffered
+    with pytest.raises(TimeoutError):
+        q.send_buffered('c', timeout=0.1)
+    with pytest.raises(TimeoutError):
+        q.flush(timeout=0.1)
+
+    sending.set()
+    q.flush(timeout=1)
+    q.close()
+
+
+def test_Queue_send_buffered_cancel() -> None:
+    """Test that a cancelled (still buffered) message isn't sent, and doesn't block flush."""
+    backend = MagicMock()
+    sending = threading.Event()
+    pub = backend.create_pub_queue.return_value
+    pub.send_messages.side_effect = lambda _: sending.wait()
+
+    q = Queue(backend, send_batch_size=1)
+
+    q.send_buffered('a')  # being sent (blocked)
+    time.sleep(0.1)
+    future = q.send_buffered('b')  # buffered
+    assert future.cancel()
+
+    sending.set()
+    q.flush(timeout=1)
+    assert pub.send_messages.call_count == 1
+    q.close()
 
 
 def test_Queue_recv() -> None:
@@ -82,3 +195,296 @@ def test_Queue_recv_one() -> None:
 
     assert data == recv_data
     q.raw_sub_queue.ack_message.assert_called_with(0)  # type: ignore
+
+
+def test_Queue_recv_one_json() -> None:
+    """Test recv_one, with a JSON-serialized message."""
+    backend = MagicMock()
+
+    q = Queue(backend)
+
+    data = {'b': 100}
+    msg = Message(0, JSONSerializer().dumps(data))
+    q.raw_sub_queue.get_message.return_value = msg  # type: ignore
+
+    with q.recv_one() as d:
+        recv_data = d
+
+    assert data == recv_data
+    q.raw_sub_queue.ack_message.assert_called_with(0)  # type: ignore
+
+
+def test_Queue_recv_one_keep_open() -> None:
+    """Test recv_one, reusing the sub queue until it is idle."""
+    backend = MagicMock()
+
+    q = Queue(backend)
+
+    data = {'b': 100}
+    sub = q.raw_sub_queue
+    sub.get_message.return_value = Message(0, pickle.dumps(data, protocol=4))  # type: ignore
+
+    for _ in range(3):
+        with q.recv_one(keep_open=True, idle_timeout=0.1) as d:
+            assert d == data
+    backend.create_sub_queue.assert_called_once()
+    sub.close.assert_not_called()  # type: ignore
+
+    time.sleep(0.3)
+    sub.close.assert_not_called()  # type: ignore  # not from another thread
+
+    with q.recv_one(keep_open=True, idle_timeout=0.1) as d:
+        assert d == data
+    sub.close.assert_called_once()  # type: ignore
+    assert backend.create_sub_queue.call_count == 2
+
+    q.close()
+    assert q._sub_queue is None  # pylint: disable=W0212
+
+
+def test_Queue_recv_batch() -> None:
+    """Test recv_batch, acking the batch on success."""
+    backend = MagicMock()
+
+    q = Queue(backend)
+
+    data = [{'a': i} for i in range(3)]
+    msgs = [Message(i, JSONSerializer().dumps(d)) for i, d in enumerate(data)]
+    sub = q.raw_sub_queue
+    sub.get_messages.return_value = msgs  # type: ignore
+
+    with q.recv_batch(max_items=10, max_wait=0.5) as batch:
+        assert batch == data
+    sub.get_messages.assert_called_with(10, timeout_millis=500)  # type: ignore
+    sub.ack_messages.assert_called_once_with([0, 1, 2])  # type: ignore
+    sub.reject_message.assert_not_called()  # type: ignore
+    sub.close.assert_called_once()  # type: ignore
+
+
+def test_Queue_recv_batch_reject() -> None:
+    """Test recv_batch, rejecting the whole batch on error."""
+    backend = MagicMock()
+
+    q = Queue(backend)
+
+    sub = q.raw_sub_queue
+    sub.get_messages.return_value = [Message(i, PickleSerializer().dumps(i)) for i in range(3)]  # type: ignore
+
+    with pytest.raises(ValueError):
+        with q.recv_batch() as batch:
+            assert batch == [0, 1, 2]
+            raise ValueError()
+    assert sub.reject_message.call_count == 3  # type: ignore
+    sub.ack_messages.assert_not_called()  # type: ignore
+
+
+def test_Queue_recv_batch_empty() -> None:
+    """Test recv_batch, with no messages."""
+    backend = MagicMock()
+
+    q = Queue(backend)
+
+    sub = q.raw_sub_queue
+    sub.get_messages.return_value = []  # type: ignore
+
+    with q.recv_batch() as batch:
+        assert batch == []
+    sub.ack_messages.assert_not_called()  # type: ignore
+
+
+def test_MultiQueue_recv() -> None:
+    """Test MultiQueue.recv, acking each message when the next is requested."""
+    backend = MagicMock()
+
+    q = MultiQueue(backend, ['a', 'b'], weights={'a': 2})
+    sub = q.raw_sub_queue
+    backend.create_multi_sub_queue.assert_called_once_with('localhost', ['a', 'b'], 1, {'a': 2})
+    sub.get_message.side_effect = [('a', Message(0, pickle.dumps('x', protocol=4))),  # type: ignore
+                                   ('b', Message(1, pickle.dumps('y', protocol=4))),
+                                   None]
+
+    with q.recv(timeout=1) as stream:
+        for name, data in stream:
+            if name == 'a':
+                assert data == 'x'
+                sub.ack_message.assert_not_called()  # type: ignore
+    assert [c[0] for c in sub.ack_message.call_args_list] == [('a', 0), ('b', 1)]  # type: ignore
+    sub.get_message.assert_called_with(timeout_millis=1000)  # type: ignore
+    sub.close.assert_called_once()  # type: ignore
+
+
+def test_MultiQueue_recv_reject() -> None:
+    """Test MultiQueue.recv, rejecting the current message on error."""
+    backend = MagicMock()
+
+    q = MultiQueue(backend, ['a', 'b'])
+    sub = q.raw_sub_queue
+    sub.get_message.return_value = ('b', Message(0, pickle.dumps('y', protocol=4)))  # type: ignore
+
+    with pytest.raises(ValueError):
+        with q.recv() as stream:
+            for _ in stream:
+                raise ValueError()
+    sub.reject_message.assert_called_once_with('b', 0)  # type: ignore
+    sub.ack_message.assert_not_called()  # type: ignore
+
+    with pytest.raises(ValueError):
+        MultiQueue(backend, [])
+
+
+def test_FanOutQueue_send() -> None:
+    """Test FanOutQueue serializes once, and publishes to all queues at once."""
+    backend = MagicMock()
+
+    q = FanOutQueue(backend, ['a', 'b'], serializer=JSONSerializer())
+    pub = q.raw_pub_queue
+    backend.create_fan_out_pub_queue.assert_called_once_with('localhost', ['a', 'b'])
+
+    q.send({'x': 1})
+    pub.send_message.assert_called_once_with(JSONSerializer().dumps({'x': 1}))  # type: ignore
+
+    q.send_many(range(3), batch_size=2)
+    assert [loads(m) for c in pub.send_messages.call_args_list for m in c[0][0]] == [0, 1, 2]  # type: ignore
+    assert pub.send_messages.call_count == 2  # type: ignore
+
+    q.close()
+    pub.close.assert_called_once()  # type: ignore
+
+
+def test_publish_to() -> None:
+    """Test publish_to, sending to each queue."""
+    backend = MagicMock()
+
+    queues = [Queue(backend, name='a'), Queue(backend, name='b')]
+    publish_to(queues, 'foo')
+    publish_to(queues, 'bar')  # reuses the connection
+    backend.create_fan_out_pub_queue.assert_called_once_with('localhost', ['a', 'b'])
+    pub = backend.create_fan_out_pub_queue.return_value
+    assert pub.send_message.call_count == 2
+    backend.create_pub_queue.assert_not_called()
+
+    pub.close.assert_not_called()
+    queues[0].close()
+    pub.close.assert_called_once()
+
+    pub.send_message.side_effect = ConnectionError()
+    with pytest.raises(ConnectionError):
+        publish_to(queues, 'foo')
+    assert pub.close.call_count == 2  # not reused after an error
+    assert not queues[0]._fan_outs  # pylint: disable=W0212
+
+    with pytest.raises(ValueError):
+        publish_to([Queue(backend), Queue(MagicMock())], 'foo')
+
+
+def _async_backend() -> Any:
+    """Return a mock asyncio backend."""
+    backend = MagicMock()
+    backend.create_pub_queue = AsyncMock(return_value=AsyncMock())
+    backend.create_sub_queue = AsyncMock(return_value=AsyncMock(was_closed=False))
+    return backend
+
+
+@pytest.mark.asyncio  # type: ignore
+async def test_AsyncQueue_send() -> None:
+    """Test send."""
+    backend = _async_backend()
+    pub = backend.create_pub_queue.return_value
+
+    q = AsyncQueue(backend)
+
+    data = {'a': 1234}
+    await q.send(data)
+    pub.send_message.assert_called_with(PickleSerializer().dumps(data))
+
+    await q.send_many([data, data])
+    pub.send_messages.assert_called_with([PickleSerializer().dumps(data)] * 2)
+
+
+@pytest.mark.asyncio  # type: ignore
+async def test_AsyncQueue_options() -> None:
+    """Test the metrics and packing options, and rejecting claim_check."""
+    backend = _async_backend()
+    pub = backend.create_pub_queue.return_value
+    sub = backend.create_sub_queue.return_value
+    metrics = MagicMock()
+    queue_metrics = metrics.for_queue.return_value
+
+    q = AsyncQueue(backend, metrics=metrics, packing=PackingPolicy())
+
+    await q.send_many(range(10))
+    envelopes = pub.send_messages.call_args[0][0]
+    assert len(envelopes) == 1
+    assert [loads(item) for item in unpack(envelopes[0]) or []] == list(range(10))
+    queue_metrics.published.assert_called_with(10, ANY)
+
+    sub.get_message.return_value = Message(0, envelopes[0])
+    async with q.recv_one() as d:
+        assert d == list(range(10))
+    queue_metrics.received.assert_called_with(len(envelopes[0]))
+    queue_metrics.handled.assert_called_once()
+    assert q.metrics is queue_metrics
+
+    with pytest.raises(Exception, match='claim_check'):
+        AsyncQueue(backend, claim_check=MagicMock())
+
+
+@pytest.mark.asyncio  # type: ignore
+async def test_AsyncQueue_recv() -> None:
+    """Test recv."""
+
+    async def gen(data: List[Any], *args: Any, **kwargs: Any) -> AsyncGenerator[Message, None]:
+        for i, d in enumerate(data):
+            yield Message(i, pickle.dumps(d, protocol=4))
+
+    backend = _async_backend()
+    sub = backend.create_sub_queue.return_value
+
+    q = AsyncQueue(backend)
+
+    data = ['a', {'b': 100}, ['foo', 'bar']]
+    sub.message_generator = MagicMock(side_effect=partial(gen, data))
+
+    async with q.recv() as recv_gen:
+        recv_data = [d async for d in recv_gen]
+        assert data == recv_data
+
+
+@pytest.mark.asyncio  # type: ignore
+async def test_AsyncQueue_recv_one() -> None:
+    """Test recv_one."""
+    backend = _async_backend()
+    sub = backend.create_sub_queue.return_value
+
+    q = AsyncQueue(backend)
+
+    data = {'b': 100}
+    sub.get_message.return_value = Message(0, pickle.dumps(data, protocol=4))
+
+    async with q.recv_one() as d:
+        recv_data = d
+
+    assert data == recv_data
+    sub.ack_message.assert_called_with(0)
+    sub.close.assert_called()
+
+
+@pytest.mark.asyncio  # type: ignore
+async def test_AsyncQueue_recv_one_keep_open() -> None:
+    """Test recv_one, reusing the sub queue until it is idle."""
+    backend = _async_backend()
+    sub = backend.create_sub_queue.return_value
+
+    q = AsyncQueue(backend)
+
+    data = {'b': 100}
+    sub.get_message.return_value = Message(0, pickle.dumps(data, protocol=4))
+
+    for _ in range(3):
+        async with q.recv_one(keep_open=True, idle_timeout=0.1) as d:
+            assert d == data
+    backend.create_sub_queue.assert_called_once()
+    sub.close.assert_not_called()
+
+    await asyncio.sleep(0.3)
+    sub.close.assert_called_once()
@@ -0,0 +1,87 @@
+"""Unit test retry policy."""
+
+from typing import Any, List
+from unittest.mock import MagicMock, patch
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.retry import RetryPolicy
+
+
+def test_backoff() -> None:
+    """Test that waits grow exponentially, up to `max_delay`."""
+    policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=False)
+    assert [policy.backoff(n) for n in range(1, 6)] == [1, 2, 4, 5, 5]
+
+    policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=True)
+    for n in range(1, 6):
+        assert 0 <= policy.backoff(n) <= min(5, 2 ** (n - 1))
+
+
+def test_invalid() -> None:
+    """Test that bad arguments are rejected."""
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+    with pytest.raises(ValueError):
+        RetryPolicy(base_delay=-1)
+    with pytest.raises(ValueError):
+        RetryPolicy(multiplier=0.5)
+
+
+@patch('time.sleep')
+def test_attempts(sleep: Any) -> None:
+    """Test that `attempts()` sleeps before each retry, and counts them."""
+    policy = RetryPolicy(max_attempts=4, base_delay=1, jitter=False)
+    assert list(policy.attempts()) == [0, 1, 2, 3]
+    assert [c[0][0] for c in sleep.call_args_list] == [1, 2, 4]
+    assert policy.retries == 3
+    assert policy.exhausted == 1
+
+    # success on the 2nd attempt
+    for i in policy.attempts():
+        if i == 1:
+            break
+    assert policy.retries == 4
+    assert policy.exhausted == 1
+
+
+@patch('time.sleep')
+def test_deadline(sleep: Any) -> None:
+    """Test that retrying stops before a wait would pass the deadline."""
+    policy = RetryPolicy(max_attempts=100, base_delay=1, jitter=False, deadline=3.5)
+    assert list(policy.attempts()) == [0, 1, 2]  # waits of 1s & 2s, not 4s
+    assert sleep.call_count == 2
+    assert policy.exhausted == 1
+
+
+@pytest.mark.asyncio  # type: ignore
+async def test_async_attempts() -> None:
+    """Test that `async_attempts()` mirrors `attempts()`."""
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    attempts = []  # type: List[int]
+    async for i in policy.async_attempts():
+        attempts.append(i)
+    assert attempts == [0, 1, 2]
+    assert policy.retries == 2
+    assert policy.exhausted == 1
+
+
+def test_queue_retries_create() -> None:
+    """Test that `Queue` retries creating its pub queue per its policy."""
+    backend = MagicMock()
+    pub = MagicMock()
+    backend.create_pub_queue.side_effect = [ConnectionError(), ConnectionError(), pub]
+
+    q = Queue(backend, retry_policy=RetryPolicy(max_attempts=3, base_delay=0))
+    assert q.raw_pub_queue is pub
+    assert backend.create_pub_queue.call_count == 3
+    assert q.retry_policy.retries == 2
+
+    # by default, don't retry
+    backend.create_pub_queue.side_effect = ConnectionError()
+    q = Queue(backend)
+    with pytest.raises(ConnectionError):
+        q.raw_pub_queue  # pylint: disable=W0104
+    assert backend.create_pub_queue.call_count == 4
@@ -0,0 +1,90 @@
+"""Unit test serializers."""
+
+import pickle
+from typing import TYPE_CHECKING, Any
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import serializers
+
+if TYPE_CHECKING:  # py3.8+
+    from typing import SupportsIndex
+
+DATA = [{'a': ['foo', 'bar', 3, 4]}, 1, '2', [1, 2, 3, 4], False, None]
+
+
+class Blob:  # pylint: disable=R0903
+    """Object pickled with an out-of-band buffer."""
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+
+    def __reduce_ex__(self, protocol: 'SupportsIndex') -> Any:
+        return Blob, (pickle.PickleBuffer(self.data),)  # type: ignore  # py3.8+
+
+
+@pytest.mark.parametrize('serializer', [  # type: ignore
+    serializers.PickleSerializer(),
+    serializers.PickleSerializer(protocol=pickle.HIGHEST_PROTOCOL),
+    serializers.JSONSerializer(),
+])
+def test_round_trip(serializer: serializers.Serializer) -> None:
+    """Test that each codec is auto-detected and round-trips data."""
+    for data in DATA:
+        raw = serializer.dumps(data)
+        assert raw.startswith(serializers.MAGIC + bytes([serializer.codec_id]))
+        assert serializers.loads(raw) == data
+
+
+def test_msgpack() -> None:
+    """Test msgpack codec, if installed."""
+    pytest.importorskip('msgpack')
+    serializer = serializers.MsgpackSerializer()
+    for data in DATA:
+        assert serializers.loads(serializer.dumps(data)) == data
+
+
+def test_legacy() -> None:
+    """Test headerless (legacy) pickles."""
+    for data in DATA:
+        assert serializers.loads(pickle.dumps(data, protocol=4)) == data
+
+
+def test_raw() -> None:
+    """Test bytes passthrough."""
+    serializer = serializers.RawSerializer()
+    for data in [b'', b'foo', bytearray(b'bar'), memoryview(b'baz')]:
+        recv = serializers.loads(serializer.dumps(data))
+        assert isinstance(recv, memoryview)
+        assert recv == data
+
+
+def test_pickle_out_of_band() -> None:
+    """Test that protocol-5 buffers are deserialized without a copy."""
+    if pickle.HIGHEST_PROTOCOL < 5:
+        pytest.skip('pickle protocol 5 is not available')
+
+    raw = serializers.PickleSerializer(protocol=5).dumps(Blob(b'x' * 1000))
+    recv = serializers.loads(raw)
+    assert bytes(recv.data) == b'x' * 1000
+    assert isinstance(recv.data, memoryview)
+    assert recv.data.obj is raw
+
+
+def test_buffer_input() -> None:
+    """Test that messages received as a buffer are deserialized without a copy."""
+    buf = bytearray(serializers.RawSerializer().dumps(b'foo'))
+    recv = serializers.loads(memoryview(buf))
+    assert recv == b'foo'
+    assert recv.obj is buf
+
+    for serializer in [serializers.PickleSerializer(), serializers.JSONSerializer()]:
+        assert serializers.loads(memoryview(serializer.dumps(DATA))) == DATA
+    assert serializers.loads(bytearray(pickle.dumps(DATA, protocol=4))) == DATA  # legacy
+
+
+def test_unknown_codec() -> None:
+    """Failure-test an unregistered codec."""
+    with pytest.raises(ValueError):
+        serializers.loads(serializers.MAGIC + b'\xff')
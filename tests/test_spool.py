@@ -0,0 +1,125 @@
+"""Unit test the durable local spool."""
+
+import os
+import time
+import uuid
+from typing import Any, List
+from unittest.mock import MagicMock
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import memory
+from MQClient.spool import Spool, SpoolFull
+
+
+def test_fifo(tmp_path: Any) -> None:
+    """Test appending, peeking and committing, across segments."""
+    spool = Spool(str(tmp_path), segment_size=36, max_bytes=1024)
+    raws = [b'%d' % i * 10 for i in range(10)]  # 2 records per segment
+    spool.append(raws[:5])
+    spool.append(raws[5:])
+    assert len(spool) == 10
+    assert len([f for f in os.listdir(tmp_path) if f.endswith('.seg')]) == 5
+
+    assert spool.peek(3) == raws[:3]
+    spool.commit(3)
+    assert spool.peek(100) == raws[3:]
+    assert len([f for f in os.listdir(tmp_path) if f.endswith('.seg')]) == 4
+
+    spool.commit(7)
+    assert not spool.pending
+    assert spool.disk_usage == 0
+    spool.append([b'x'])
+    assert spool.peek(2) == [b'x']
+
+
+def test_reopen(tmp_path: Any) -> None:
+    """Test that spooled messages, and the replay position, survive a restart."""
+    spool = Spool(str(tmp_path), segment_size=32)
+    spool.append([b'a' * 10, b'b' * 10, b'c' * 10])
+    spool.commit(1)
+    spool.close()
+
+    spool = Spool(str(tmp_path), segment_size=32)
+    assert len(spool) == 2
+    assert spool.peek(5) == [b'b' * 10, b'c' * 10]
+
+
+def test_torn_record(tmp_path: Any) -> None:
+    """Test that a record torn by a crash mid-write is skipped, and overwritten."""
+    spool = Spool(str(tmp_path), segment_size=1024)
+    spool.append([b'a' * 10, b'b' * 10])
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    spool.close()
+
+    with open(path, 'r+b') as f:  # the last record's payload is only partly written
+        f.seek(18 + 8 + 5)
+        f.write(b'\0' * 5)
+
+    spool = Spool(str(tmp_path), segment_size=1024)
+    assert spool.peek(5) == [b'a' * 10]
+    spool.append([b'c' * 10])
+    assert spool.peek(5) == [b'a' * 10, b'c' * 10]
+
+
+def test_full(tmp_path: Any) -> None:
+    """Test that disk usage is bounded."""
+    spool = Spool(str(tmp_path), segment_size=32, max_bytes=64)
+    spool.append([b'a' * 20, b'b' * 20])
+    with pytest.raises(SpoolFull):
+        spool.append([b'c' * 20])
+    assert len(spool) == 2
+
+    with pytest.raises(ValueError):
+        spool.append([b''])
+
+
+def test_queue_spools_and_replays(tmp_path: Any) -> None:
+    """Test that a `Queue` spools while the backend is down, then replays in order."""
+    name = uuid.uuid4().hex
+    backend = memory.Backend()
+    down = MagicMock(wraps=backend)
+    down.create_pub_queue.side_effect = Exception('connection error')
+    spool = Spool(str(tmp_path), retry_interval=0)
+
+    q = Queue(down, name=name, spool=spool)
+    q.send(0)
+    q.send_many([1, 2])
+    assert len(spool) == 3
+    assert not q.replay_spool()
+
+    down.create_pub_queue.side_effect = None  # back up
+    q.send(3)
+    assert not spool.pending
+
+    received = []  # type: List[Any]
+    with Queue(backend, name=name).recv(timeout=0) as stream:
+        received.extend(stream)
+    assert received == [0, 1, 2, 3]
+
+
+def test_queue_spools_when_slow(tmp_path: Any) -> None:
+    """Test that a `Queue` spools after a slow publish, until `retry_interval` passes."""
+    name = uuid.uuid4().hex
+    backend = memory.Backend()
+    spool = Spool(str(tmp_path), retry_interval=0.2, slow_send=0.05)
+
+    q = Queue(backend, name=name, spool=spool)
+    pub = q.raw_pub_queue
+    send_message = pub.send_message
+    pub.send_message = lambda raw: (time.sleep(0.1), send_message(raw))  # type: ignore
+    q.send(0)
+    pub.send_message = send_message  # type: ignore
+    q.send(1)
+    assert len(spool) == 1
+
+    time.sleep(0.3)
+    q.send(2)
+    assert not spool.pending
+
+    received = []  # type: List[Any]
+    with Queue(backend, name=name).recv(timeout=0) as stream:
+        received.extend(stream)
+    assert received == [0, 1, 2]
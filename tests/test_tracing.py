@@ -0,0 +1,85 @@
+"""Unit test per-message phase tracing."""
+
+import logging
+import time
+import uuid
+from typing import Any
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import memory
+from MQClient.tracing import PHASES, Tracer
+
+
+def test_records() -> None:
+    """Test that a message's record is kept once the next one begins."""
+    tracer = Tracer(capacity=2)
+    tracer.add('decode', 1.0)  # no current message
+    assert not tracer.records
+
+    tracer.begin(1.0)
+    tracer.add('process', 2.0)
+    tracer.add('process', 1.0)
+    assert not tracer.records
+    tracer.begin(0.5)
+    assert list(tracer.records) == [{'wait': 1.0, 'process': 3.0}]
+    tracer.end()
+    tracer.end()  # nothing current
+    assert len(tracer.records) == 2
+
+    tracer.begin(0.0)
+    tracer.end()
+    assert len(tracer.records) == 2  # ring buffer
+
+    tracer.clear()
+    assert not tracer.records
+
+
+def test_summary() -> None:
+    """Test summarizing the recorded timings."""
+    tracer = Tracer()
+    assert tracer.summary()['wait'] == {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0, 'share': 0.0}
+
+    for i in range(1, 5):
+        tracer.begin(float(i))
+        tracer.add('process', 1.0)
+    tracer.end()
+
+    summary = tracer.summary()
+    assert set(summary) == set(PHASES)
+    assert summary['wait'] == {'mean': 2.5, 'p50': 2.0, 'p95': 4.0, 'max': 4.0, 'share': 10 / 14}
+    assert summary['process']['share'] == 4 / 14
+    assert summary['ack']['max'] == 0.0
+
+
+def test_log_interval(caplog: Any) -> None:
+    """Test that summaries are logged periodically."""
+    tracer = Tracer(log_interval=0)
+    with caplog.at_level(logging.INFO, logger='MQClient.tracing'):
+        tracer.begin(1.0)
+        tracer.end()
+    assert 'Message phase timings' in caplog.text
+
+
+def test_queue_recv() -> None:
+    """Test that `Queue.recv()` records every phase of each message."""
+    tracer = Tracer()
+    q = Queue(memory.Backend(), name=uuid.uuid4().hex, tracer=tracer)
+    q.send_many(range(3))
+
+    with q.recv(timeout=0) as stream:
+        for _ in stream:
+            time.sleep(0.01)
+
+    assert len(tracer.records) == 3
+    for record in tracer.records:
+        assert set(record) == set(PHASES)
+        assert record['process'] >= 0.01
+
+
+def test_invalid() -> None:
+    """Test that bad arguments are rejected."""
+    with pytest.raises(ValueError):
+        Tracer(capacity=0)
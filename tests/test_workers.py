@@ -0,0 +1,123 @@
+"""Unit test WorkerPool class."""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, List
+
+import pytest  # type: ignore
+
+# local imports
+from MQClient import Queue
+from MQClient.backends import memory
+from MQClient.claimcheck import ClaimCheck, FileBlobStore
+from MQClient.packing import PackingPolicy
+from MQClient.workers import WorkerPool
+
+
+def _queue(prefetch: int = 1) -> Queue:
+    return Queue(memory.Backend(), name=uuid.uuid4().hex, prefetch=prefetch)
+
+
+def _square(x: int) -> int:
+    return x * x
+
+
+def test_handles_and_acks_all() -> None:
+    """Test that every message is handled, concurrently, and acked."""
+    q = _queue(prefetch=4)
+    q.send_many(range(20))
+    seen = []  # type: List[int]
+    lock = threading.Lock()
+
+    def handler(x: int) -> None:
+        time.sleep(0.01)
+        with lock:
+            seen.append(x)
+
+    pool = WorkerPool(q, handler, workers=4)
+    pool.run(timeout=0)
+
+    assert sorted(seen) == list(range(20))
+    assert pool.processed == 20
+    assert pool.failed == 0
+    assert q.raw_sub_queue.get_message(timeout_millis=0) is None  # all acked
+
+
+def test_in_flight_bounded_by_prefetch() -> None:
+    """Test that no more than `prefetch` messages are in flight."""
+    q = _queue(prefetch=2)
+    q.send_many(range(10))
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def handler(_: int) -> None:
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+
+    WorkerPool(q, handler, workers=8).run(timeout=0)
+    assert max_in_flight[0] == 2
+
+
+def test_reject_on_error() -> None:
+    """Test that a failed handler's message is rejected, out of order."""
+    q = _queue(prefetch=2)
+    q.send_many([0.05, 'fail'])
+
+    def handler(x: Any) -> None:
+        if x == 'fail':
+            pool.stop()  # don't keep handling redeliveries
+            raise ValueError()
+        time.sleep(x)
+
+    pool = WorkerPool(q, handler, workers=2)
+    pool.run(timeout=0)
+    assert pool.processed == 1
+    assert pool.failed == 1
+
+    with q.recv_one() as data:  # redelivered
+        assert data == 'fail'
+
+
+def test_stop_drains() -> None:
+    """Test that `stop()` finishes in-flight messages, and leaves the rest."""
+    q = _queue(prefetch=2)
+    q.send_many(range(10))
+    pool = WorkerPool(q, lambda _: time.sleep(0.05), workers=2)
+    threading.Timer(0.01, pool.stop).start()
+    pool.run(timeout=10)
+
+    assert 1 <= pool.processed < 10
+    with q.recv_batch(max_items=10, max_wait=0) as batch:
+        assert len(batch) == 10 - pool.processed
+
+
+@pytest.mark.parametrize('processes', [False, True])  # type: ignore
+def test_pools(processes: bool) -> None:
+    """Test thread & process pools."""
+    q = _queue(prefetch=4)
+    q.send_many(range(8))
+    pool = WorkerPool(q, _square, workers=2, processes=processes)
+    pool.run(timeout=0)
+    assert pool.processed == 8
+
+
+def test_decodes_like_recv(tmp_path: Any) -> None:
+    """Test that envelopes are unpacked, and claim-check references fetched."""
+    q = Queue(memory.Backend(), name=uuid.uuid4().hex, prefetch=2, packing=PackingPolicy(),
+              claim_check=ClaimCheck(FileBlobStore(str(tmp_path)), threshold=1000))
+    q.send_many([b'x' * 100] * 20)
+    q.send(b'y' * 2000)
+    seen = []  # type: List[bytes]
+
+    pool = WorkerPool(q, seen.append, workers=2)
+    pool.run(timeout=0)
+    assert sorted(seen) == [b'x' * 100] * 20 + [b'y' * 2000]
+    assert pool.processed == 2
+    assert not os.listdir(tmp_path)  # blobs deleted once acked